@@ -1 +1,3 @@
-# CloudPOS UI-only skeleton (PySide6)
\ No newline at end of file
+# CloudPOS UI-only skeleton (PySide6)
+
+APP_VERSION = "0.1.0"
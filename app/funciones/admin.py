@@ -1,26 +1,24 @@
 from __future__ import annotations
 import csv
-from PySide6 import QtCore, QtGui, QtWidgets
+from PySide6 import QtCore, QtGui
 from typing import Any, Optional
 
+# Monto entero guardado junto al texto formateado: el CSV lo usa en vez de re-parsear "1.234"
+ROL_MONTO = QtCore.Qt.UserRole + 1
+
+
+def _valor_csv(item: QtGui.QStandardItem) -> str:
+    monto = item.data(ROL_MONTO)
+    return str(monto) if monto is not None else item.text()
+
+
 def exportar_csv(model: QtGui.QStandardItemModel, path: str):
     with open(path, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f, delimiter=";")
         headers = [model.headerData(i, QtCore.Qt.Horizontal) for i in range(model.columnCount())]
         w.writerow(headers)
         for r in range(model.rowCount()):
-            row = [
-                model.item(r, c).text().replace("$", "").replace(".", "")
-                if c >= 2 else model.item(r, c).text()
-                for c in range(model.columnCount())
-            ]
-            w.writerow(row)
-
-def aplicar_filtro_movimientos(table: QtWidgets.QTableView, model: QtGui.QStandardItemModel, texto: str):
-    text = (texto or "").lower().strip()
-    for r in range(model.rowCount()):
-        prod = model.item(r, 2).text().lower()
-        table.setRowHidden(r, text not in prod)
+            w.writerow([_valor_csv(model.item(r, c)) for c in range(model.columnCount())])
 
 def validar_nombre_categoria(nombre: str) -> Optional[str]:
     n = (nombre or "").strip()
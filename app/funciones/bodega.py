@@ -1,83 +1,16 @@
 from __future__ import annotations
 from typing import List, Any
 import os
-import json
-from urllib import request, error
 
-from PySide6 import QtCore, QtGui, QtWidgets
 from app.servicios.api import ApiClient
 
 _client = ApiClient()
 DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
 
 
-def aplicar_filtro(table: QtWidgets.QTableView,
-                   model: QtGui.QStandardItemModel,
-                   texto: str,
-                   categoria: str) -> None:
-    q = (texto or "").strip().lower()
-    cat_filter = (categoria or "").strip()
-    cat_lower = cat_filter.lower()
-    for r in range(model.rowCount()):
-        codigo = (model.item(r, 0).text() if model.item(r, 0) else "").lower()
-        nombre = (model.item(r, 1).text() if model.item(r, 1) else "").lower()
-        cat_row = (model.item(r, 2).text() if model.item(r, 2) else "").lower()
-        match_text = (q in codigo) or (q in nombre) or (q in cat_row) if q else True
-        match_cat = True if (not cat_filter or cat_filter == "Todas") else (cat_row == cat_lower)
-        table.setRowHidden(r, not (match_text and match_cat))
-
-
-def colorizar_stock(model: QtGui.QStandardItemModel) -> None:
-    for r in range(model.rowCount()):
-        try:
-            stock = int(model.item(r, 4).text())
-        except Exception:
-            stock = 0
-        item_stock = model.item(r, 4)
-        if not item_stock:
-            continue
-        if stock <= 0:
-            item_stock.setBackground(QtGui.QBrush(QtGui.QColor("#e74c3c")))
-            item_stock.setForeground(QtGui.QBrush(QtGui.QColor("#ffffff")))
-        elif stock <= 5:
-            item_stock.setBackground(QtGui.QBrush(QtGui.QColor("#f39c12")))
-            item_stock.setForeground(QtGui.QBrush(QtGui.QColor("#000000")))
-        else:
-            item_stock.setBackground(QtGui.QBrush())
-            item_stock.setForeground(QtGui.QBrush())
-
-
-def _parse_error_body(raw: bytes) -> dict:
-    text = raw.decode("utf-8", errors="ignore")
-    try:
-        return json.loads(text)
-    except Exception:
-        return {"detail": text or "HTTP error"}
-
-
 def _put_json(path: str, payload: dict) -> Any:
-    base = _client.base_url.rstrip("/")
-    url = f"{base}/{path.replace('//','/').lstrip('/')}"
-    data = json.dumps(payload).encode("utf-8")
-    req = request.Request(
-        url,
-        data=data,
-        headers={"accept": "application/json", "content-type": "application/json"},
-        method="PUT",
-    )
-    try:
-        with request.urlopen(req, timeout=_client.timeout) as resp:
-            text = resp.read().decode("utf-8", errors="ignore")
-            try:
-                return json.loads(text)
-            except Exception:
-                return {"detail": text or "OK", "status": getattr(resp, "status", 200)}
-    except error.HTTPError as e:
-        body = e.read() or b""
-        parsed = _parse_error_body(body) or {}
-        return {"error": True, "status": e.code, **parsed}
-    except error.URLError as e:
-        return {"error": True, "status": 0, "detail": str(getattr(e, "reason", "Error de red"))}
+    # PUT sin token, sobre el mismo pool keep-alive que el resto de la app
+    return _client._request("PUT", path, payload, include_auth=False)
 
 
 def _extract_list(data: Any, kind: str) -> List[dict]:
@@ -91,38 +24,6 @@ def _extract_list(data: Any, kind: str) -> List[dict]:
     return []
 
 
-def listar_productos() -> List[dict]:
-    """
-    Intenta múltiples rutas conocidas y formatos de respuesta.
-    """
-    paths = ["/muestra_productos", "/productos", "/producto", "/producto/"]
-    last_err: Exception | None = None
-    for p in paths:
-        try:
-            if DEBUG:
-                print(f"[bodega.listar_productos] GET {p}")
-            data = _client.get_json(p)
-            items = _extract_list(data, "productos")
-            if items:
-                if DEBUG:
-                    print(f"[bodega.listar_productos] OK {p} -> {len(items)} items")
-                return items
-            if isinstance(data, list) and len(data) == 0:
-                if DEBUG:
-                    print(f"[bodega.listar_productos] OK {p} -> lista vacía")
-                return []
-            if DEBUG:
-                print(f"[bodega.listar_productos] Formato no reconocido en {p}: {type(data)} {data}")
-        except Exception as e:
-            if DEBUG:
-                print(f"[bodega.listar_productos] ERROR {p}: {e}")
-            last_err = e
-            continue
-    if last_err:
-        raise RuntimeError(str(last_err))
-    raise RuntimeError("No se pudo obtener productos (rutas probadas: " + ", ".join(paths) + ")")
-
-
 def listar_categorias() -> List[dict]:
     paths = ["/categorias", "/categoria", "/categoria/"]
     last_err: Exception | None = None
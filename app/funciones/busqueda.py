@@ -0,0 +1,288 @@
+from __future__ import annotations
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_PALABRA = re.compile(r"\w+")
+
+# Con resultados previos más chicos que esto, estrechar filtrándolos es más barato que
+# volver a unir listas del índice
+_MAX_ESTRECHAR = 5000
+# Más allá de este número de resultados no se rankea: se devuelven en el orden del catálogo
+_MAX_RANKING = 3000
+# Tokens candidatos (por trigramas compartidos) que se verifican con distancia de edición
+_MAX_CANDIDATOS_APROX = 300
+
+
+class _TablaPlegado(dict):
+    """Tabla para str.translate que calcula (y recuerda) el plegado de cada carácter nuevo."""
+
+    def __missing__(self, codigo: int) -> str:
+        c = chr(codigo)
+        plegado = "".join(x for x in unicodedata.normalize("NFKD", c) if not unicodedata.combining(x))
+        self[codigo] = plegado
+        return plegado
+
+
+_PLEGADO = _TablaPlegado()
+
+
+def plegar(texto: str) -> str:
+    """Minúsculas sin tildes ni diéresis ("Jamón Ñandú" -> "jamon nandu")."""
+    texto = (texto or "").casefold()
+    return texto if texto.isascii() else texto.translate(_PLEGADO)
+
+
+def normalizar(texto: str) -> str:
+    return " ".join(_PALABRA.findall(plegar(texto)))
+
+
+def palabras(texto: str) -> List[str]:
+    return _PALABRA.findall(plegar(texto))
+
+
+def errores_permitidos(termino: str) -> int:
+    """Errores de tipeo tolerados según el largo del término (los cortos deben ser exactos)."""
+    n = len(termino)
+    return 0 if n < 4 else 1 if n < 8 else 2
+
+
+def distancia_prefijo(termino: str, token: str, maximo: int) -> Optional[int]:
+    """
+    Menor distancia de edición (con transposiciones) entre `termino` y algún prefijo
+    de `token`; None si supera `maximo`. Corta apenas una fila completa lo excede.
+    """
+    n = len(termino)
+    token = token[:n + maximo]
+    m = len(token)
+    if m < n - maximo:
+        return None
+    anterior2: Optional[List[int]] = None
+    anterior = list(range(m + 1))
+    for i in range(1, n + 1):
+        fila = [i] + [0] * m
+        a = termino[i - 1]
+        for j in range(1, m + 1):
+            costo = 0 if a == token[j - 1] else 1
+            d = min(anterior[j] + 1, fila[j - 1] + 1, anterior[j - 1] + costo)
+            if anterior2 is not None and j > 1 and a == token[j - 2] and termino[i - 2] == token[j - 1]:
+                d = min(d, anterior2[j - 2] + 1)
+            fila[j] = d
+        if min(fila) > maximo:
+            return None
+        anterior2, anterior = anterior, fila
+    # La última fila es la distancia del término completo contra cada prefijo del token
+    mejor = min(anterior[max(0, n - maximo):])
+    return mejor if mejor <= maximo else None
+
+
+def _trigramas(token: str) -> Set[str]:
+    t = "^" + token
+    return {t[i:i + 3] for i in range(max(1, len(t) - 2))}
+
+
+class IndiceBusqueda:
+    """
+    Índice de prefijos de palabra sobre id, nombre, categoría y código de barras de los productos.
+    - buscar(consulta): ids de producto donde cada término de la consulta es
+      prefijo de alguna palabra, rankeados (código exacto, nombre que empieza
+      con la consulta, primera palabra, resto) y luego en orden de catálogo.
+    - Todo se compara plegado (sin mayúsculas ni tildes: "jamon" encuentra "Jamón").
+    - Un término sin coincidencias exactas se busca con tolerancia a errores de
+      tipeo: candidatos por trigramas y distancia de edición acotada (1 o 2 según el largo).
+    - Si la consulta extiende la anterior, se estrecha el resultado previo en vez
+      de volver a consultar el índice.
+    - agregar()/eliminar() mantienen el índice con los cambios incrementales.
+    No depende de Qt: lo usa CajaView con ResultadosProxy.
+    """
+
+    def __init__(self):
+        # Cada producto es un entero (su posición en el catálogo): los conjuntos y el
+        # ordenamiento trabajan con ints, que es bastante más rápido que con strings
+        self._doc: Dict[str, int] = {}                               # id -> doc
+        self._pids: List[str] = []                                   # doc -> id
+        self._datos: List[Optional[Tuple[str, str, Tuple[str, ...]]]] = []  # doc -> (id, nombre, palabras)
+        self._postings: Dict[str, Set[int]] = {}
+        self._trigramas: Dict[str, Set[str]] = {}                    # trigrama -> tokens (búsqueda aproximada)
+        self._tokens: List[str] = []
+        self._tokens_ok = True
+        self._version = 0
+        # (versión, términos, resultado, hubo coincidencias aproximadas)
+        self._ultima: Optional[Tuple[int, List[str], Set[int], bool]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc)
+
+    # ---------------- Construcción ----------------
+
+    def reconstruir(self, productos: Iterable[dict]):
+        self._doc = {}
+        self._pids = []
+        self._datos = []
+        self._postings = {}
+        self._trigramas = {}
+        for p in productos:
+            self._agregar(p)
+        self._tokens = sorted(self._postings)
+        self._tokens_ok = True
+        self._version += 1
+
+    def agregar(self, p: dict):
+        """Agrega o reemplaza un producto (mantiene su posición si ya estaba)."""
+        self._quitar(str(p["id"]))
+        self._agregar(p)
+        self._version += 1
+
+    def eliminar(self, producto_id: str) -> bool:
+        ok = self._quitar(str(producto_id))
+        if ok:
+            self._version += 1
+        return ok
+
+    def _agregar(self, p: dict):
+        pid = str(p["id"])
+        # Se pliega una sola vez el texto completo
+        codigo, nombre, categoria = plegar(f"{pid}\x1f{p.get('nombre') or ''}\x1f{p.get('categoria') or ''}").split("\x1f")
+        words = tuple(dict.fromkeys(_PALABRA.findall(f"{codigo} {nombre} {categoria} {p.get('codigo') or ''}")))
+        doc = self._doc.get(pid)
+        if doc is None:
+            doc = len(self._pids)
+            self._doc[pid] = doc
+            self._pids.append(pid)
+            self._datos.append(None)
+        self._datos[doc] = (codigo, nombre, words)
+        for w in words:
+            docs = self._postings.get(w)
+            if docs is None:
+                self._postings[w] = {doc}
+                self._tokens_ok = False
+                if not w.isdigit():  # los códigos no se corrigen: un error daría otro producto
+                    for g in _trigramas(w):
+                        self._trigramas.setdefault(g, set()).add(w)
+            else:
+                docs.add(doc)
+
+    def _quitar(self, pid: str) -> bool:
+        # El doc queda reservado para el id: si vuelve, conserva su posición
+        doc = self._doc.get(pid)
+        datos = self._datos[doc] if doc is not None else None
+        if datos is None:
+            return False
+        self._datos[doc] = None
+        for w in datos[2]:
+            docs = self._postings.get(w)
+            if docs is not None:
+                docs.discard(doc)
+                if not docs:
+                    del self._postings[w]
+                    self._tokens_ok = False
+                    for g in _trigramas(w):
+                        tokens = self._trigramas.get(g)
+                        if tokens is not None:
+                            tokens.discard(w)
+                            if not tokens:
+                                del self._trigramas[g]
+        return True
+
+    # ---------------- Búsqueda ----------------
+
+    def _con_prefijo(self, termino: str) -> Set[int]:
+        if not self._tokens_ok:
+            self._tokens = sorted(self._postings)
+            self._tokens_ok = True
+        lo = bisect_left(self._tokens, termino)
+        hi = bisect_left(self._tokens, termino + "\uffff", lo)
+        if hi - lo == 1:
+            return set(self._postings[self._tokens[lo]])
+        return set().union(*(self._postings[t] for t in self._tokens[lo:hi]))
+
+    def _aproximado(self, termino: str) -> Set[int]:
+        """Docs con alguna palabra a pocas ediciones del término (solo si no hubo coincidencia exacta)."""
+        maximo = errores_permitidos(termino)
+        if not maximo or termino.isdigit():
+            return set()
+        comunes: Counter = Counter()
+        for g in _trigramas(termino):
+            comunes.update(self._trigramas.get(g, ()))
+        out: Set[int] = set()
+        for token, _n in comunes.most_common(_MAX_CANDIDATOS_APROX):
+            if distancia_prefijo(termino, token, maximo) is not None:
+                out |= self._postings[token]
+        return out
+
+    def _buscar_termino(self, termino: str) -> Tuple[Set[int], bool]:
+        docs = self._con_prefijo(termino)
+        if docs:
+            return docs, False
+        return self._aproximado(termino), True
+
+    def _coincide(self, doc: int, terminos: List[str]) -> bool:
+        datos = self._datos[doc]
+        if datos is None:
+            return False
+        words = datos[2]
+        return all(any(w.startswith(t) for w in words) for t in terminos)
+
+    def _estrechar(self, terminos: List[str]) -> Optional[Set[int]]:
+        """Resultado previo filtrado, si la consulta nueva solo lo puede achicar."""
+        if self._ultima is None:
+            return None
+        version, previos, resultado, aproximada = self._ultima
+        # Un resultado aproximado (o vacío) no se estrecha: la consulta más larga puede corregirlo
+        if version != self._version or aproximada or not resultado or len(terminos) < len(previos):
+            return None
+        # Cada término previo debe ser prefijo del nuevo en la misma posición
+        if any(not terminos[i].startswith(t) for i, t in enumerate(previos)):
+            return None
+        if terminos == previos:
+            return set(resultado)
+        if len(resultado) <= _MAX_ESTRECHAR:
+            return {doc for doc in resultado if self._coincide(doc, terminos)}
+        cambiados = [t for i, t in enumerate(terminos) if i >= len(previos) or t != previos[i]]
+        out = set(resultado)
+        for t in cambiados:
+            out &= self._con_prefijo(t)
+        return out
+
+    def buscar(self, consulta: str) -> Optional[List[str]]:
+        """Ids rankeados; None si la consulta está vacía (mostrar todo)."""
+        terminos = palabras(consulta)
+        if not terminos:
+            self._ultima = None
+            return None
+        out = self._estrechar(terminos)
+        aproximada = False
+        if out is None:
+            # Primero el término más largo (suele ser el más selectivo)
+            orden = sorted(set(terminos), key=len, reverse=True)
+            out, aproximada = self._buscar_termino(orden[0])
+            for t in orden[1:]:
+                if not out:
+                    break
+                docs, aprox = self._buscar_termino(t)
+                out &= docs
+                aproximada = aproximada or aprox
+        self._ultima = (self._version, terminos, out, aproximada)
+        return self._rankear(out, normalizar(consulta), terminos[0])
+
+    def _rankear(self, docs: Set[int], consulta: str, primero: str) -> List[str]:
+        pids = self._pids
+        if len(docs) > _MAX_RANKING:
+            return [pids[d] for d in sorted(docs)]
+        datos = self._datos
+
+        def clave(doc: int):
+            codigo, nombre, _ = datos[doc]
+            if codigo == consulta:
+                nivel = 0
+            elif nombre.startswith(consulta):
+                nivel = 1
+            elif nombre.startswith(primero):
+                nivel = 2
+            else:
+                nivel = 3
+            return nivel, len(nombre), doc
+
+        return [pids[d] for d in sorted(docs, key=clave)]
@@ -1,68 +1,25 @@
-from PySide6 import QtGui
+
 from datetime import datetime
 import json
+from app.funciones.carrito import Carrito
 
-def fmt_money(v: int) -> str:
-    return f"${v:,}".replace(",", ".")
-
-def parse_money(s: str) -> int:
-    return int(s.replace("$", "").replace(".", "").strip())
-
-def total_carrito(model: QtGui.QStandardItemModel) -> int:
-    total = 0
-    for r in range(model.rowCount()):
-        total += parse_money(model.item(r, 5).text())
-    return total
-
-def generate_sale_json(
-    model: QtGui.QStandardItemModel,
-    usuario: str = "Desconocido",
-    metodo_pago: str = ""
-) -> str:
-    items = []
-    total = 0
-    for r in range(model.rowCount()):
-        pid_item = model.item(r, 0)
-        producto_item = model.item(r, 1)
-        precio_item = model.item(r, 2)
-        precio_con_iva_item = model.item(r, 3)
-        cantidad_item = model.item(r, 4)
-        subtotal_item = model.item(r, 5)
-
-        pid_text = pid_item.text() if pid_item is not None else ""
-        pid = int(pid_text) if pid_text.isdigit() else pid_text
-
-        producto = producto_item.text() if producto_item is not None else ""
-        precio = parse_money(precio_item.text()) if precio_item is not None else 0
-        precio_con_iva = parse_money(precio_con_iva_item.text()) if precio_con_iva_item is not None else 0
-        cantidad = int(cantidad_item.text()) if (cantidad_item is not None and cantidad_item.text().isdigit()) else 0
-        subtotal = parse_money(subtotal_item.text()) if subtotal_item is not None else 0
-
-        total += subtotal
-
-        items.append({
-            "id": pid,
-            "producto": producto,
-            "precio": precio,
-            "precio_con_iva": precio_con_iva,
-            "cantidad": cantidad,
-            "subtotal": subtotal,
-        })
-
+def armar_venta(carrito: Carrito) -> dict:
+    """Payload de POST /ventas armado una sola vez desde las líneas del carrito (montos int)."""
     now = datetime.now()
-    fecha = now.date().isoformat()
-    hora = now.time().isoformat(timespec="seconds")
-
-    payload = {
-        "fecha": fecha,
-        "hora": hora,
-        "usuario": usuario,
-        "metodo_pago": metodo_pago,
-        "total": total,
-        "items": items,
+    return {
+        "fecha": now.date().isoformat(),
+        "hora": now.time().isoformat(timespec="seconds"),
+        "total": carrito.total,
+        "items": carrito.items(),
     }
 
+def codificar_venta(venta: dict) -> bytes:
+    """
+    Única serialización de la venta: estos bytes se guardan en la outbox, se
+    envían tal cual a la API y quedan en el registro de la caja.
+    """
     try:
-        return json.dumps(payload, ensure_ascii=False)
-    except Exception:
-        return json.dumps(payload, ensure_ascii=False, default=str)
\ No newline at end of file
+        data = json.dumps(venta, ensure_ascii=False, separators=(",", ":"))
+    except (TypeError, ValueError):
+        data = json.dumps(venta, ensure_ascii=False, separators=(",", ":"), default=str)
+    return data.encode("utf-8")
@@ -0,0 +1,99 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional
+from app.funciones.dinero import get_tabla_iva
+
+
+class LineaCarrito:
+    __slots__ = ("id", "nombre", "precio", "precio_con_iva", "cantidad")
+
+    def __init__(self, pid: str, nombre: str, precio: int, precio_con_iva: int, cantidad: int):
+        self.id = pid
+        self.nombre = nombre
+        self.precio = int(precio)
+        self.precio_con_iva = int(precio_con_iva)
+        self.cantidad = int(cantidad)
+
+    @property
+    def subtotal(self) -> int:
+        return self.precio_con_iva * self.cantidad
+
+    def to_dict(self) -> dict:
+        return {
+            "id": int(self.id) if self.id.isdigit() else self.id,
+            "producto": self.nombre,
+            "precio": self.precio,
+            "precio_con_iva": self.precio_con_iva,
+            "cantidad": self.cantidad,
+            "subtotal": self.subtotal,
+        }
+
+
+class Carrito:
+    """
+    Carrito de Caja con valores enteros (pesos) y el total al día.
+    - Una línea por producto, indexada por id: agregar el mismo producto suma cantidad.
+    - total se ajusta con cada cambio (no se recorre el carrito ni se parsean textos).
+    El formato "$1.234" es solo de la vista (ver CarritoModel).
+    """
+
+    def __init__(self):
+        self._lineas: List[LineaCarrito] = []
+        self._pos: Dict[str, int] = {}
+        self.total = 0
+
+    def __len__(self) -> int:
+        return len(self._lineas)
+
+    def __iter__(self) -> Iterator[LineaCarrito]:
+        return iter(self._lineas)
+
+    def linea(self, fila: int) -> LineaCarrito:
+        return self._lineas[fila]
+
+    def fila(self, producto_id: str) -> Optional[int]:
+        return self._pos.get(str(producto_id))
+
+    def cantidad(self, producto_id: str) -> int:
+        fila = self._pos.get(str(producto_id))
+        return self._lineas[fila].cantidad if fila is not None else 0
+
+    def agregar(self, producto: dict, cantidad: int) -> int:
+        """Suma `cantidad` del producto (crea la línea si no existe); devuelve la fila."""
+        pid = str(producto.get("id"))
+        fila = self._pos.get(pid)
+        if fila is None:
+            precio = int(producto.get("precio") or 0)
+            # El store ya trae el precio con IVA precalculado; si no, se calcula con la tabla
+            precio_iva = producto.get("precio_con_iva")
+            if precio_iva is None:
+                precio_iva = get_tabla_iva().con_iva(precio, producto.get("categoria"))
+            linea = LineaCarrito(pid, str(producto.get("nombre", "")), precio, precio_iva, cantidad)
+            fila = len(self._lineas)
+            self._lineas.append(linea)
+            self._pos[pid] = fila
+            self.total += linea.subtotal
+            return fila
+        self.fijar_cantidad(fila, self._lineas[fila].cantidad + cantidad)
+        return fila
+
+    def fijar_cantidad(self, fila: int, cantidad: int):
+        linea = self._lineas[fila]
+        self.total -= linea.subtotal
+        linea.cantidad = int(cantidad)
+        self.total += linea.subtotal
+
+    def quitar(self, fila: int) -> LineaCarrito:
+        linea = self._lineas.pop(fila)
+        del self._pos[linea.id]
+        for i in range(fila, len(self._lineas)):
+            self._pos[self._lineas[i].id] = i
+        self.total -= linea.subtotal
+        return linea
+
+    def vaciar(self):
+        self._lineas = []
+        self._pos = {}
+        self.total = 0
+
+    def items(self) -> List[dict]:
+        return [linea.to_dict() for linea in self._lineas]
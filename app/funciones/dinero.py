@@ -0,0 +1,71 @@
+from __future__ import annotations
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Montos en pesos enteros; las tasas en puntos básicos (1900 = 19 %) para calcular sin floats.
+BP = 10_000
+
+
+def _leer_tasa(texto: str) -> int:
+    """'19' o '19.5' (porcentaje) -> puntos básicos."""
+    return int(round(float(texto.strip().replace(",", ".")) * 100))
+
+
+def _tabla_categorias(spec: str) -> Dict[str, int]:
+    """CLOUDPOS_IVA_CATEGORIAS='Libros:0,Medicamentos:0' -> {'libros': 0, 'medicamentos': 0}."""
+    tabla: Dict[str, int] = {}
+    for parte in (spec or "").split(","):
+        nombre, sep, tasa = parte.rpartition(":")
+        if sep and nombre.strip():
+            try:
+                tabla[nombre.strip().casefold()] = _leer_tasa(tasa)
+            except ValueError:
+                continue
+    return tabla
+
+
+class TablaIVA:
+    """
+    Tasa general más excepciones por categoría (p. ej. exentos).
+    - tasa(categoria) -> puntos básicos
+    - con_iva(precio, categoria) -> precio final entero, redondeo half-up exacto
+    """
+
+    def __init__(self, general_bp: int = 1900, por_categoria: Optional[Dict[str, int]] = None):
+        self.general_bp = int(general_bp)
+        self.por_categoria = {k.casefold(): int(v) for k, v in (por_categoria or {}).items()}
+
+    def tasa(self, categoria: Optional[str] = None) -> int:
+        if categoria and self.por_categoria:
+            return self.por_categoria.get(categoria.casefold(), self.general_bp)
+        return self.general_bp
+
+    def con_iva(self, precio: int, categoria: Optional[str] = None) -> int:
+        return con_iva(precio, self.tasa(categoria))
+
+
+def con_iva(precio: int, tasa_bp: int) -> int:
+    """precio * (1 + tasa) redondeado al peso (mitades hacia arriba), solo con enteros."""
+    return (int(precio) * (BP + int(tasa_bp)) + BP // 2) // BP
+
+
+@lru_cache(maxsize=8192)
+def formatear(valor: int, simbolo: bool = True) -> str:
+    """1234567 -> '$1.234.567' (solo para mostrar; los cálculos van en int)."""
+    texto = f"{int(valor):,}".replace(",", ".")
+    return f"${texto}" if simbolo else texto
+
+
+_tabla: Optional[TablaIVA] = None
+
+
+def get_tabla_iva() -> TablaIVA:
+    """Tabla de IVA de la app: CLOUDPOS_IVA (porcentaje, 19 por defecto) y CLOUDPOS_IVA_CATEGORIAS."""
+    global _tabla
+    if _tabla is None:
+        _tabla = TablaIVA(
+            general_bp=_leer_tasa(os.getenv("CLOUDPOS_IVA", "19")),
+            por_categoria=_tabla_categorias(os.getenv("CLOUDPOS_IVA_CATEGORIAS", "")),
+        )
+    return _tabla
@@ -0,0 +1,89 @@
+from __future__ import annotations
+import os
+import time
+from typing import Optional
+from PySide6 import QtCore, QtWidgets
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+# Un lector "keyboard wedge" teclea cada carácter a pocos ms del anterior; una persona, a 80+ ms
+MAX_INTERVALO_MS = float(os.getenv("CLOUDPOS_ESCANER_MS", "35"))
+MIN_LARGO = int(os.getenv("CLOUDPOS_ESCANER_MIN", "4"))
+
+_TERMINADORES = (QtCore.Qt.Key_Return, QtCore.Qt.Key_Enter, QtCore.Qt.Key_Tab)
+
+
+class DetectorEscaner(QtCore.QObject):
+    """
+    Filtro de eventos que reconoce lecturas de un lector de códigos por el tiempo
+    entre teclas: una ráfaga de al menos MIN_LARGO caracteres, todos a menos de
+    MAX_INTERVALO_MS, terminada en Enter/Tab, se emite como codigoLeido(str).
+    - El Enter final se consume (no dispara atajos ni el "agregar seleccionado").
+    - En un QLineEdit se restaura el texto que había antes de la ráfaga, así la
+      lectura no queda como búsqueda.
+    El tecleo normal pasa sin cambios.
+    """
+    codigoLeido = QtCore.Signal(str)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None,
+                 max_intervalo_ms: float = MAX_INTERVALO_MS, min_largo: int = MIN_LARGO):
+        super().__init__(parent)
+        self.max_intervalo = max_intervalo_ms / 1000.0
+        self.min_largo = int(min_largo)
+        self._buffer: list[str] = []
+        self._ultimo = 0.0
+        self._texto_previo: Optional[str] = None
+
+    def instalar(self, *widgets: QtWidgets.QWidget):
+        for w in widgets:
+            w.installEventFilter(self)
+
+    def _en_rafaga(self, ahora: float) -> bool:
+        return bool(self._buffer) and (ahora - self._ultimo) <= self.max_intervalo
+
+    def eventFilter(self, obj: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        tipo = event.type()
+        if tipo not in (QtCore.QEvent.KeyPress, QtCore.QEvent.ShortcutOverride):
+            return False
+        ahora = time.monotonic()
+        key = event.key()
+
+        if key in _TERMINADORES:
+            es_lectura = self._en_rafaga(ahora) and len(self._buffer) >= self.min_largo
+            if tipo == QtCore.QEvent.ShortcutOverride:
+                # Aceptarlo evita que el atajo de Enter se dispare: la tecla llega como KeyPress
+                if es_lectura:
+                    event.accept()
+                    return True
+                return False
+            if es_lectura:
+                codigo = "".join(self._buffer)
+                if isinstance(obj, QtWidgets.QLineEdit) and self._texto_previo is not None:
+                    obj.blockSignals(True)
+                    obj.setText(self._texto_previo)
+                    obj.blockSignals(False)
+                self._reset()
+                if DEBUG:
+                    print(f"[Escaner] código {codigo!r}")
+                self.codigoLeido.emit(codigo)
+                return True
+            self._reset()
+            return False
+
+        if tipo != QtCore.QEvent.KeyPress:
+            return False
+        texto = event.text()
+        if not texto or not texto.isprintable() or event.modifiers() & (QtCore.Qt.ControlModifier | QtCore.Qt.AltModifier):
+            self._reset()
+            return False
+        if not self._en_rafaga(ahora):
+            # Posible inicio de lectura: se recuerda el texto para deshacerla
+            self._buffer = []
+            self._texto_previo = obj.text() if isinstance(obj, QtWidgets.QLineEdit) else None
+        self._buffer.append(texto)
+        self._ultimo = ahora
+        return False
+
+    def _reset(self):
+        self._buffer = []
+        self._texto_previo = None
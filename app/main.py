@@ -1,13 +1,25 @@
 import os
 import sys
+# El perfil de arranque va antes que cualquier otro import para poder medirlos
+from app.servicios.perfil_arranque import get_perfil_arranque
+_perfil = get_perfil_arranque()
+_perfil.activar_desde_argv(sys.argv)
+
 from PySide6 import QtWidgets
+from app import APP_VERSION
 from app.views.login_window import LoginWindow
 from app.views.main_window import MainWindow
+from app.servicios.http_pool import get_pool
+from app.servicios.executor import get_executor
+from app.servicios.carrito_journal import cerrar_carrito_journal
+from app.servicios.ventas_outbox import cerrar_ventas_outbox
+from app.servicios.metricas import start_metrics_dump, stop_metrics_dump
 
-APP_VERSION = "0.1.0"
+_perfil.marcar("importaciones")
 
 def main():
     app = QtWidgets.QApplication(sys.argv)
+    _perfil.marcar("qapplication")
     app.setApplicationName("CloudPOS")
     app.setOrganizationName("CloudPOS")
     app.setStyle("Fusion")
@@ -21,21 +33,34 @@ def main():
         app.setStyleSheet(qss)
     except FileNotFoundError:
         pass
+    _perfil.marcar("qss")
+
+    # Volcado periódico de métricas de la API (solo si CLOUDPOS_METRICS_FILE está definido)
+    start_metrics_dump()
 
     login = LoginWindow(app_version=APP_VERSION)
     login.show()
+    _perfil.marcar("login_visible")
 
     def on_login_success(user, role):
+        _perfil.marcar("login_ok")
         app.main_window = MainWindow(user=user, role=role, app_version=APP_VERSION)
-        if hasattr(app.main_window, "page_caja"):
-            app.main_window.page_caja.usuario_actual = user
-        elif hasattr(app.main_window, "caja_view"):
-            app.main_window.caja_view.usuario_actual = user
         app.main_window.show()
         login.close()
+        _perfil.marcar("main_lista")
 
     login.login_success.connect(on_login_success)
-    sys.exit(app.exec())
+    ret = app.exec()
+    # Al salir: incluye las vistas importadas al abrir cada sección
+    _perfil.emitir()
+    # Primero lo durable (fsync final del carrito, base de la outbox); luego se
+    # deja terminar lo que quedó encolado en el executor
+    cerrar_carrito_journal()
+    cerrar_ventas_outbox()
+    get_executor().shutdown()
+    get_pool().close_idle()
+    stop_metrics_dump()
+    sys.exit(ret)
 
 
 if __name__ == "__main__":
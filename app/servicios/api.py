@@ -1,6 +1,28 @@
 import os
 import json
-from urllib import request, error
+import time
+import http.client
+from urllib.parse import urljoin
+
+from app.servicios.compresion import ACCEPT_ENCODING, maybe_gzip, read_decoded
+from app.servicios.http_cache import HttpCache, get_cache
+from app.servicios.http_pool import ConnectionPool, get_pool
+from app.servicios.metricas import metrics
+from app.servicios.resiliencia import (
+    IDEMPOTENT_METHODS,
+    RETRYABLE_STATUS,
+    circuits,
+    path_template,
+    retry_policy,
+    sleep_backoff,
+)
+from app.servicios.single_flight import SingleFlight
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 5
+
+# Compartido por todas las instancias: GETs idénticos concurrentes viajan una sola vez
+_get_flights = SingleFlight()
 
 
 def _get_qapp_property(name: str) -> str | None:
@@ -25,20 +47,35 @@ def _get_runtime_auth_token() -> str | None:
     return _get_qapp_property("auth_token")
 
 
+def parse_body(raw: bytes):
+    """Cuerpo de una respuesta de error (>= 400): JSON, o {"detail": texto} si no lo es."""
+    text = raw.decode("utf-8", errors="ignore")
+    try:
+        return json.loads(text)
+    except Exception:
+        return {"detail": text or "HTTP error"}
+
+
+def parse_success(raw: bytes, status: int):
+    """Cuerpo de una respuesta exitosa: JSON, o {"detail": texto, "status": ...} si no lo es."""
+    text = raw.decode("utf-8", errors="ignore")
+    try:
+        return json.loads(text)
+    except Exception:
+        return {"detail": text or "OK", "status": status}
+
+
 class ApiClient:
-    def __init__(self, base_url: str | None = None, timeout: int = 10):
+    def __init__(self, base_url: str | None = None, timeout: int = 10, pool: ConnectionPool | None = None,
+                 cache: HttpCache | None = None):
         self.base_url = (base_url or os.getenv("CLOUDPOS_API_BASE", "http://18.233.18.214:8000")).rstrip("/")
         self.timeout = timeout
+        # Todas las instancias comparten el pool keep-alive salvo que se indique otro
+        self.pool = pool or get_pool()
+        self.cache = cache or get_cache()
 
     # ---------------- Internos ----------------
 
-    def _parse_body(self, raw: bytes):
-        text = raw.decode("utf-8", errors="ignore")
-        try:
-            return json.loads(text)
-        except Exception:
-            return {"detail": text or "HTTP error"}
-
     def _auth_headers(self) -> dict:
         """
         Cabecera Authorization estándar para TODOS los endpoints de negocio.
@@ -47,41 +84,144 @@ class ApiClient:
         token = _get_runtime_auth_token()
         return {"Authorization": f"Bearer {token}"} if token else {}
 
-    def _request(self, method: str, path: str, payload: dict | None = None, include_auth: bool = True):
-        url = f"{self.base_url}/{path.replace('//','/').lstrip('/')}"
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/{path.replace('//','/').lstrip('/')}"
+
+    def _open(self, method: str, url: str, data: bytes | None, headers: dict,
+              timeout: float) -> tuple[int, http.client.HTTPMessage, bytes, int]:
+        """
+        Ejecuta la petición sobre el pool y sigue redirecciones como lo hacía urllib
+        (GET/HEAD siempre; POST 301/302/303 pasa a GET sin cuerpo).
+        El cuerpo de la respuesta se entrega ya descomprimido, junto con los bytes
+        recibidos en el cable (suma de todas las respuestas, con redirecciones).
+        """
+        headers = {**headers, "Accept-Encoding": ACCEPT_ENCODING}
+        wire = 0
+        for _ in range(_MAX_REDIRECTS + 1):
+            with self.pool.open(method, url, body=data, headers=headers, timeout=timeout) as resp:
+                status = resp.status
+                resp_headers = resp.headers  # HTTPMessage: búsqueda sin distinguir mayúsculas
+                location = resp_headers.get("Location")
+                body, recibidos = read_decoded(resp)
+            wire += recibidos
+            if status not in _REDIRECT_CODES or not location:
+                return status, resp_headers, body, wire
+            if method == "POST" and status in (301, 302, 303):
+                method, data = "GET", None
+                headers = {k: v for k, v in headers.items() if k.lower() not in ("content-type", "content-encoding")}
+            elif method not in ("GET", "HEAD"):
+                return status, resp_headers, body, wire
+            url = urljoin(url, location)
+        return status, resp_headers, body, wire
+
+    def _request(self, method: str, path: str, payload: dict | None = None, include_auth: bool = True,
+                 compress: bool | None = False, headers: dict | None = None, body: bytes | None = None):
+        url = self._url(path)
         data = None
+        extra = headers
         headers = {
             "accept": "application/json",
         }
         if include_auth:
             headers.update(self._auth_headers())
+        if extra:
+            headers.update(extra)
 
-        if payload is not None:
-            data = json.dumps(payload).encode("utf-8")
+        if payload is not None and body is None:
+            body = json.dumps(payload).encode("utf-8")
+        if body is not None:
+            data, gzipped = maybe_gzip(body, compress)
             headers["content-type"] = "application/json"
-
-        req = request.Request(url, data=data, headers=headers, method=method)
-        try:
-            with request.urlopen(req, timeout=self.timeout) as resp:
-                text = resp.read().decode("utf-8", errors="ignore")
-                try:
-                    return json.loads(text)
-                except Exception:
-                    return {"detail": text or "OK", "status": getattr(resp, "status", 200)}
-        except error.HTTPError as e:
-            body = e.read() or b""
-            parsed = self._parse_body(body) or {}
-            return {"error": True, "status": e.code, **parsed}
-        except error.URLError as e:
-            return {"error": True, "status": 0, "detail": str(getattr(e, "reason", "Error de red"))}
+            if gzipped:
+                headers["content-encoding"] = "gzip"
+
+        # Caché condicional solo para GET de endpoints con política de TTL
+        t0 = time.perf_counter()
+        ttl = self.cache.ttl_for(path) if method == "GET" else None
+        cache_key = (url, headers.get("Authorization"))
+        entry = self.cache.get(cache_key) if ttl is not None else None
+        if entry is not None:
+            if self.cache.is_fresh(entry, ttl):
+                self.cache.record("hits")
+                # Cuenta en las métricas del endpoint (sin bytes: no tocó la red)
+                metrics.record(method, path, 200, (time.perf_counter() - t0) * 1000, cache_hit=True)
+                return parse_success(entry.body, 200)
+            headers.update(entry.validators())
+
+        breaker = circuits.get(f"{method} {path_template(path)}")
+        if not breaker.allow():
+            metrics.record(method, path, 0, 0.0)
+            return {
+                "error": True,
+                "status": 0,
+                "detail": f"API no disponible; se reintentará en {breaker.retry_after():.0f} s.",
+            }
+
+        sent = len(data) if data else 0
+        attempts = 1 + (retry_policy.max_retries if method in IDEMPOTENT_METHODS else 0)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                status, resp_headers, raw, wire = self._open(method, url, data, headers, self.timeout)
+            except (OSError, http.client.HTTPException) as e:
+                if not last:
+                    sleep_backoff(attempt)
+                    continue
+                breaker.record_failure()
+                metrics.record(method, path, 0, (time.perf_counter() - t0) * 1000, 0, sent)
+                return {"error": True, "status": 0, "detail": str(e) or "Error de red"}
+            except Exception as e:
+                # Respuesta ilegible (gzip corrupto, cuerpo sobre el tope...): no se reintenta, pero
+                # el circuito y las métricas deben enterarse (en HALF_OPEN liberaría la sonda)
+                breaker.record_failure()
+                metrics.record(method, path, 0, (time.perf_counter() - t0) * 1000, 0, sent)
+                return {"error": True, "status": 0, "detail": f"Respuesta inválida: {e or e.__class__.__name__}"}
+            if status in RETRYABLE_STATUS and not last:
+                sleep_backoff(attempt)
+                continue
+            break
+        # Latencia de la petición lógica (incluye reintentos), que es la que percibe la caja.
+        # Bytes en el cable (comprimidos), no los del cuerpo ya decodificado.
+        metrics.record(method, path, status, (time.perf_counter() - t0) * 1000, wire, sent)
+
+        if status in RETRYABLE_STATUS:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        if status == 304 and entry is not None:
+            self.cache.touch(cache_key)
+            self.cache.record("revalidated")
+            return parse_success(entry.body, 200)
+        if ttl is not None and status == 200:
+            self.cache.record("misses")
+            self.cache.store(cache_key, raw, resp_headers, ttl)
+        elif method != "GET" and status < 400:
+            # Una escritura exitosa puede cambiar cualquier listado: forzar revalidación
+            self.cache.invalidate()
+
+        if status >= 400:
+            parsed = parse_body(raw) or {}
+            return {"error": True, "status": status, **parsed}
+        return parse_success(raw, status)
 
     # ---------------- API pública ----------------
 
     def get_json(self, path: str):
-        return self._request("GET", path, None, include_auth=True)
+        # Clave: URL final + token, para no mezclar respuestas de sesiones distintas
+        key = (self._url(path), _get_runtime_auth_token())
+        return _get_flights.do(key, lambda: self._request("GET", path, None, include_auth=True))
+
+    def post_json(self, path: str, payload: dict, compress: bool | None = None, headers: dict | None = None):
+        """
+        compress: True fuerza gzip del cuerpo; None lo decide según tamaño (ver compresion.py).
+        headers: cabeceras extra (p. ej. Idempotency-Key).
+        """
+        return self._request("POST", path, payload, include_auth=True, compress=compress, headers=headers)
 
-    def post_json(self, path: str, payload: dict):
-        return self._request("POST", path, payload, include_auth=True)
+    def post_body(self, path: str, body: bytes, compress: bool | None = None, headers: dict | None = None):
+        """Como post_json, pero con el JSON ya codificado: se envía tal cual, sin volver a serializar."""
+        return self._request("POST", path, None, include_auth=True, compress=compress, headers=headers, body=body)
 
     def put_json(self, path: str, payload: dict):
         return self._request("PUT", path, payload, include_auth=True)
@@ -92,9 +232,7 @@ class ApiClient:
     def check_api(self) -> bool:
         # Health simple: sin token
         try:
-            url = f"{self.base_url}/"
-            req = request.Request(url, headers={"accept": "application/json"})
-            with request.urlopen(req, timeout=min(5, self.timeout)):
-                return True
+            status, _, _, _ = self._open("GET", f"{self.base_url}/", None, {"accept": "application/json"}, min(5, self.timeout))
+            return status < 400
         except Exception:
             return False
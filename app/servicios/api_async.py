@@ -0,0 +1,144 @@
+from __future__ import annotations
+import json
+import time
+from typing import Any, Callable, Optional
+from PySide6 import QtCore, QtNetwork
+from app.servicios.api import ApiClient, parse_body, parse_success
+from app.servicios.metricas import metrics
+
+
+_shared_nam: Optional[QtNetwork.QNetworkAccessManager] = None
+
+
+def _network_manager() -> QtNetwork.QNetworkAccessManager:
+    """
+    QNetworkAccessManager único para la app (vive en el hilo de la GUI).
+    Qt ya reutiliza conexiones keep-alive y paraleliza hasta 6 peticiones por host.
+    """
+    global _shared_nam
+    if _shared_nam is None:
+        _shared_nam = QtNetwork.QNetworkAccessManager(QtCore.QCoreApplication.instance())
+    return _shared_nam
+
+
+class ApiReply(QtCore.QObject):
+    """
+    Respuesta pendiente de AsyncApiClient.
+    finished(object) entrega el mismo formato que ApiClient (dict/list, o
+    {"error": True, "status": ..., "detail": ...} si falla).
+    """
+    finished = QtCore.Signal(object)
+
+    def __init__(self, reply: QtNetwork.QNetworkReply, parent: Optional[QtCore.QObject] = None,
+                 method: str = "GET", path: str = "", sent: int = 0):
+        super().__init__(parent)
+        self._reply = reply
+        self._method = method
+        self._path = path
+        self._sent = sent
+        self._t0 = time.perf_counter()
+        self._done = False
+        self._result: Any = None
+        reply.finished.connect(self._on_finished)
+
+    def is_finished(self) -> bool:
+        return self._done
+
+    def result(self) -> Any:
+        return self._result
+
+    def then(self, callback: Callable[[Any], None]) -> "ApiReply":
+        """Registra un callback (hilo de la GUI); si ya terminó se llama de inmediato."""
+        if self._done:
+            callback(self._result)
+        else:
+            self.finished.connect(callback)
+        return self
+
+    def abort(self):
+        if self._reply is not None and self._reply.isRunning():
+            self._reply.abort()
+
+    @QtCore.Slot()
+    def _on_finished(self):
+        reply = self._reply
+        raw = bytes(reply.readAll())
+        status = int(reply.attribute(QtNetwork.QNetworkRequest.HttpStatusCodeAttribute) or 0)
+        net_err = reply.error()
+        err_str = reply.errorString()
+        reply.deleteLater()
+        self._reply = None
+        net_failed = net_err != QtNetwork.QNetworkReply.NetworkError.NoError and status < 400
+        metrics.record(self._method, self._path, 0 if net_failed else status,
+                       (time.perf_counter() - self._t0) * 1000, len(raw), self._sent)
+
+        if status >= 400:
+            parsed = parse_body(raw) or {}
+            res: Any = {"error": True, "status": status, **parsed}
+        elif net_err != QtNetwork.QNetworkReply.NetworkError.NoError or status == 0:
+            res = {"error": True, "status": 0, "detail": err_str or "Error de red"}
+        else:
+            res = parse_success(raw, status)
+
+        self._result = res
+        self._done = True
+        self.finished.emit(res)
+        self.deleteLater()
+
+
+class AsyncApiClient(QtCore.QObject):
+    """
+    Variante no bloqueante de ApiClient basada en QNetworkAccessManager.
+    Misma superficie (get_json/post_json/put_json/delete_json) pero devuelve un
+    ApiReply en vez del resultado; no crea hilos por petición.
+    Debe usarse desde el hilo de la GUI.
+    """
+
+    def __init__(self, base_url: str | None = None, timeout: int = 10, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._api = ApiClient(base_url, timeout)
+        self.base_url = self._api.base_url
+        self.timeout = timeout
+
+    def _build_request(self, path: str, include_auth: bool, with_body: bool) -> QtNetwork.QNetworkRequest:
+        req = QtNetwork.QNetworkRequest(QtCore.QUrl(self._api._url(path)))
+        req.setRawHeader(b"Accept", b"application/json")
+        if with_body:
+            req.setRawHeader(b"Content-Type", b"application/json")
+        if include_auth:
+            for k, v in self._api._auth_headers().items():
+                req.setRawHeader(k.encode("utf-8"), v.encode("utf-8"))
+        req.setAttribute(QtNetwork.QNetworkRequest.RedirectPolicyAttribute,
+                         QtNetwork.QNetworkRequest.NoLessSafeRedirectPolicy)
+        req.setTransferTimeout(int(self.timeout * 1000))
+        return req
+
+    def _request(self, method: str, path: str, payload: dict | None = None, include_auth: bool = True) -> ApiReply:
+        req = self._build_request(path, include_auth, payload is not None)
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        nam = _network_manager()
+        if method == "GET":
+            reply = nam.get(req)
+        elif method == "POST":
+            reply = nam.post(req, data or b"")
+        elif method == "PUT":
+            reply = nam.put(req, data or b"")
+        elif method == "DELETE":
+            reply = nam.deleteResource(req)
+        else:
+            reply = nam.sendCustomRequest(req, method.encode("ascii"), data or b"")
+        return ApiReply(reply, self, method, path, len(data) if data else 0)
+
+    # ---------------- API pública ----------------
+
+    def get_json(self, path: str) -> ApiReply:
+        return self._request("GET", path, None, include_auth=True)
+
+    def post_json(self, path: str, payload: dict) -> ApiReply:
+        return self._request("POST", path, payload, include_auth=True)
+
+    def put_json(self, path: str, payload: dict) -> ApiReply:
+        return self._request("PUT", path, payload, include_auth=True)
+
+    def delete_json(self, path: str) -> ApiReply:
+        return self._request("DELETE", path, None, include_auth=True)
@@ -2,6 +2,8 @@ from __future__ import annotations
 from typing import Optional
 from PySide6 import QtCore, QtWidgets
 from app.servicios.api import ApiClient
+from app.servicios.executor import get_executor
+from app.servicios.resiliencia import circuits
 
 
 class LedIndicator(QtWidgets.QLabel):
@@ -23,22 +25,6 @@ class LedIndicator(QtWidgets.QLabel):
         )
 
 
-class _PingWorker(QtCore.QObject):
-    finished = QtCore.Signal(bool, str)  # (online, error)
-
-    def __init__(self, client: ApiClient):
-        super().__init__()
-        self._client = client
-
-    @QtCore.Slot()
-    def run(self):
-        try:
-            ok = self._client.check_api()
-            self.finished.emit(bool(ok), "")
-        except Exception as e:
-            self.finished.emit(False, str(e))
-
-
 class ApiMonitor(QtCore.QObject):
 
     #Monitorea la API con un ping periódico y emite onlineChanged(True/False).
@@ -54,8 +40,7 @@ class ApiMonitor(QtCore.QObject):
         self._timer.setInterval(self._interval)
         self._timer.timeout.connect(self._tick)
         self._online: Optional[bool] = None
-        self._thread: Optional[QtCore.QThread] = None
-        self._worker: Optional[_PingWorker] = None
+        self._pinging = False
 
     def start(self, run_immediately: bool = True):
         self._timer.start()
@@ -73,28 +58,26 @@ class ApiMonitor(QtCore.QObject):
 
     @QtCore.Slot()
     def _tick(self):
-        if self._thread and self._thread.isRunning():
+        if self._pinging:
             return
-        self._thread = QtCore.QThread(self)
-        self._worker = _PingWorker(self._client)
-        self._worker.moveToThread(self._thread)
-        self._thread.started.connect(self._worker.run)
-        self._worker.finished.connect(self._on_finished)
-        self._worker.finished.connect(self._thread.quit)
-        self._worker.finished.connect(self._worker.deleteLater)
-        self._thread.finished.connect(self._thread.deleteLater)
-        self._thread.finished.connect(self._clear_refs)
-        self._thread.start()
-
-    @QtCore.Slot()
-    def _clear_refs(self):
-        self._thread = None
-        self._worker = None
+        self._pinging = True
+        get_executor().submit(
+            "api.ping", self._client.check_api,
+            on_ok=lambda ok: self._on_finished(bool(ok), ""),
+            on_err=lambda err: self._on_finished(False, err),
+            owner=self,
+        )
 
     @QtCore.Slot(bool, str)
     def _on_finished(self, online: bool, err: str):
+        self._pinging = False
         if err:
             self.error.emit(err)
         if self._online is None or online != self._online:
             self._online = online
+            # Circuitos: caída -> fallar rápido; recuperación -> una petición de prueba por endpoint
+            if online:
+                circuits.half_open_all()
+            else:
+                circuits.trip_all()
             self.onlineChanged.emit(online)
\ No newline at end of file
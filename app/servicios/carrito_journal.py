@@ -0,0 +1,221 @@
+from __future__ import annotations
+import json
+import os
+import time
+from typing import Optional
+from PySide6 import QtCore
+from app.funciones.carrito import Carrito
+from app.servicios.executor import get_executor
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+# Registros del journal (una línea JSON compacta por operación):
+#   ["a", [id, nombre, precio, precio_con_iva], cantidad]   agregar
+#   ["f", id, cantidad]                                     fijar cantidad
+#   ["q", id]                                               quitar línea
+#   ["c", clave]                                            cobrada (la venta ya está en la outbox)
+#   ["s", [[id, nombre, precio, precio_con_iva, cantidad], ...]]   snapshot (tras compactar)
+_SEP = (",", ":")
+
+
+def _default_path() -> str:
+    path = os.getenv("CLOUDPOS_CARRITO_JOURNAL")
+    if path:
+        return path
+    base = ""
+    try:
+        base = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.AppLocalDataLocation)
+    except Exception:
+        pass
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cloudpos"), "carrito.journal")
+
+
+def _aplicar(carrito: Carrito, rec: list):
+    op = rec[0]
+    if op == "a":
+        pid, nombre, precio, precio_iva = rec[1]
+        carrito.agregar({"id": pid, "nombre": nombre, "precio": precio, "precio_con_iva": precio_iva}, rec[2])
+    elif op == "f":
+        fila = carrito.fila(rec[1])
+        if fila is not None:
+            carrito.fijar_cantidad(fila, rec[2])
+    elif op == "q":
+        fila = carrito.fila(rec[1])
+        if fila is not None:
+            carrito.quitar(fila)
+    elif op == "c":
+        carrito.vaciar()
+    elif op == "s":
+        carrito.vaciar()
+        for pid, nombre, precio, precio_iva, cantidad in rec[1]:
+            carrito.agregar({"id": pid, "nombre": nombre, "precio": precio, "precio_con_iva": precio_iva}, cantidad)
+
+
+class CarritoJournal(QtCore.QObject):
+    """
+    Journal append-only del carrito abierto de la Caja, para no perderlo si la app se cae.
+    - Cada operación es un write() sin buffer de Python: queda en el SO al instante
+      (sobrevive a un cierre abrupto del proceso) y cuesta microsegundos.
+    - El fsync se agrupa: a lo sumo uno cada CLOUDPOS_CARRITO_FSYNC_MS, en el executor
+      (protege ante un corte de luz sin frenar el escaneo).
+    - Al cobrar o vaciar, o pasadas CLOUDPOS_CARRITO_COMPACTAR operaciones, se
+      reescribe como un snapshot del carrito (reemplazo atómico). En el hilo de la
+      GUI solo se escribe y renombra; ningún fsync corre ahí.
+    - Costo de no sincronizar en el momento: ante un corte de luz (no un cierre de
+      la app) se pueden perder los últimos milisegundos de operaciones, igual que
+      la outbox con synchronous=NORMAL.
+    - recuperar() reconstruye el carrito reproduciendo el journal; una última
+      línea cortada a medias se ignora y se descarta del archivo (se compacta),
+      para que lo que se escriba después no quede pegado a ella.
+    """
+
+    def __init__(self, path: Optional[str] = None, parent: Optional[QtCore.QObject] = None,
+                 fsync_ms: Optional[int] = None, compactar_cada: Optional[int] = None):
+        super().__init__(parent)
+        self.path = path or _default_path()
+        self.compactar_cada = int(compactar_cada or os.getenv("CLOUDPOS_CARRITO_COMPACTAR", "500"))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._carrito: Optional[Carrito] = None
+        self._registros = 0
+        self._f = open(self.path, "ab", buffering=0)
+
+        self._sync_timer = QtCore.QTimer(self)
+        self._sync_timer.setSingleShot(True)
+        self._sync_timer.setInterval(int(fsync_ms or os.getenv("CLOUDPOS_CARRITO_FSYNC_MS", "200")))
+        self._sync_timer.timeout.connect(self._sincronizar)
+
+    # ---------------- Recuperación ----------------
+
+    def recuperar(self) -> Carrito:
+        """Carrito reconstruido desde el disco; queda asociado al journal (ver compactar)."""
+        t0 = time.perf_counter()
+        carrito = Carrito()
+        n = 0
+        roto = False
+        with open(self.path, "rb") as f:
+            for linea in f:
+                # Sin "\n" final la escritura quedó a medias, aunque el JSON alcance a parsear
+                if not linea.endswith(b"\n"):
+                    roto = True
+                try:
+                    rec = json.loads(linea)
+                except ValueError:
+                    roto = True
+                    break  # escritura interrumpida: lo que sigue no es confiable
+                _aplicar(carrito, rec)
+                n += 1
+        self._carrito = carrito
+        self._registros = n
+        if DEBUG:
+            ms = (time.perf_counter() - t0) * 1000
+            print(f"[CarritoJournal] {n} registros, {len(carrito)} líneas recuperadas en {ms:.1f} ms")
+        if roto or n > len(carrito) + 1:
+            self.compactar()
+        return carrito
+
+    # ---------------- Operaciones ----------------
+
+    def agregar(self, producto: dict, cantidad: int):
+        p = producto
+        self._escribir(["a", [str(p.get("id")), str(p.get("nombre", "")), int(p.get("precio") or 0),
+                              p.get("precio_con_iva")], int(cantidad)])
+
+    def fijar_cantidad(self, producto_id: str, cantidad: int):
+        self._escribir(["f", str(producto_id), int(cantidad)])
+
+    def quitar(self, producto_id: str):
+        self._escribir(["q", str(producto_id)])
+
+    def vaciar(self):
+        self.compactar()
+
+    def cobrada(self, clave: str):
+        """
+        La venta ya quedó en la outbox: el carrito no debe volver a abrirse al reiniciar.
+        El fsync se pide de inmediato (sin esperar el lote), pero corre en el executor.
+        """
+        self._escribir(["c", clave], compactable=False)
+        self._sync_timer.stop()
+        self._sincronizar()
+
+    # ---------------- Disco ----------------
+
+    def _escribir(self, rec: list, compactable: bool = True):
+        self._f.write(json.dumps(rec, ensure_ascii=False, separators=_SEP).encode("utf-8") + b"\n")
+        self._registros += 1
+        if not self._sync_timer.isActive():
+            self._sync_timer.start()
+        # Se compacta después de que el carrito ya aplicó la operación (el snapshot la incluye)
+        if compactable and self._registros >= self.compactar_cada and self._carrito is not None:
+            self.compactar()
+
+    def _sincronizar(self, directorio: bool = False):
+        # Se duplica el descriptor: el fsync sigue siendo válido aunque una compactación cierre el archivo
+        fd = os.dup(self._f.fileno())
+        carpeta = os.path.dirname(os.path.abspath(self.path)) if directorio else None
+        get_executor().submit("carrito.fsync", _fsync_y_cerrar, fd, carpeta, owner=self)
+
+    def compactar(self):
+        """
+        Reescribe el journal como un snapshot del carrito actual (vacío = archivo vacío).
+        Aquí solo hay write + rename (microsegundos para un carrito normal); el fsync
+        del archivo nuevo y de la carpeta (para el rename) se hace en el executor.
+        """
+        lineas = [[ln.id, ln.nombre, ln.precio, ln.precio_con_iva, ln.cantidad] for ln in (self._carrito or ())]
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            if lineas:
+                f.write(json.dumps(["s", lineas], ensure_ascii=False, separators=_SEP).encode("utf-8") + b"\n")
+        self._f.close()
+        os.replace(tmp, self.path)
+        self._f = open(self.path, "ab", buffering=0)
+        self._registros = 1 if lineas else 0
+        self._sync_timer.stop()
+        self._sincronizar(directorio=True)
+
+    def close(self):
+        """Último fsync, en el hilo que llama (se usa al salir)."""
+        self._sync_timer.stop()
+        if self._f.closed:
+            return
+        try:
+            os.fsync(self._f.fileno())
+        except OSError:
+            pass
+        self._f.close()
+
+
+def _fsync_y_cerrar(fd: int, carpeta: Optional[str] = None):
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    if carpeta:
+        # Hace durable el rename de la compactación (no disponible en Windows)
+        try:
+            dfd = os.open(carpeta, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dfd)
+        except OSError:
+            pass
+        finally:
+            os.close(dfd)
+
+
+_journal: Optional[CarritoJournal] = None
+
+
+def get_carrito_journal() -> CarritoJournal:
+    """Journal único del carrito de la Caja (se crea en el hilo de la GUI al primer uso)."""
+    global _journal
+    if _journal is None:
+        _journal = CarritoJournal(parent=QtCore.QCoreApplication.instance())
+    return _journal
+
+
+def cerrar_carrito_journal():
+    """Cierra el journal al salir, solo si la Caja llegó a abrirlo."""
+    if _journal is not None:
+        _journal.close()
@@ -0,0 +1,312 @@
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from app import APP_VERSION
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+# Cambia con la versión de la app: un catálogo guardado por otra versión se descarta
+# (el formato de los productos puede haber cambiado). Subir el sufijo si cambian las tablas.
+SCHEMA_VERSION = f"{APP_VERSION}/2"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS catalogos (
+    base_url    TEXT PRIMARY KEY,
+    guardado_en REAL NOT NULL,
+    total       INTEGER NOT NULL,
+    marca       TEXT
+);
+CREATE TABLE IF NOT EXISTS productos (
+    base_url TEXT NOT NULL,
+    id       TEXT NOT NULL,
+    orden    INTEGER NOT NULL,
+    datos    TEXT NOT NULL,
+    PRIMARY KEY (base_url, id)
+) WITHOUT ROWID;
+"""
+
+
+def _marca_anterior(nueva: Optional[str], guardada: Optional[str]) -> bool:
+    """True si `nueva` es más vieja que `guardada` (solo se comparan marcas numéricas)."""
+    try:
+        return int(nueva) < int(guardada)
+    except (TypeError, ValueError):
+        return False
+
+
+def _default_path() -> str:
+    path = os.getenv("CLOUDPOS_CATALOGO_DB")
+    if path:
+        return path
+    base = ""
+    try:
+        from PySide6 import QtCore
+        base = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.AppLocalDataLocation)
+    except Exception:
+        pass
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cloudpos"), "catalogo.sqlite3")
+
+
+class CatalogoLocal:
+    """
+    Copia en disco (SQLite) del último catálogo recibido, por URL base de la API.
+    - cargar(base_url): lista guardada o [] (lectura de milisegundos al arrancar).
+    - guardar(base_url, productos, marca): reemplaza el catálogo de esa API.
+    - aplicar_cambios(...): mezcla una sincronización incremental (ver ProductStore).
+    Una escritura con marca anterior a la guardada se ignora (llegó tarde).
+    Límites: max_productos por catálogo, max_catalogos URLs distintas y max_bytes del archivo.
+    Cada operación abre su propia conexión: se puede llamar desde cualquier hilo.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_productos: int = 50_000,
+                 max_catalogos: int = 3, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path or _default_path()
+        self.max_productos = int(max_productos)
+        self.max_catalogos = int(max_catalogos)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()  # serializa escrituras dentro del proceso
+        self._ready = False
+
+    # ---------------- Internos ----------------
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._ready:
+            self._ensure_schema(conn)
+            self._ready = True
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+        row = conn.execute("SELECT valor FROM meta WHERE clave = 'schema'").fetchone()
+        if row is None or row[0] != SCHEMA_VERSION:
+            if DEBUG:
+                print(f"[CatalogoLocal] esquema {row[0] if row else None!r} -> {SCHEMA_VERSION!r}: se descarta el caché")
+            # Es solo un caché: ante otro esquema se recrea desde cero
+            with conn:
+                conn.execute("DROP TABLE IF EXISTS productos")
+                conn.execute("DROP TABLE IF EXISTS catalogos")
+                conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        conn.executescript(_SCHEMA)
+
+    def _enforce_limits(self, conn: sqlite3.Connection):
+        old = conn.execute(
+            "SELECT base_url FROM catalogos ORDER BY guardado_en DESC LIMIT -1 OFFSET ?",
+            (self.max_catalogos,),
+        ).fetchall()
+        for (url,) in old:
+            conn.execute("DELETE FROM productos WHERE base_url = ?", (url,))
+            conn.execute("DELETE FROM catalogos WHERE base_url = ?", (url,))
+
+    def _obsoleta(self, conn: sqlite3.Connection, base_url: str, marca: Optional[str]) -> bool:
+        row = conn.execute("SELECT marca FROM catalogos WHERE base_url = ?", (base_url,)).fetchone()
+        if row is not None and _marca_anterior(marca, row[0]):
+            if DEBUG:
+                print(f"[CatalogoLocal] marca {marca!r} anterior a la guardada {row[0]!r}; no se escribe")
+            return True
+        return False
+
+    def _db_bytes(self, conn: sqlite3.Connection) -> int:
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return int(pages) * int(size)
+
+    # ---------------- API ----------------
+
+    def cargar(self, base_url: str) -> List[dict]:
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT datos FROM productos WHERE base_url = ? ORDER BY orden", (base_url,)
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            if DEBUG:
+                print(f"[CatalogoLocal] no se pudo leer {self.path}: {e}")
+            return []
+        items = []
+        for (datos,) in rows:
+            try:
+                items.append(json.loads(datos))
+            except ValueError:
+                continue
+        return items
+
+    def _catalogo_row(self, base_url: str) -> Optional[tuple]:
+        try:
+            conn = self._connect()
+            try:
+                return conn.execute(
+                    "SELECT guardado_en, marca FROM catalogos WHERE base_url = ?", (base_url,)
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+    def guardado_en(self, base_url: str) -> Optional[float]:
+        """Epoch del último guardado de ese catálogo (None si no hay)."""
+        row = self._catalogo_row(base_url)
+        return float(row[0]) if row else None
+
+    def marca(self, base_url: str) -> Optional[str]:
+        """Marca de sincronización (high-water mark) del catálogo guardado."""
+        row = self._catalogo_row(base_url)
+        return row[1] if row else None
+
+    def guardar(self, base_url: str, productos: Iterable[dict], marca: Optional[str] = None) -> bool:
+        productos = list(productos)
+        if len(productos) > self.max_productos:
+            if DEBUG:
+                print(f"[CatalogoLocal] {len(productos)} productos supera el límite ({self.max_productos}); no se guarda")
+            return False
+        rows = [(base_url, str(p.get("id")), i, json.dumps(p, ensure_ascii=False, separators=(",", ":")))
+                for i, p in enumerate(productos)]
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        if self._obsoleta(conn, base_url, marca):
+                            return False
+                        conn.execute("DELETE FROM productos WHERE base_url = ?", (base_url,))
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO productos (base_url, id, orden, datos) VALUES (?, ?, ?, ?)", rows
+                        )
+                        conn.execute(
+                            "INSERT OR REPLACE INTO catalogos (base_url, guardado_en, total, marca) VALUES (?, ?, ?, ?)",
+                            (base_url, time.time(), len(rows), marca),
+                        )
+                        self._enforce_limits(conn)
+                    if self._db_bytes(conn) > self.max_bytes:
+                        # Solo queda lugar para el catálogo actual
+                        with conn:
+                            conn.execute("DELETE FROM productos WHERE base_url <> ?", (base_url,))
+                            conn.execute("DELETE FROM catalogos WHERE base_url <> ?", (base_url,))
+                        conn.execute("VACUUM")
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            if DEBUG:
+                print(f"[CatalogoLocal] no se pudo guardar en {self.path}: {e}")
+            return False
+        return True
+
+    def aplicar_cambios(self, base_url: str, productos: Iterable[dict], eliminados: Iterable[str],
+                        marca: Optional[str]) -> bool:
+        """
+        Mezcla una sincronización incremental: actualiza o agrega (al final) los
+        productos recibidos, borra los eliminados y avanza la marca.
+        Devuelve False si no hay catálogo base guardado para esa URL o si la marca
+        es anterior a la guardada.
+        """
+        productos = list(productos)
+        eliminados = [(base_url, str(i)) for i in eliminados]
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        if conn.execute("SELECT 1 FROM catalogos WHERE base_url = ?", (base_url,)).fetchone() is None:
+                            return False
+                        if self._obsoleta(conn, base_url, marca):
+                            return False
+                        conn.executemany("DELETE FROM productos WHERE base_url = ? AND id = ?", eliminados)
+                        next_orden = conn.execute(
+                            "SELECT COALESCE(MAX(orden), -1) + 1 FROM productos WHERE base_url = ?", (base_url,)
+                        ).fetchone()[0]
+                        for p in productos:
+                            pid = str(p.get("id"))
+                            datos = json.dumps(p, ensure_ascii=False, separators=(",", ":"))
+                            cur = conn.execute(
+                                "UPDATE productos SET datos = ? WHERE base_url = ? AND id = ?", (datos, base_url, pid)
+                            )
+                            if cur.rowcount == 0:
+                                conn.execute(
+                                    "INSERT INTO productos (base_url, id, orden, datos) VALUES (?, ?, ?, ?)",
+                                    (base_url, pid, next_orden, datos),
+                                )
+                                next_orden += 1
+                        total = conn.execute(
+                            "SELECT COUNT(*) FROM productos WHERE base_url = ?", (base_url,)
+                        ).fetchone()[0]
+                        if total > self.max_productos:
+                            # Demasiado grande para el caché: mejor no tener copia que una a medias
+                            conn.execute("DELETE FROM productos WHERE base_url = ?", (base_url,))
+                            conn.execute("DELETE FROM catalogos WHERE base_url = ?", (base_url,))
+                            return False
+                        conn.execute(
+                            "UPDATE catalogos SET guardado_en = ?, total = ?, marca = ? WHERE base_url = ?",
+                            (time.time(), total, marca, base_url),
+                        )
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            if DEBUG:
+                print(f"[CatalogoLocal] no se pudieron aplicar cambios en {self.path}: {e}")
+            return False
+        return True
+
+    def actualizar(self, base_url: str, producto: dict) -> bool:
+        """Reemplaza un producto ya guardado (mantiene su posición)."""
+        datos = json.dumps(producto, ensure_ascii=False, separators=(",", ":"))
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        cur = conn.execute(
+                            "UPDATE productos SET datos = ? WHERE base_url = ? AND id = ?",
+                            (datos, base_url, str(producto.get("id"))),
+                        )
+                finally:
+                    conn.close()
+        except sqlite3.Error:
+            return False
+        return cur.rowcount > 0
+
+    def borrar(self, base_url: Optional[str] = None):
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    if base_url is None:
+                        conn.execute("DELETE FROM productos")
+                        conn.execute("DELETE FROM catalogos")
+                    else:
+                        conn.execute("DELETE FROM productos WHERE base_url = ?", (base_url,))
+                        conn.execute("DELETE FROM catalogos WHERE base_url = ?", (base_url,))
+            finally:
+                conn.close()
+
+
+_catalogo: Optional[CatalogoLocal] = None
+_catalogo_lock = threading.Lock()
+
+
+def get_catalogo_local() -> Optional[CatalogoLocal]:
+    """Caché de catálogo de la app; CLOUDPOS_CATALOGO_LOCAL=0 lo desactiva."""
+    global _catalogo
+    if os.getenv("CLOUDPOS_CATALOGO_LOCAL", "1") == "0":
+        return None
+    with _catalogo_lock:
+        if _catalogo is None:
+            _catalogo = CatalogoLocal(
+                max_productos=int(os.getenv("CLOUDPOS_CATALOGO_MAX_PRODUCTOS", "50000")),
+                max_bytes=int(float(os.getenv("CLOUDPOS_CATALOGO_MAX_MB", "64")) * 1024 * 1024),
+            )
+        return _catalogo
@@ -1,6 +1,7 @@
 from typing import List
 from PySide6 import QtCore
 from app.servicios.api import ApiClient
+from app.servicios.operation_queue import OperationQueue
 from app.funciones.admin import (
     validar_nombre_categoria,
     construir_payload_crear_categoria,
@@ -111,81 +112,40 @@ class CategoriasService(QtCore.QObject):
     error = QtCore.Signal(str)
     busy = QtCore.Signal(bool)
 
-    def __init__(self, client: ApiClient | None = None, parent: QtCore.QObject | None = None):
+    def __init__(self, client: ApiClient | None = None, parent: QtCore.QObject | None = None,
+                 max_concurrency: int | None = None):
         super().__init__(parent)
         self.client = client or ApiClient()
-        self._thread: QtCore.QThread | None = None
-        self._worker: QtCore.QObject | None = None
-
-    def _start_thread(self, worker: QtCore.QObject):
-        if self._thread and self._thread.isRunning():
-            if DEBUG:
-                print("[CategoriasService] operación ya en curso; se omite")
-            return False
-        self.busy.emit(True)
-        self._thread = QtCore.QThread(self)
-        self._worker = worker
-        worker.moveToThread(self._thread)
-        self._thread.finished.connect(self._thread.deleteLater)
-        self._thread.finished.connect(self._clear_refs)
-        return True
-
-    @QtCore.Slot()
-    def _clear_refs(self):
-        self._thread = None
-        self._worker = None
-        if DEBUG:
-            print("[CategoriasService] hilo finalizado; refs liberadas")
+        self._queue = OperationQueue("categorias", max_concurrency, self)
+        self._queue.busyChanged.connect(self.busy)
 
     def cargar_categorias(self):
-        worker = _CategoriasWorker(self.client)
-        if not self._start_thread(worker):
-            return
-        self._thread.started.connect(worker.run)
-        worker.finished.connect(self._on_list_finished)
-        worker.finished.connect(self._thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        self._thread.start()
+        self._queue.enqueue("cargar", _CategoriasWorker(self.client), self._on_list_finished,
+                            coalesce_key="cargar")
 
     @QtCore.Slot(list, str)
     def _on_list_finished(self, items: List[dict], err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
             self.categoriasCargadas.emit(items)
 
     def crear_categoria(self, nombre: str):
-        worker = _CrearCategoriaWorker(self.client, nombre)
-        if not self._start_thread(worker):
-            return
-        self._thread.started.connect(worker.run)
-        worker.finished.connect(self._on_create_finished)
-        worker.finished.connect(self._thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        self._thread.start()
+        self._queue.enqueue("crear", _CrearCategoriaWorker(self.client, nombre), self._on_create_finished)
 
     @QtCore.Slot(str, str)
     def _on_create_finished(self, mensaje: str, err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
             self.categoriaCreada.emit(mensaje)
             
     def eliminar_categoria(self, cat_id: int):
-        worker = _EliminarCategoriaWorker(self.client, int(cat_id))
-        if not self._start_thread(worker):
-            return
-        self._thread.started.connect(worker.run)
-        worker.finished.connect(self._on_delete_finished)
-        worker.finished.connect(self._thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        self._thread.start()
+        self._queue.enqueue("eliminar", _EliminarCategoriaWorker(self.client, int(cat_id)), self._on_delete_finished,
+                            key=f"categoria:{int(cat_id)}")
 
     @QtCore.Slot(str, str)
     def _on_delete_finished(self, mensaje: str, err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
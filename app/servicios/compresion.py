@@ -0,0 +1,138 @@
+from __future__ import annotations
+import gzip
+import os
+import threading
+import zlib
+from typing import Optional, Tuple
+
+ACCEPT_ENCODING = "gzip, deflate"
+_CHUNK = 64 * 1024
+
+# Compresión de cuerpos de petición: desactivada salvo que se pida (el servidor
+# debe aceptar Content-Encoding: gzip).
+GZIP_REQUESTS = os.getenv("CLOUDPOS_GZIP_REQUESTS", "0") == "1"
+GZIP_MIN_BYTES = int(os.getenv("CLOUDPOS_GZIP_MIN_BYTES", "8192"))
+
+# Tope del cuerpo ya descomprimido: unos pocos KB comprimidos podrían expandirse sin límite
+MAX_DECODED_BYTES = int(os.getenv("CLOUDPOS_MAX_RESPONSE_BYTES", str(256 * 1024 * 1024)))
+
+
+class RespuestaDemasiadoGrande(ValueError):
+    """El cuerpo descomprimido supera el tope (CLOUDPOS_MAX_RESPONSE_BYTES)."""
+
+
+class TransferStats:
+    """Bytes en el cable vs. bytes decodificados, en ambos sentidos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wire_in = 0
+        self.decoded_in = 0
+        self.wire_out = 0
+        self.raw_out = 0
+
+    def add_in(self, wire: int, decoded: int):
+        with self._lock:
+            self.wire_in += wire
+            self.decoded_in += decoded
+
+    def add_out(self, wire: int, raw: int):
+        with self._lock:
+            self.wire_out += wire
+            self.raw_out += raw
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "wire_in": self.wire_in,
+                "decoded_in": self.decoded_in,
+                "wire_out": self.wire_out,
+                "raw_out": self.raw_out,
+            }
+
+
+transfer_stats = TransferStats()
+
+
+def _decompressor(encoding: str):
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.decompressobj(zlib.MAX_WBITS)
+    return None
+
+
+def _demasiado_grande(limite: int) -> RespuestaDemasiadoGrande:
+    return RespuestaDemasiadoGrande(f"Respuesta descomprimida mayor a {limite} bytes")
+
+
+def _decompress(dec, chunk: bytes, decoded: int, limite: int) -> bytes:
+    # max_length corta la salida: si queda entrada sin procesar, el cuerpo excede el tope
+    restante = limite - decoded
+    out = dec.decompress(chunk, restante + 1)
+    if len(out) > restante or dec.unconsumed_tail:
+        raise _demasiado_grande(limite)
+    return out
+
+
+def read_decoded(resp, max_bytes: Optional[int] = None) -> Tuple[bytes, int]:
+    """
+    Lee la respuesta completa descomprimiendo por bloques (sin tener el cuerpo
+    comprimido y el descomprimido enteros en memoria a la vez).
+    Devuelve (cuerpo_decodificado, bytes_en_el_cable). Si lo descomprimido
+    supera max_bytes (MAX_DECODED_BYTES por defecto) lanza RespuestaDemasiadoGrande.
+    """
+    limite = MAX_DECODED_BYTES if max_bytes is None else int(max_bytes)
+    encoding = (resp.getheader("Content-Encoding") or "identity").strip().lower()
+    dec = _decompressor(encoding)
+    if dec is None:
+        body = resp.read()
+        transfer_stats.add_in(len(body), len(body))
+        return body, len(body)
+
+    parts = []
+    wire = 0
+    decoded = 0
+    raw_deflate = False
+    while True:
+        chunk = resp.read(_CHUNK)
+        if not chunk:
+            break
+        wire += len(chunk)
+        try:
+            out = _decompress(dec, chunk, decoded, limite)
+        except zlib.error:
+            # Algunos servidores mandan "deflate" sin cabecera zlib
+            if encoding != "deflate" or raw_deflate or wire != len(chunk):
+                raise
+            raw_deflate = True
+            dec = zlib.decompressobj(-zlib.MAX_WBITS)
+            out = _decompress(dec, chunk, decoded, limite)
+        decoded += len(out)
+        parts.append(out)
+    tail = dec.flush()
+    if not dec.eof:
+        # El stream terminó antes del final de gzip/deflate: el cuerpo llegó cortado
+        raise zlib.error("Cuerpo comprimido incompleto")
+    if decoded + len(tail) > limite:
+        raise _demasiado_grande(limite)
+    parts.append(tail)
+    body = b"".join(parts)
+    transfer_stats.add_in(wire, len(body))
+    return body, wire
+
+
+def maybe_gzip(data: bytes, compress: bool | None = None) -> Tuple[bytes, bool]:
+    """
+    Comprime el cuerpo de la petición si se pide (compress=True) o, con
+    compress=None, si CLOUDPOS_GZIP_REQUESTS=1 y supera CLOUDPOS_GZIP_MIN_BYTES.
+    Devuelve (cuerpo, comprimido).
+    """
+    if compress is None:
+        compress = GZIP_REQUESTS and len(data) >= GZIP_MIN_BYTES
+    if not compress:
+        transfer_stats.add_out(len(data), len(data))
+        return data, False
+    packed = gzip.compress(data, compresslevel=6)
+    transfer_stats.add_out(len(packed), len(data))
+    return packed, True
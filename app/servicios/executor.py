@@ -0,0 +1,165 @@
+from __future__ import annotations
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+from PySide6 import QtCore
+import shiboken6
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+
+class _Task(QtCore.QRunnable):
+    def __init__(self, executor: "TaskExecutor", task_id: int, name: str,
+                 fn: Callable, args: tuple, kwargs: dict, serie: Optional[str] = None):
+        super().__init__()
+        self.setAutoDelete(False)  # la referencia la mantiene el executor hasta entregar el resultado
+        self._executor = executor
+        self._task_id = task_id
+        self._name = name
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self._serie = serie
+
+    def run(self):
+        t0 = time.perf_counter()
+        try:
+            result = self._fn(*self._args, **self._kwargs)
+            err = ""
+        except Exception as e:
+            if DEBUG:
+                print(f"[TaskExecutor] {self._name} ERROR: {e!r}")
+            result = None
+            err = str(e) or e.__class__.__name__
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        # Se emite desde el hilo del pool; la conexión en cola lo entrega en el hilo de la GUI
+        self._executor._task_done.emit(self._task_id, result, err, elapsed_ms)
+        if self._serie is not None:
+            self._executor._siguiente_en_serie(self._serie)
+
+
+class TaskExecutor(QtCore.QObject):
+    """
+    Executor compartido por toda la app sobre un QThreadPool propio.
+    - submit(nombre, fn, ...) ejecuta fn en un hilo reutilizable del pool.
+    - on_ok(resultado) / on_err(mensaje) se llaman SIEMPRE en el hilo de la GUI.
+    - owner: si el QObject dueño ya fue destruido, los callbacks no se llaman.
+    - serie: las tareas con la misma serie corren de a una y en orden de llegada
+      (p. ej. escrituras a un mismo archivo); la siguiente arranca desde el hilo
+      del pool, sin esperar al hilo de la GUI.
+    """
+    taskFinished = QtCore.Signal(str, float, bool)  # (nombre, ms, ok)
+
+    _task_done = QtCore.Signal(int, object, str, float)
+
+    def __init__(self, max_workers: Optional[int] = None, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setExpiryTimeout(-1)  # hilos persistentes: no se recrean entre tareas
+        self.set_max_workers(max_workers or int(os.getenv("CLOUDPOS_WORKERS", "4")))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tasks: Dict[int, tuple] = {}
+        self._active_by_name: Dict[str, int] = {}
+        self._series: Dict[str, Deque[_Task]] = {}
+        self._task_done.connect(self._on_task_done, QtCore.Qt.QueuedConnection)
+
+    def set_max_workers(self, n: int):
+        self._pool.setMaxThreadCount(max(1, int(n)))
+
+    def max_workers(self) -> int:
+        return self._pool.maxThreadCount()
+
+    def active_count(self, name: Optional[str] = None) -> int:
+        with self._lock:
+            if name is None:
+                return len(self._tasks)
+            return self._active_by_name.get(name, 0)
+
+    def submit(self, name: str, fn: Callable, *args,
+               on_ok: Optional[Callable[[Any], None]] = None,
+               on_err: Optional[Callable[[str], None]] = None,
+               owner: Optional[QtCore.QObject] = None,
+               serie: Optional[str] = None,
+               **kwargs) -> int:
+        task_id = next(self._ids)
+        task = _Task(self, task_id, name, fn, args, kwargs, serie)
+        with self._lock:
+            self._tasks[task_id] = (task, name, on_ok, on_err, owner)
+            self._active_by_name[name] = self._active_by_name.get(name, 0) + 1
+            if serie is not None:
+                cola = self._series.setdefault(serie, deque())
+                cola.append(task)
+                if len(cola) > 1:
+                    # Arranca cuando termine la anterior de la serie
+                    task = None
+        if DEBUG:
+            print(f"[TaskExecutor] submit {name} (#{task_id}){f' serie={serie}' if serie else ''}")
+        if task is not None:
+            self._pool.start(task)
+        return task_id
+
+    def _siguiente_en_serie(self, serie: str):
+        # Llamado desde el hilo del pool al terminar una tarea de la serie
+        with self._lock:
+            cola = self._series.get(serie)
+            if not cola:
+                return
+            cola.popleft()
+            if not cola:
+                del self._series[serie]
+                return
+            siguiente = cola[0]
+        self._pool.start(siguiente)
+
+    @QtCore.Slot(int, object, str, float)
+    def _on_task_done(self, task_id: int, result: object, err: str, elapsed_ms: float):
+        with self._lock:
+            entry = self._tasks.pop(task_id, None)
+            if entry is None:
+                return
+            _task, name, on_ok, on_err, owner = entry
+            left = self._active_by_name.get(name, 1) - 1
+            if left > 0:
+                self._active_by_name[name] = left
+            else:
+                self._active_by_name.pop(name, None)
+
+        if DEBUG:
+            print(f"[TaskExecutor] {name} (#{task_id}) {'ERROR' if err else 'OK'} en {elapsed_ms:.1f} ms")
+        self.taskFinished.emit(name, elapsed_ms, not err)
+
+        if owner is not None and not shiboken6.isValid(owner):
+            return
+        if err:
+            if on_err:
+                on_err(err)
+        elif on_ok:
+            on_ok(result)
+
+    def shutdown(self, wait_ms: int = 3000) -> bool:
+        """
+        Espera (acotado) a que terminen las tareas, también las que aún estaban en
+        cola: fsync del carrito, guardado del catálogo, lote de la outbox.
+        Los callbacks pendientes se descartan.
+        """
+        done = self._pool.waitForDone(int(wait_ms))
+        with self._lock:
+            self._tasks.clear()
+            self._active_by_name.clear()
+            self._series.clear()
+        return done
+
+
+_executor: Optional[TaskExecutor] = None
+
+
+def get_executor() -> TaskExecutor:
+    """Executor único de la aplicación (se crea en el hilo de la GUI al primer uso)."""
+    global _executor
+    if _executor is None:
+        _executor = TaskExecutor(parent=QtCore.QCoreApplication.instance())
+    return _executor
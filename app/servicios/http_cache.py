@@ -0,0 +1,138 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Mapping, Optional
+
+# TTL (segundos) por endpoint. Dentro del TTL se responde desde memoria sin ir
+# a la red; pasado el TTL se revalida con If-None-Match / If-Modified-Since y un
+# 304 reutiliza el cuerpo guardado. 0 = revalidar siempre. Endpoints que no
+# aparecen aquí no se cachean.
+DEFAULT_TTL_POLICY: Dict[str, float] = {
+    "/muestra_productos": 0,
+    "/productos": 0,
+    "/categorias": 30,
+    "/categoria": 30,
+    "/usuarios": 0,
+}
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "last_modified", "stored_at")
+
+    def __init__(self, body: bytes, etag: Optional[str], last_modified: Optional[str]):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.monotonic()
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    Caché HTTP en memoria, LRU acotada por bytes de cuerpo y thread-safe.
+    Guarda validadores (ETag / Last-Modified) y el cuerpo ya descomprimido.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_policy: Optional[Mapping[str, float]] = None):
+        self.max_bytes = int(max_bytes)
+        self.ttl_policy = dict(DEFAULT_TTL_POLICY if ttl_policy is None else ttl_policy)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def ttl_for(self, path: str) -> Optional[float]:
+        """TTL del endpoint (sin query ni barra final) o None si no se cachea."""
+        base = "/" + path.split("?", 1)[0].strip("/")
+        return self.ttl_policy.get(base)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    @staticmethod
+    def is_fresh(entry: CacheEntry, ttl: float) -> bool:
+        return ttl > 0 and (time.monotonic() - entry.stored_at) < ttl
+
+    def store(self, key: Hashable, body: bytes, headers: Mapping[str, str], ttl: float) -> bool:
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        cache_control = (headers.get("Cache-Control") or "").lower()
+        if "no-store" in cache_control:
+            return False
+        # Sin validadores y sin TTL no hay nada que reutilizar
+        if not etag and not last_modified and ttl <= 0:
+            return False
+        if len(body) > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = CacheEntry(body, etag, last_modified)
+            self._size += len(body)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+        return True
+
+    def touch(self, key: Hashable):
+        """Tras un 304: la entrada vuelve a estar fresca."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = time.monotonic()
+
+    def record(self, kind: str):
+        """Cuenta un acierto ("hits"), revalidación 304 ("revalidated") o fallo ("misses")."""
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+
+    def invalidate(self):
+        """Marca todo como vencido (conserva validadores: la próxima lectura revalida)."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.stored_at = float("-inf")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+            }
+
+
+_shared_cache: Optional[HttpCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_cache() -> HttpCache:
+    """Caché única de la app (tamaño configurable con CLOUDPOS_HTTP_CACHE_MB)."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            mb = float(os.getenv("CLOUDPOS_HTTP_CACHE_MB", "32"))
+            _shared_cache = HttpCache(max_bytes=int(mb * 1024 * 1024))
+        return _shared_cache
@@ -0,0 +1,207 @@
+"""
+Pool de conexiones HTTP/1.1 persistentes (keep-alive) compartido por toda la app.
+
+Evita pagar un handshake TCP (y TLS) en cada llamada a la API: las conexiones
+se reutilizan por host, se descartan cuando pasan demasiado tiempo ociosas y,
+si el servidor cerró un socket reutilizado, la petición se reintenta una vez
+con una conexión nueva (solo lecturas o peticiones con Idempotency-Key: una
+escritura pudo haberse procesado antes de que se cortara el socket).
+"""
+from __future__ import annotations
+import http.client
+import os
+import select
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+# Errores típicos de un socket keep-alive que el servidor cerró mientras estaba ocioso
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+# Métodos que se pueden repetir sin riesgo si el socket reutilizado resultó estar cerrado
+_SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_HostKey = Tuple[str, str, int]  # (esquema, host, puerto)
+
+
+class PoolTimeout(OSError):
+    """No se liberó ninguna conexión del host dentro del timeout."""
+
+
+class ConnectionPool:
+    """
+    Pool thread-safe de conexiones por host.
+    - max_per_host: conexiones simultáneas (activas + ociosas) por host.
+    - idle_timeout: segundos que una conexión ociosa se conserva antes de cerrarla.
+    """
+
+    def __init__(self, max_per_host: int = 4, idle_timeout: float = 30.0):
+        self.max_per_host = max(1, int(max_per_host))
+        self.idle_timeout = float(idle_timeout)
+        self._cond = threading.Condition()
+        self._idle: Dict[_HostKey, List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._in_use: Dict[_HostKey, int] = {}
+
+    # ---------------- Internos ----------------
+
+    @staticmethod
+    def _host_key(url: str) -> Tuple[_HostKey, str]:
+        parts = urlsplit(url)
+        scheme = (parts.scheme or "http").lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Esquema no soportado: {scheme}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        return (scheme, parts.hostname or "", port), target
+
+    @staticmethod
+    def _is_stale(conn: http.client.HTTPConnection) -> bool:
+        # Un socket ocioso "legible" significa EOF (o basura): el servidor lo cerró.
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _new_connection(self, key: _HostKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _acquire(self, key: _HostKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Devuelve (conexión, reutilizada)."""
+        deadline = time.monotonic() + timeout
+        stale: List[http.client.HTTPConnection] = []
+        try:
+            with self._cond:
+                while True:
+                    idle = self._idle.get(key, [])
+                    now = time.monotonic()
+                    while idle:
+                        conn, last_used = idle.pop()
+                        if now - last_used > self.idle_timeout or self._is_stale(conn):
+                            stale.append(conn)
+                            continue
+                        self._in_use[key] = self._in_use.get(key, 0) + 1
+                        conn.timeout = timeout
+                        if conn.sock is not None:
+                            conn.sock.settimeout(timeout)
+                        return conn, True
+                    if self._in_use.get(key, 0) < self.max_per_host:
+                        self._in_use[key] = self._in_use.get(key, 0) + 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"Sin conexiones libres hacia {key[1]}:{key[2]}")
+                    self._cond.wait(remaining)
+        finally:
+            for conn in stale:
+                conn.close()
+        return self._new_connection(key, timeout), False
+
+    def _release(self, key: _HostKey, conn: http.client.HTTPConnection, reusable: bool):
+        with self._cond:
+            self._in_use[key] = max(0, self._in_use.get(key, 0) - 1)
+            if reusable:
+                self._idle.setdefault(key, []).append((conn, time.monotonic()))
+            self._cond.notify()
+        if not reusable:
+            conn.close()
+
+    # ---------------- API pública ----------------
+
+    @contextmanager
+    def open(self, method: str, url: str, body: Optional[bytes] = None,
+             headers: Optional[dict] = None, timeout: float = 10) -> Iterator[http.client.HTTPResponse]:
+        """
+        Envía la petición y entrega la respuesta abierta. Al salir del bloque la
+        conexión vuelve al pool si la respuesta se leyó completa y el servidor no
+        pidió cerrarla.
+        """
+        key, target = self._host_key(url)
+        hdrs = dict(headers or {})
+        hdrs.setdefault("Connection", "keep-alive")
+        repetible = method.upper() in _SAFE_METHODS or any(k.lower() == "idempotency-key" for k in hdrs)
+
+        attempt = 0
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, target, body=body, headers=hdrs)
+                resp = conn.getresponse()
+            except _STALE_ERRORS:
+                self._release(key, conn, reusable=False)
+                # Socket reutilizado que el servidor ya había cerrado: reintento transparente.
+                # Una escritura sin Idempotency-Key no se repite: el servidor pudo haberla procesado
+                if reused and attempt == 0 and repetible:
+                    attempt += 1
+                    if DEBUG:
+                        print(f"[ConnectionPool] conexión obsoleta hacia {key[1]}; reconectando")
+                    continue
+                raise
+            except BaseException:
+                self._release(key, conn, reusable=False)
+                raise
+            break
+
+        ok = False
+        try:
+            yield resp
+            ok = True
+        finally:
+            reusable = ok and resp.isclosed() and not resp.will_close
+            if ok and not reusable and not resp.will_close:
+                # Respuesta no consumida: drenar para poder reutilizar el socket
+                try:
+                    resp.read()
+                    reusable = True
+                except Exception:
+                    reusable = False
+            self._release(key, conn, reusable=reusable)
+
+    def close_idle(self):
+        """Cierra todas las conexiones ociosas (p. ej. al cerrar la app)."""
+        with self._cond:
+            conns = [c for lst in self._idle.values() for c, _ in lst]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                f"{k[0]}://{k[1]}:{k[2]}": {"idle": len(self._idle.get(k, [])), "in_use": self._in_use.get(k, 0)}
+                for k in set(self._idle) | set(self._in_use)
+            }
+
+
+_shared_pool: Optional[ConnectionPool] = None
+_shared_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Pool único de la aplicación (configurable con CLOUDPOS_POOL_MAX / CLOUDPOS_POOL_IDLE)."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool(
+                max_per_host=int(os.getenv("CLOUDPOS_POOL_MAX", "4")),
+                idle_timeout=float(os.getenv("CLOUDPOS_POOL_IDLE", "30")),
+            )
+        return _shared_pool
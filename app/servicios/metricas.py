@@ -0,0 +1,203 @@
+from __future__ import annotations
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.servicios.compresion import transfer_stats
+from app.servicios.resiliencia import path_template
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+# Límites superiores (ms) de los buckets: crecimiento geométrico ~x1.25 de 1 ms a ~2 min.
+# Con esto p50/p95/p99 tienen un error relativo acotado (~12%) y memoria fija por endpoint.
+def _bucket_bounds(start: float = 1.0, factor: float = 1.25, stop: float = 120_000) -> List[float]:
+    bounds = []
+    b = start
+    while b < stop:
+        bounds.append(round(b, 2))
+        b *= factor
+    return bounds
+
+
+_BOUNDS_MS = _bucket_bounds()
+
+
+class LatencyHistogram:
+    """Histograma de latencias con buckets fijos; percentiles interpolados dentro del bucket."""
+    __slots__ = ("counts", "total", "sum_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS_MS) + 1)  # el último: por encima del mayor límite
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(_BOUNDS_MS, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, q: float) -> float:
+        if self.total == 0:
+            return 0.0
+        rank = q * self.total
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c == 0:
+                continue
+            if seen + c >= rank:
+                lo = _BOUNDS_MS[i - 1] if i > 0 else 0.0
+                hi = _BOUNDS_MS[i] if i < len(_BOUNDS_MS) else self.max_ms
+                return min(self.max_ms, lo + (hi - lo) * (rank - seen) / c)
+            seen += c
+        return self.max_ms
+
+
+class EndpointStats:
+    __slots__ = ("count", "errors", "cache_hits", "bytes_in", "bytes_out", "latency")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self) -> dict:
+        h = self.latency
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "mean_ms": round(h.sum_ms / h.total, 2) if h.total else 0.0,
+            "p50_ms": round(h.percentile(0.50), 2),
+            "p95_ms": round(h.percentile(0.95), 2),
+            "p99_ms": round(h.percentile(0.99), 2),
+            "max_ms": round(h.max_ms, 2),
+        }
+
+
+class Metrics:
+    """
+    Métricas por 'MÉTODO /plantilla' (p. ej. 'GET /producto/{id}'), thread-safe.
+    Un error es status 0 (red / circuito abierto) o >= 400.
+    count y la latencia incluyen los aciertos del caché HTTP (también en cache_hits);
+    bytes_in/bytes_out son bytes en el cable (comprimidos si hubo gzip).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self.started_at = time.time()
+
+    def record(self, method: str, path: str, status: int, elapsed_ms: float,
+               bytes_in: int = 0, bytes_out: int = 0, cache_hit: bool = False):
+        key = f"{method} {path_template(path)}"
+        with self._lock:
+            st = self._endpoints.get(key)
+            if st is None:
+                st = self._endpoints[key] = EndpointStats()
+            st.count += 1
+            if cache_hit:
+                st.cache_hits += 1
+            if status == 0 or status >= 400:
+                st.errors += 1
+            st.bytes_in += bytes_in
+            st.bytes_out += bytes_out
+            st.latency.add(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        """Copia serializable: {"endpoints": {...}, "transfer": {...}, ...}."""
+        with self._lock:
+            endpoints = {k: st.to_dict() for k, st in sorted(self._endpoints.items())}
+        return {
+            "started_at": self.started_at,
+            "generated_at": time.time(),
+            "endpoints": endpoints,
+            "transfer": transfer_stats.snapshot(),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self.started_at = time.time()
+
+
+metrics = Metrics()
+
+
+class _Dumper(threading.Thread):
+    def __init__(self, path: str, interval: float):
+        super().__init__(name="cloudpos-metricas", daemon=True)
+        self.path = path
+        self.interval = max(1.0, float(interval))
+        self._stop_evt = threading.Event()
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval):
+            dump_metrics(self.path)
+
+    def stop(self):
+        self._stop_evt.set()
+
+
+_dumper: Optional[_Dumper] = None
+
+
+def dump_metrics(path: str) -> bool:
+    """
+    Escribe el snapshot como JSON de forma atómica (tmp + replace).
+    Nunca lanza (corre en el hilo del volcado) y no deja el temporal si falla.
+    """
+    tmp = None
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".metricas-", suffix=".json", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(metrics.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        return True
+    except Exception as e:
+        if DEBUG:
+            print(f"[metricas] no se pudo escribir {path}: {e!r}")
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        return False
+
+
+def start_metrics_dump(path: Optional[str] = None, interval: Optional[float] = None) -> bool:
+    """
+    Vuelca las métricas cada `interval` s a `path`.
+    Por defecto CLOUDPOS_METRICS_FILE (sin valor = desactivado) y CLOUDPOS_METRICS_INTERVALO (60 s).
+    """
+    global _dumper
+    path = path or os.getenv("CLOUDPOS_METRICS_FILE")
+    if not path or _dumper is not None:
+        return False
+    interval = interval or float(os.getenv("CLOUDPOS_METRICS_INTERVALO", "60"))
+    _dumper = _Dumper(path, interval)
+    _dumper.start()
+    return True
+
+
+def stop_metrics_dump():
+    """Detiene el volcado periódico y escribe un último snapshot."""
+    global _dumper
+    if _dumper is None:
+        return
+    _dumper.stop()
+    dump_metrics(_dumper.path)
+    _dumper = None
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import os
+from collections import deque
+from typing import Callable, Deque, Optional, Set
+from PySide6 import QtCore
+from app.servicios.executor import get_executor
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+
+class _Operation:
+    __slots__ = ("name", "worker", "slot", "key", "coalesce_key")
+
+    def __init__(self, name: str, worker: QtCore.QObject, slot: Callable,
+                 key: Optional[str], coalesce_key: Optional[str]):
+        self.name = name
+        self.worker = worker
+        self.slot = slot
+        self.key = key
+        self.coalesce_key = coalesce_key
+
+
+class OperationQueue(QtCore.QObject):
+    """
+    Cola de operaciones de un servicio (reemplaza el "una a la vez o se descarta").
+    - max_concurrency: operaciones simultáneas en el executor compartido.
+    - key: operaciones con la misma clave (p. ej. "producto:15") se ejecutan en
+      orden de llegada y nunca en paralelo.
+    - coalesce_key: si ya hay una operación igual esperando, la nueva se descarta
+      (p. ej. varias recargas seguidas del listado = una sola petición).
+    Las operaciones son workers con señal finished(...) y método run().
+    """
+    busyChanged = QtCore.Signal(bool)
+    depthChanged = QtCore.Signal(int)
+
+    def __init__(self, name: str, max_concurrency: Optional[int] = None, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._name = name
+        self.max_concurrency = max(1, int(max_concurrency or os.getenv("CLOUDPOS_OPS_CONCURRENCIA", "2")))
+        self._pending: Deque[_Operation] = deque()
+        self._running: Set[_Operation] = set()
+
+    def depth(self) -> int:
+        return len(self._pending) + len(self._running)
+
+    def enqueue(self, name: str, worker: QtCore.QObject, slot: Callable,
+                key: Optional[str] = None, coalesce_key: Optional[str] = None) -> bool:
+        """Encola la operación; devuelve False solo si se fusionó con una ya pendiente."""
+        if coalesce_key is not None and any(op.coalesce_key == coalesce_key for op in self._pending):
+            if DEBUG:
+                print(f"[{self._name}] {name}: ya hay una igual en cola; se fusiona")
+            return False
+        was_idle = self.depth() == 0
+        self._pending.append(_Operation(name, worker, slot, key, coalesce_key))
+        if was_idle:
+            self.busyChanged.emit(True)
+        self.depthChanged.emit(self.depth())
+        self._pump()
+        return True
+
+    def _pump(self):
+        if len(self._running) >= self.max_concurrency or not self._pending:
+            return
+        busy_keys = {op.key for op in self._running if op.key is not None}
+        for op in list(self._pending):
+            if len(self._running) >= self.max_concurrency:
+                break
+            if op.key is not None and op.key in busy_keys:
+                # Mantiene el orden por entidad: las siguientes con la misma clave también esperan
+                continue
+            if op.key is not None:
+                busy_keys.add(op.key)
+            self._pending.remove(op)
+            self._start(op)
+
+    def _start(self, op: _Operation):
+        self._running.add(op)
+        op.worker.finished.connect(op.slot)
+        # El executor avisa en el hilo de la GUI después de entregar finished al servicio
+        get_executor().submit(
+            f"{self._name}.{op.name}", op.worker.run,
+            on_ok=lambda _res: self._on_done(op),
+            on_err=lambda _err: self._on_done(op),
+            owner=self,
+        )
+
+    def _on_done(self, op: _Operation):
+        self._running.discard(op)
+        op.worker = None
+        self._pump()
+        depth = self.depth()
+        self.depthChanged.emit(depth)
+        if depth == 0:
+            self.busyChanged.emit(False)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Solo stdlib: este módulo se importa antes que PySide6 para poder medir todo lo demás.
+
+# Presupuesto de importación (ms, acumulado) para cada módulo de app.views
+PRESUPUESTO_VISTA_MS = float(os.getenv("CLOUDPOS_PRESUPUESTO_VISTA_MS", "150"))
+_TOP_IMPORTS = 25
+_FLAG = "--perfil-arranque"
+
+
+def _edad_proceso_ms() -> Optional[float]:
+    """Milisegundos desde que arrancó el intérprete (Linux: /proc); None si no se puede saber."""
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            campos = f.read().rsplit(b")", 1)[1].split()
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        inicio = int(campos[19]) / os.sysconf("SC_CLK_TCK")
+        return max(0.0, (uptime - inicio) * 1000.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _CargadorMedido:
+    """Envuelve el loader real y mide exec_module (tiempo acumulado y propio, sin los hijos)."""
+
+    def __init__(self, loader: Any, perfil: "PerfilArranque"):
+        self._loader = loader
+        self._perfil = perfil
+
+    def __getattr__(self, name: str):
+        # get_resource_reader, get_data, is_package...: todo lo demás va al loader real
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        p = self._perfil
+        if threading.get_ident() != p._hilo:
+            return self._loader.exec_module(module)
+        p._pila.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - t0
+            hijos = p._pila.pop()
+            if p._pila:
+                p._pila[-1] += total
+            p.imports.append((module.__name__, total * 1000.0, (total - hijos) * 1000.0))
+
+
+class _BuscadorMedido:
+    """Primer finder de sys.meta_path: delega en los demás y envuelve el loader encontrado."""
+
+    def __init__(self, perfil: "PerfilArranque"):
+        self._perfil = perfil
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            buscar = getattr(finder, "find_spec", None)
+            if buscar is None:
+                continue
+            spec = buscar(name, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _CargadorMedido(spec.loader, self._perfil)
+            return spec
+        return None
+
+
+class PerfilArranque:
+    """
+    Perfil del arranque de la app (se activa con --perfil-arranque o CLOUDPOS_PERFIL_ARRANQUE).
+    - marcar(fase): tiempo de cada fase, en ms desde el inicio del intérprete.
+    - Un finder en sys.meta_path mide cada import (acumulado y propio).
+    - reporte(): texto con fases, imports más lentos y el presupuesto de las vistas;
+      emitir() lo imprime (stderr) o lo guarda como JSON si se dio una ruta.
+    El finder queda instalado hasta emitir(), que se llama al salir: así también se
+    miden las vistas que se importan recién al abrir su sección.
+    """
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        edad = _edad_proceso_ms()
+        self._offset_ms = edad if edad is not None else 0.0
+        self.activo = False
+        self.destino: Optional[str] = None
+        self.fases: List[Tuple[str, float]] = [("interprete", 0.0)] if edad is not None else []
+        self.imports: List[Tuple[str, float, float]] = []  # (módulo, acumulado ms, propio ms)
+        self._pila: List[float] = []
+        self._hilo = threading.get_ident()
+        self._buscador: Optional[_BuscadorMedido] = None
+        self._emitido = False
+
+    def activar(self, destino: Optional[str] = None):
+        if self.activo:
+            return
+        self.activo = True
+        self.destino = destino or None
+        self._buscador = _BuscadorMedido(self)
+        sys.meta_path.insert(0, self._buscador)
+        self.marcar("perfil")
+
+    def activar_desde_argv(self, argv: List[str]):
+        """Busca --perfil-arranque[=ruta] (lo quita de argv) o CLOUDPOS_PERFIL_ARRANQUE=1|ruta."""
+        for i, arg in enumerate(argv):
+            if arg == _FLAG or arg.startswith(_FLAG + "="):
+                del argv[i]
+                self.activar(arg.partition("=")[2])
+                return
+        env = os.getenv("CLOUDPOS_PERFIL_ARRANQUE", "")
+        if env and env != "0":
+            self.activar(None if env == "1" else env)
+
+    def desinstalar(self):
+        if self._buscador is not None and self._buscador in sys.meta_path:
+            sys.meta_path.remove(self._buscador)
+        self._buscador = None
+
+    def marcar(self, fase: str):
+        if self.activo:
+            self.fases.append((fase, self._offset_ms + (time.perf_counter() - self._t0) * 1000.0))
+
+    # ---------------- Reporte ----------------
+
+    def vistas_sobre_presupuesto(self, presupuesto_ms: float = PRESUPUESTO_VISTA_MS) -> List[Tuple[str, float]]:
+        return [(m, ms) for m, ms, _ in self.imports if m.startswith("app.views.") and ms > presupuesto_ms]
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "fases_ms": [{"fase": f, "ms": round(ms, 2)} for f, ms in self.fases],
+            "imports_ms": [
+                {"modulo": m, "acumulado": round(total, 3), "propio": round(propio, 3)}
+                for m, total, propio in sorted(self.imports, key=lambda x: x[1], reverse=True)
+            ],
+            "presupuesto_vista_ms": PRESUPUESTO_VISTA_MS,
+            "vistas_sobre_presupuesto": [m for m, _ in self.vistas_sobre_presupuesto()],
+        }
+
+    def reporte(self) -> str:
+        out = ["[PerfilArranque] Fases (ms desde el inicio del intérprete):"]
+        anterior = 0.0
+        for fase, ms in self.fases:
+            out.append(f"  {fase:<22} {ms:9.1f}  (+{ms - anterior:.1f})")
+            anterior = ms
+        out.append(f"[PerfilArranque] Imports más lentos (acumulado / propio, ms) de {len(self.imports)}:")
+        for m, total, propio in sorted(self.imports, key=lambda x: x[1], reverse=True)[:_TOP_IMPORTS]:
+            out.append(f"  {total:9.1f} {propio:9.1f}  {m}")
+        vistas = [(m, total) for m, total, _ in self.imports if m.startswith("app.views.")]
+        if vistas:
+            out.append(f"[PerfilArranque] Vistas (presupuesto {PRESUPUESTO_VISTA_MS:.0f} ms):")
+            for m, total in vistas:
+                estado = "EXCEDE" if total > PRESUPUESTO_VISTA_MS else "ok"
+                out.append(f"  {total:9.1f}  {estado:<6} {m}")
+        return "\n".join(out)
+
+    def emitir(self):
+        """Imprime o guarda el reporte (una sola vez) y deja de medir imports."""
+        if not self.activo or self._emitido:
+            return
+        self._emitido = True
+        self.desinstalar()
+        if self.destino:
+            try:
+                with open(self.destino, "w", encoding="utf-8") as f:
+                    json.dump(self.como_dict(), f, ensure_ascii=False, indent=2)
+                return
+            except OSError as e:
+                print(f"[PerfilArranque] no se pudo escribir {self.destino}: {e}; se imprime", file=sys.stderr)
+        print(self.reporte(), file=sys.stderr)
+
+
+_perfil: Optional[PerfilArranque] = None
+
+
+def get_perfil_arranque() -> PerfilArranque:
+    global _perfil
+    if _perfil is None:
+        _perfil = PerfilArranque()
+    return _perfil
@@ -0,0 +1,232 @@
+from __future__ import annotations
+import os
+from typing import Any, Dict, List, Optional
+from PySide6 import QtCore
+from app.funciones.dinero import get_tabla_iva
+from app.servicios.catalogo_local import CatalogoLocal, get_catalogo_local
+from app.servicios.executor import get_executor
+from app.servicios.productos_service import ProductosService
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+# Campos que la API puede usar para el código de barras / SKU (el primero presente gana)
+_CAMPOS_CODIGO = ("codigo_barras", "codigo", "barcode", "ean", "sku")
+
+# Las escrituras al catálogo en disco corren de a una y en orden: un guardado
+# viejo no puede pisar uno más nuevo (ni su marca)
+_SERIE_DISCO = "catalogo.disco"
+
+
+def _normalizar(p: dict) -> Optional[dict]:
+    pid = str(p.get("id", "")).strip()
+    if not pid:
+        return None
+    try:
+        precio = int(p.get("precio") or 0)
+    except (TypeError, ValueError):
+        precio = 0
+    try:
+        stock = int(p.get("stock") if p.get("stock") is not None else p.get("cantidad") or 0)
+    except (TypeError, ValueError):
+        stock = 0
+    codigo = next((str(p[k]).strip() for k in _CAMPOS_CODIGO if p.get(k) not in (None, "")), "")
+    categoria = str(p.get("categoria") or "")
+    return {
+        "id": pid,
+        "nombre": str(p.get("nombre", "")),
+        "categoria": categoria,
+        "precio": precio,
+        # Precio final calculado una vez por producto (entero, tasa según categoría)
+        "precio_con_iva": get_tabla_iva().con_iva(precio, categoria),
+        "stock": stock,
+        "codigo": codigo,
+    }
+
+
+class ProductStore(QtCore.QObject):
+    """
+    Catálogo de productos compartido por Caja y Bodega (una sola descarga).
+    - productos(): lista en el orden de la API; get(id): búsqueda O(1) por id (str).
+    - get_por_codigo(codigo): búsqueda O(1) por código de barras/SKU o, si no hay, por id
+      (lo usa el lector de códigos de Caja).
+    - productosCargados(list): el catálogo completo cambió (carga/recarga).
+    - productoActualizado(dict): cambió un producto concreto (actualizar_local).
+    - productosCambiados(list, list): sincronización incremental aplicada
+      (productos nuevos/modificados, ids eliminados); las vistas actualizan solo esas filas.
+    Las recargas son incrementales desde la última marca del servidor cuando
+    este lo soporta (?cambios_desde=); si no, se descarga el catálogo completo.
+    Con catálogo local (SQLite) el primer cargar() entrega de inmediato la última
+    copia guardada (es_local() == True) y revalida contra la API en segundo plano.
+    Los dicts entregados son del store: las vistas no deben modificarlos.
+    """
+    productosCargados = QtCore.Signal(list)
+    productoActualizado = QtCore.Signal(dict)
+    productosCambiados = QtCore.Signal(list, list)
+    error = QtCore.Signal(str)
+    busy = QtCore.Signal(bool)
+
+    def __init__(self, service: Optional[ProductosService] = None, parent: Optional[QtCore.QObject] = None,
+                 catalogo: Optional[CatalogoLocal] = None):
+        super().__init__(parent)
+        self._svc = service or ProductosService(parent=self)
+        self._catalogo = catalogo
+        self._base_url = self._svc.client.base_url
+        self._items: List[dict] = []
+        self._by_id: Dict[str, dict] = {}
+        self._by_code: Dict[str, dict] = {}
+        self._loaded = False
+        self._local = False
+        self._marca: Optional[str] = None
+        self._delta = True  # se apaga si el servidor rechaza ?cambios_desde=
+        self._svc.busy.connect(self.busy)
+        self._svc.error.connect(self.error)
+        self._svc.productosSincronizados.connect(self._on_synced)
+
+    # ---------------- Lectura ----------------
+
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def es_local(self) -> bool:
+        """True mientras lo mostrado viene del disco y aún no llega la respuesta de la API."""
+        return self._local
+
+    def productos(self) -> List[dict]:
+        return self._items
+
+    def get(self, producto_id: Any) -> Optional[dict]:
+        return self._by_id.get(str(producto_id))
+
+    def get_por_codigo(self, codigo: str) -> Optional[dict]:
+        codigo = (codigo or "").strip()
+        return self._by_code.get(codigo) or self._by_id.get(codigo)
+
+    def _indexar_codigo(self, p: dict, anterior: str = ""):
+        if anterior and self._by_code.get(anterior) is p:
+            del self._by_code[anterior]
+        if p["codigo"]:
+            self._by_code[p["codigo"]] = p
+
+    # ---------------- Carga ----------------
+
+    def cargar(self) -> bool:
+        """Descarga el catálogo solo si aún no se tiene; devuelve True si lanzó la petición."""
+        if self._loaded:
+            return False
+        if self._catalogo is not None:
+            cached = self._catalogo.cargar(self._base_url)
+            if cached:
+                # La copia en disco trae su marca: la revalidación ya puede ser incremental
+                self._marca = self._catalogo.marca(self._base_url)
+                self._set_items(cached, local=True)
+        self.recargar()
+        return True
+
+    def recargar(self):
+        # Varias recargas seguidas se fusionan en la cola del servicio
+        marca = self._marca if (self._loaded and self._delta) else None
+        self._svc.sincronizar_productos(marca)
+
+    @QtCore.Slot(dict)
+    def _on_synced(self, res: dict):
+        if not res.get("delta_soportado", True):
+            self._delta = False
+        self._marca = res.get("marca")
+        if res.get("completo", True):
+            self._set_items(res.get("productos") or [], local=False)
+            if self._catalogo is not None:
+                # Escritura en disco fuera del hilo de la GUI, en serie con las demás del catálogo
+                get_executor().submit("catalogo.guardar", self._catalogo.guardar, self._base_url,
+                                      [dict(p) for p in self._items], self._marca, serie=_SERIE_DISCO)
+            return
+        cambiados, eliminados = self._merge(res.get("productos") or [], res.get("eliminados") or [])
+        if self._catalogo is not None:
+            get_executor().submit("catalogo.aplicar_cambios", self._catalogo.aplicar_cambios, self._base_url,
+                                  [dict(p) for p in cambiados], eliminados, self._marca, serie=_SERIE_DISCO)
+        self.productosCambiados.emit(cambiados, eliminados)
+
+    def _merge(self, items: List[dict], eliminados: List[str]):
+        """Aplica un delta sobre el índice: O(cambios) salvo si hay eliminaciones."""
+        cambiados: List[dict] = []
+        for raw in items:
+            p = _normalizar(raw) if isinstance(raw, dict) else None
+            if p is None:
+                continue
+            actual = self._by_id.get(p["id"])
+            if actual is None:
+                self._items.append(p)
+                self._by_id[p["id"]] = p
+                self._indexar_codigo(p)
+                cambiados.append(p)
+            else:
+                # Mismo dict: quien lo tenga referenciado ve el valor nuevo
+                anterior = actual["codigo"]
+                actual.update(p)
+                self._indexar_codigo(actual, anterior)
+                cambiados.append(actual)
+        borrados = []
+        for pid in (str(i) for i in eliminados):
+            p = self._by_id.pop(pid, None)
+            if p is not None:
+                if p["codigo"] and self._by_code.get(p["codigo"]) is p:
+                    del self._by_code[p["codigo"]]
+                borrados.append(pid)
+        if borrados:
+            fuera = set(borrados)
+            self._items = [p for p in self._items if p["id"] not in fuera]
+        self._local = False
+        if DEBUG:
+            print(f"[ProductStore] delta: {len(cambiados)} cambiados, {len(borrados)} eliminados")
+        return cambiados, borrados
+
+    def _set_items(self, items: List[dict], local: bool):
+        productos = []
+        by_id: Dict[str, dict] = {}
+        by_code: Dict[str, dict] = {}
+        for raw in items:
+            p = _normalizar(raw) if isinstance(raw, dict) else None
+            if p is None:
+                continue
+            productos.append(p)
+            by_id[p["id"]] = p
+            if p["codigo"]:
+                by_code[p["codigo"]] = p
+        self._items = productos
+        self._by_id = by_id
+        self._by_code = by_code
+        self._loaded = True
+        self._local = local
+        if DEBUG:
+            print(f"[ProductStore] {len(productos)} productos ({'disco' if local else 'API'})")
+        self.productosCargados.emit(productos)
+
+    # ---------------- Cambios locales ----------------
+
+    def actualizar_local(self, producto_id: Any, **campos) -> Optional[dict]:
+        """
+        Aplica un cambio ya confirmado por la API (p. ej. nueva categoría) sin
+        recargar todo el catálogo y avisa a las vistas suscritas.
+        """
+        p = self._by_id.get(str(producto_id))
+        if p is None:
+            return None
+        anterior = p["codigo"]
+        p.update({k: v for k, v in campos.items() if k in p and k not in ("id", "precio_con_iva")})
+        p["precio_con_iva"] = get_tabla_iva().con_iva(p["precio"], p["categoria"])
+        self._indexar_codigo(p, anterior)
+        if self._catalogo is not None:
+            get_executor().submit("catalogo.actualizar", self._catalogo.actualizar, self._base_url, dict(p),
+                                  serie=_SERIE_DISCO)
+        self.productoActualizado.emit(p)
+        return p
+
+
+_store: Optional[ProductStore] = None
+
+
+def get_product_store() -> ProductStore:
+    """Store único de la app (se crea en el hilo de la GUI al primer uso)."""
+    global _store
+    if _store is None:
+        _store = ProductStore(parent=QtCore.QCoreApplication.instance(), catalogo=get_catalogo_local())
+    return _store
@@ -1,11 +1,19 @@
 from __future__ import annotations
-from typing import List, Any, Optional
+from typing import Any, Optional
+from urllib.parse import quote
 from PySide6 import QtCore
 from app.servicios.api import ApiClient
+from app.servicios.operation_queue import OperationQueue
 import os
 
 DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
 
+# Sincronización incremental: GET /muestra_productos?cambios_desde=<marca> responde
+# {"productos": [...cambiados/nuevos], "eliminados": [ids], "marca": "<nueva>", "completo": false}.
+# Si el servidor no lo soporta (400/404/405/422/501 o lista plana) se hace carga completa.
+DELTA_PARAM = "cambios_desde"
+_DELTA_UNSUPPORTED = (400, 404, 405, 422, 501)
+
 
 def _parse_product_response(data: Any) -> list[dict]:
     if isinstance(data, list):
@@ -16,25 +24,79 @@ def _parse_product_response(data: Any) -> list[dict]:
     return []
 
 
-class _ProductosWorker(QtCore.QObject):
-    finished = QtCore.Signal(list, str)
+def _api_error(data: Any) -> Optional[str]:
+    if isinstance(data, dict) and data.get("error"):
+        detail = data.get("detail")
+        return detail if isinstance(detail, str) and detail else f"Error HTTP {data.get('status', '')}"
+    return None
+
+
+class _SincronizarProductosWorker(QtCore.QObject):
+    """
+    Con `marca` pide solo los cambios desde esa marca; sin ella (o si el servidor
+    no soporta deltas) trae el catálogo completo.
+    finished(dict) -> {"completo", "productos", "eliminados", "marca", "delta_soportado"}
+    """
+    finished = QtCore.Signal(dict, str)
 
-    def __init__(self, client: ApiClient):
+    def __init__(self, client: ApiClient, marca: Optional[str]):
         super().__init__()
         self.client = client
+        self.marca = marca
+
+    def _completo(self, delta_soportado: bool) -> dict:
+        data = self.client.get_json("/muestra_productos")
+        err = _api_error(data)
+        if err:
+            raise RuntimeError(err)
+        marca = data.get("marca") if isinstance(data, dict) else None
+        return {
+            "completo": True,
+            "productos": _parse_product_response(data),
+            "eliminados": [],
+            "marca": str(marca) if marca is not None else None,
+            "delta_soportado": delta_soportado,
+        }
 
     @QtCore.Slot()
     def run(self):
         try:
-            data = self.client.get_json("/muestra_productos")
-            items = _parse_product_response(data)
+            if not self.marca:
+                res = self._completo(True)
+            else:
+                data = self.client.get_json(f"/muestra_productos?{DELTA_PARAM}={quote(self.marca, safe='')}")
+                status = int(data.get("status") or 0) if isinstance(data, dict) and data.get("error") else 200
+                if status in _DELTA_UNSUPPORTED:
+                    res = self._completo(False)
+                elif _api_error(data):
+                    raise RuntimeError(_api_error(data))
+                elif isinstance(data, dict) and "marca" in data and not data.get("completo"):
+                    res = {
+                        "completo": False,
+                        "productos": _parse_product_response(data),
+                        "eliminados": [str(i) for i in (data.get("eliminados") or [])],
+                        "marca": str(data["marca"]),
+                        "delta_soportado": True,
+                    }
+                else:
+                    # El servidor ignoró el parámetro: lo recibido ya es el catálogo completo
+                    marca = data.get("marca") if isinstance(data, dict) else None
+                    res = {
+                        "completo": True,
+                        "productos": _parse_product_response(data),
+                        "eliminados": [],
+                        "marca": str(marca) if marca is not None else None,
+                        "delta_soportado": marca is not None,
+                    }
             if DEBUG:
-                print(f"[ProductosService] OK: {len(items)} productos")
-            self.finished.emit(items, "")
+                kind = "completo" if res["completo"] else "delta"
+                print(f"[ProductosService] sync {kind}: {len(res['productos'])} productos, "
+                      f"{len(res['eliminados'])} eliminados, marca={res['marca']!r}")
+            self.finished.emit(res, "")
         except Exception as e:
             if DEBUG:
-                print(f"[ProductosService] ERROR: {e!r}")
-            self.finished.emit([], str(e))
+                print(f"[ProductosService] sync ERROR: {e!r}")
+            self.finished.emit({}, str(e))
 
 
 class _CrearProductoWorker(QtCore.QObject):
@@ -203,103 +265,47 @@ class _ActualizarCategoriaWorker(QtCore.QObject):
 
 
 class ProductosService(QtCore.QObject):
-    productosCargados = QtCore.Signal(list)
+    productosSincronizados = QtCore.Signal(dict)
     productoCreado = QtCore.Signal(str)
     productoActualizado = QtCore.Signal(int, str)      # (producto_id, mensaje)
     categoriaActualizada = QtCore.Signal(int, str)     # (producto_id, mensaje)
     error = QtCore.Signal(str)
     busy = QtCore.Signal(bool)
 
-    def __init__(self, client: Optional[ApiClient] = None, parent: Optional[QtCore.QObject] = None):
+    def __init__(self, client: Optional[ApiClient] = None, parent: Optional[QtCore.QObject] = None,
+                 max_concurrency: Optional[int] = None):
         super().__init__(parent)
         self.client = client or ApiClient()
-        self._thread: Optional[QtCore.QThread] = None
-        self._worker: Optional[QtCore.QObject] = None
+        # Cola por servicio: nada se descarta, orden garantizado por producto
+        self._queue = OperationQueue("productos", max_concurrency, self)
+        self._queue.busyChanged.connect(self.busy)
 
-    def cargar_productos(self):
-        if self._thread and self._thread.isRunning():
-            if DEBUG:
-                print("[ProductosService] carga en curso; se omite")
-            return
-        self.busy.emit(True)
-        self._thread = QtCore.QThread(self)
-        self._worker = _ProductosWorker(self.client)
-        self._worker.moveToThread(self._thread)
-        self._thread.started.connect(self._worker.run)
-        self._worker.finished.connect(self._on_list_finished)
-        self._worker.finished.connect(self._thread.quit)
-        self._worker.finished.connect(self._worker.deleteLater)
-        self._thread.finished.connect(self._thread.deleteLater)
-        self._thread.finished.connect(self._clear_refs)
-        self._thread.start()
+    def sincronizar_productos(self, marca: Optional[str] = None):
+        """Carga incremental desde `marca` (ver _SincronizarProductosWorker)."""
+        self._queue.enqueue("sincronizar", _SincronizarProductosWorker(self.client, marca),
+                            self._on_sync_finished, coalesce_key="sincronizar")
 
     def crear_producto(self, nombre: str, categoria_id: int, precio: int, cantidad: int):
-        if self._thread and self._thread.isRunning():
-            if DEBUG:
-                print("[ProductosService] operación en curso; se omite crear")
-            return
-        self.busy.emit(True)
-        self._thread = QtCore.QThread(self)
-        self._worker = _CrearProductoWorker(self.client, nombre, categoria_id, precio, cantidad)
-        self._worker.moveToThread(self._thread)
-        self._thread.started.connect(self._worker.run)
-        self._worker.finished.connect(self._on_create_finished)
-        self._worker.finished.connect(self._thread.quit)
-        self._worker.finished.connect(self._worker.deleteLater)
-        self._thread.finished.connect(self._thread.deleteLater)
-        self._thread.finished.connect(self._clear_refs)
-        self._thread.start()
+        self._queue.enqueue("crear", _CrearProductoWorker(self.client, nombre, categoria_id, precio, cantidad),
+                            self._on_create_finished)
 
     def actualizar_producto(self, producto_id: int, precio: int, cantidad: int):
-        if self._thread and self._thread.isRunning():
-            if DEBUG:
-                print("[ProductosService] operación en curso; se omite actualizar producto")
-            return
-        self.busy.emit(True)
-        self._thread = QtCore.QThread(self)
-        self._worker = _ActualizarProductoWorker(self.client, producto_id, precio, cantidad)
-        self._worker.moveToThread(self._thread)
-        self._thread.started.connect(self._worker.run)
-        self._worker.finished.connect(self._on_update_product_finished)
-        self._worker.finished.connect(self._thread.quit)
-        self._worker.finished.connect(self._worker.deleteLater)
-        self._thread.finished.connect(self._thread.deleteLater)
-        self._thread.finished.connect(self._clear_refs)
-        self._thread.start()
+        self._queue.enqueue("actualizar", _ActualizarProductoWorker(self.client, producto_id, precio, cantidad),
+                            self._on_update_product_finished, key=f"producto:{int(producto_id)}")
 
     def actualizar_categoria_producto(self, producto_id: int, categoria_id: int):
-        if self._thread and self._thread.isRunning():
-            if DEBUG:
-                print("[ProductosService] operación en curso; se omite actualizar categoría")
-            return
-        self.busy.emit(True)
-        self._thread = QtCore.QThread(self)
-        self._worker = _ActualizarCategoriaWorker(self.client, producto_id, categoria_id)
-        self._worker.moveToThread(self._thread)
-        self._thread.started.connect(self._worker.run)
-        self._worker.finished.connect(self._on_update_cat_finished)
-        self._worker.finished.connect(self._thread.quit)
-        self._worker.finished.connect(self._worker.deleteLater)
-        self._thread.finished.connect(self._thread.deleteLater)
-        self._thread.finished.connect(self._clear_refs)
-        self._thread.start()
-
-    @QtCore.Slot()
-    def _clear_refs(self):
-        self._thread = None
-        self._worker = None
+        self._queue.enqueue("actualizar_categoria", _ActualizarCategoriaWorker(self.client, producto_id, categoria_id),
+                            self._on_update_cat_finished, key=f"producto:{int(producto_id)}")
 
-    @QtCore.Slot(list, str)
-    def _on_list_finished(self, items: List[dict], err: str):
-        self.busy.emit(False)
+    @QtCore.Slot(dict, str)
+    def _on_sync_finished(self, res: dict, err: str):
         if err:
             self.error.emit(err)
         else:
-            self.productosCargados.emit(items)
+            self.productosSincronizados.emit(res)
 
     @QtCore.Slot(str, str)
     def _on_create_finished(self, mensaje: str, err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
@@ -307,7 +313,6 @@ class ProductosService(QtCore.QObject):
 
     @QtCore.Slot(int, str, str)
     def _on_update_product_finished(self, producto_id: int, mensaje: str, err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
@@ -315,7 +320,6 @@ class ProductosService(QtCore.QObject):
 
     @QtCore.Slot(int, str, str)
     def _on_update_cat_finished(self, producto_id: int, mensaje: str, err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+# Métodos que se reintentan (repetirlos no duplica efectos)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT")
+# Respuestas que indican caída/sobrecarga temporal del servidor
+RETRYABLE_STATUS = (502, 503, 504)
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{32,36})$")
+
+
+def path_template(path: str) -> str:
+    """'/producto/15/categoria?x=1' -> '/producto/{id}/categoria' (agrupa métricas y circuitos)."""
+    base = path.split("?", 1)[0]
+    parts = [("{id}" if _ID_SEGMENT.match(p) else p) for p in base.strip("/").split("/")]
+    return "/" + "/".join(p for p in parts if p)
+
+
+class RetryPolicy:
+    """Backoff exponencial con jitter completo: espera aleatoria en [0, min(tope, base·2^intento)]."""
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 0.25, max_delay: float = 4.0):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Circuito por endpoint:
+    - closed: todo pasa; tras `failure_threshold` fallos seguidos se abre.
+    - open: falla de inmediato sin tocar la red durante `reset_timeout` segundos.
+    - half_open: deja pasar UNA petición de prueba; si va bien se cierra, si no se reabre.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def trip(self):
+        with self._lock:
+            if self._state != self.OPEN:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def half_open(self):
+        with self._lock:
+            if self._state == self.OPEN:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+
+class CircuitRegistry:
+    """Circuitos por 'MÉTODO /plantilla'. ApiMonitor los abre/sondea según el ping."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[key] = breaker
+            return breaker
+
+    def trip_all(self):
+        """Servidor caído según el monitor: fallar rápido en todos los endpoints conocidos."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        for b in breakers:
+            b.trip()
+
+    def half_open_all(self):
+        """Servidor de vuelta: cada endpoint abierto deja pasar una petición de prueba."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        for b in breakers:
+            b.half_open()
+
+    def snapshot(self) -> Dict[str, str]:
+        with self._lock:
+            return {k: b.state for k, b in self._breakers.items()}
+
+
+retry_policy = RetryPolicy(max_retries=int(os.getenv("CLOUDPOS_REINTENTOS", "2")))
+circuits = CircuitRegistry(
+    failure_threshold=int(os.getenv("CLOUDPOS_CIRCUITO_FALLOS", "5")),
+    reset_timeout=float(os.getenv("CLOUDPOS_CIRCUITO_ESPERA", "15")),
+)
+
+
+def sleep_backoff(attempt: int, policy: Optional[RetryPolicy] = None):
+    delay = (policy or retry_policy).delay(attempt)
+    if DEBUG:
+        print(f"[resiliencia] reintento {attempt + 1} en {delay:.2f}s")
+    time.sleep(delay)
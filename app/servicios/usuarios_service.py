@@ -1,5 +1,6 @@
 from PySide6 import QtCore
 from app.servicios.api import ApiClient
+from app.servicios.operation_queue import OperationQueue
 import hashlib
 
 
@@ -105,75 +106,32 @@ class UsuariosService(QtCore.QObject):
     error = QtCore.Signal(str)
     busy = QtCore.Signal(bool)
 
-    def __init__(self, client: ApiClient | None = None, parent=None):
+    def __init__(self, client: ApiClient | None = None, parent=None, max_concurrency: int | None = None):
         super().__init__(parent)
         self.client = client or ApiClient()
-        self._thread: QtCore.QThread | None = None
-        self._worker: QtCore.QObject | None = None 
-
-    def _start_thread(self, worker: QtCore.QObject) -> bool:
-        # si ya hay un hilo corriendo, no lanzamos otro
-        if self._thread and self._thread.isRunning():
-            return False
-        self.busy.emit(True)
-        self._thread = QtCore.QThread(self)
-        self._worker = worker
-        worker.moveToThread(self._thread)
-        self._thread.finished.connect(self._thread.deleteLater)
-        # limpiar referencias cuando termine
-        self._thread.finished.connect(self._clear_thread)
-        return True
-
-    @QtCore.Slot()
-    def _clear_thread(self):
-        self._thread = None
-        self._worker = None
+        # las operaciones se encolan (no se descartan) y se serializan por usuario
+        self._queue = OperationQueue("usuarios", max_concurrency, self)
+        self._queue.busyChanged.connect(self.busy)
 
     # -------- operaciones públicas --------
     def listar(self):
-        worker = _ListarUsuariosWorker(self.client)
-        if not self._start_thread(worker):
-            return
-        self._thread.started.connect(worker.run)
-        worker.finished.connect(self._on_listado)
-        worker.finished.connect(self._thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        self._thread.start()
+        self._queue.enqueue("listar", _ListarUsuariosWorker(self.client), self._on_listado,
+                            coalesce_key="listar")
 
     def crear(self, payload: dict):
-        worker = _CrearUsuarioWorker(self.client, payload)
-        if not self._start_thread(worker):
-            return
-        self._thread.started.connect(worker.run)
-        worker.finished.connect(self._on_creado)
-        worker.finished.connect(self._thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        self._thread.start()
+        self._queue.enqueue("crear", _CrearUsuarioWorker(self.client, payload), self._on_creado)
 
     def actualizar_nombre(self, user_id: int, nuevo_nombre: str):
-        worker = _ActualizarNombreUsuarioWorker(self.client, user_id, nuevo_nombre)
-        if not self._start_thread(worker):
-            return
-        self._thread.started.connect(worker.run)
-        worker.finished.connect(self._on_actualizado)
-        worker.finished.connect(self._thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        self._thread.start()
+        self._queue.enqueue("actualizar_nombre", _ActualizarNombreUsuarioWorker(self.client, user_id, nuevo_nombre),
+                            self._on_actualizado, key=f"usuario:{user_id}")
 
     def actualizar_contrasena(self, user_id: int, nueva_contrasena: str):
-        worker = _ActualizarContrasenaUsuarioWorker(self.client, user_id, nueva_contrasena)
-        if not self._start_thread(worker):
-            return
-        self._thread.started.connect(worker.run)
-        worker.finished.connect(self._on_actualizado)
-        worker.finished.connect(self._thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        self._thread.start()
+        self._queue.enqueue("actualizar_contrasena", _ActualizarContrasenaUsuarioWorker(self.client, user_id, nueva_contrasena),
+                            self._on_actualizado, key=f"usuario:{user_id}")
 
     # -------- handlers --------
     @QtCore.Slot(list, str)
     def _on_listado(self, usuarios: list, err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
@@ -181,7 +139,6 @@ class UsuariosService(QtCore.QObject):
 
     @QtCore.Slot(str, str)
     def _on_creado(self, msg: str, err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
@@ -189,7 +146,6 @@ class UsuariosService(QtCore.QObject):
 
     @QtCore.Slot(str, str)
     def _on_actualizado(self, msg: str, err: str):
-        self.busy.emit(False)
         if err:
             self.error.emit(err)
         else:
@@ -0,0 +1,337 @@
+from __future__ import annotations
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, List, Optional, Tuple, Union
+from PySide6 import QtCore
+from app.servicios.api import ApiClient
+from app.servicios.executor import get_executor
+
+DEBUG = os.getenv("CLOUDPOS_DEBUG", "0") == "1"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ventas (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave           TEXT NOT NULL UNIQUE,
+    creada_en       REAL NOT NULL,
+    payload         BLOB NOT NULL,
+    estado          TEXT NOT NULL DEFAULT 'pendiente',
+    intentos        INTEGER NOT NULL DEFAULT 0,
+    proximo_intento REAL NOT NULL DEFAULT 0,
+    ultimo_error    TEXT
+);
+CREATE INDEX IF NOT EXISTS ventas_pendientes ON ventas (estado, proximo_intento);
+"""
+
+# Errores que vale la pena reintentar: red / circuito abierto (0), timeouts, saturación, servidor.
+# 403 es definitivo (el token no tiene permiso para esa venta). 401 (sesión vencida) no se
+# reintenta con backoff: nada renueva el token, así que la cola se pausa y se avisa a la UI.
+_TRANSIENT_STATUS = (0, 408, 425, 429)
+_SESSION_STATUS = (401,)
+_LOTE = 20
+
+
+def _default_path() -> str:
+    path = os.getenv("CLOUDPOS_OUTBOX_DB")
+    if path:
+        return path
+    base = ""
+    try:
+        base = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.AppLocalDataLocation)
+    except Exception:
+        pass
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cloudpos"), "ventas_outbox.sqlite3")
+
+
+def _clasificar(res: Any) -> Tuple[str, str]:
+    """('ok' | 'reintentar' | 'sesion' | 'rechazada', mensaje)."""
+    if not (isinstance(res, dict) and res.get("error")):
+        return "ok", ""
+    status = int(res.get("status") or 0)
+    msg = res.get("detail")
+    if isinstance(msg, list) and msg and isinstance(msg[0], dict):
+        msg = msg[0].get("msg") or str(msg)
+    msg = str(msg or f"HTTP {status}")
+    if status in _SESSION_STATUS:
+        return "sesion", msg
+    if status in _TRANSIENT_STATUS or status >= 500:
+        return "reintentar", msg
+    return "rechazada", msg
+
+
+class VentasOutbox(QtCore.QObject):
+    """
+    Bandeja de salida durable para ventas (SQLite en modo WAL).
+    - encolar(cuerpo) guarda la venta localmente con una clave de idempotencia
+      (uuid4) y vuelve de inmediato; el envío es asíncrono. Los bytes guardados
+      son los que se envían: no se vuelve a serializar.
+    - Un flusher en el executor envía en orden (POST /ventas con Idempotency-Key).
+      Ante error transitorio se detiene y reintenta con backoff exponencial + jitter;
+      un 4xx definitivo deja la venta como 'rechazada' y emite ventaRechazada; no se
+      borra: reenviar() la vuelve a la cola y exportar_rechazadas() la guarda en JSON.
+    - depthChanged(int): ventas pendientes de envío.
+    - ventaDemorada(str, str): un intento falló por un error transitorio; la venta
+      sigue guardada y se reintentará sola.
+    - sesionVencida(str): la API respondió 401. La cola queda en pausa (sin backoff)
+      hasta el próximo flush: una venta nueva, reintentar_ya() o el siguiente arranque.
+    - busy(bool): hay un lote en vuelo.
+    """
+    depthChanged = QtCore.Signal(int)
+    ventaEnviada = QtCore.Signal(str, object)   # (clave, respuesta de la API)
+    ventaRechazada = QtCore.Signal(str, str)    # (clave, mensaje)
+    ventaDemorada = QtCore.Signal(str, str)     # (clave, mensaje)
+    sesionVencida = QtCore.Signal(str)          # mensaje
+    busy = QtCore.Signal(bool)
+
+    def __init__(self, path: Optional[str] = None, client: Optional[ApiClient] = None,
+                 parent: Optional[QtCore.QObject] = None,
+                 base_delay: float = 2.0, max_delay: float = 300.0):
+        super().__init__(parent)
+        self.path = path or _default_path()
+        self._client = client or ApiClient()
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL en WAL: la venta sobrevive a un cierre abrupto de la app sin fsync por commit.
+        # CLOUDPOS_OUTBOX_SYNC=FULL también la protege ante un corte de luz (commit más lento).
+        sync = os.getenv("CLOUDPOS_OUTBOX_SYNC", "NORMAL").upper()
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if sync == 'FULL' else 'NORMAL'}")
+        self._conn.executescript(_SCHEMA)
+
+        self._flushing = False
+        self._again = False
+        self._cerrada = False
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush_now)
+        QtCore.QTimer.singleShot(0, self.flush_now)  # lo que quedó de la sesión anterior
+
+    # ---------------- API ----------------
+
+    def encolar(self, cuerpo: Union[bytes, dict]) -> str:
+        """Guarda la venta (JSON ya codificado, o un dict) y devuelve su clave de idempotencia."""
+        clave = str(uuid.uuid4())
+        if isinstance(cuerpo, bytes):
+            data = cuerpo
+        else:
+            data = json.dumps(cuerpo, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ventas (clave, creada_en, payload) VALUES (?, ?, ?)",
+                (clave, time.time(), data),
+            )
+        self.depthChanged.emit(self.pendientes())
+        self.flush_now()
+        return clave
+
+    def pendientes(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM ventas WHERE estado = 'pendiente'").fetchone()[0])
+
+    def rechazadas(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT clave, creada_en, payload, ultimo_error FROM ventas WHERE estado = 'rechazada' ORDER BY id"
+            ).fetchall()
+        return [{"clave": c, "creada_en": t, "payload": json.loads(p), "error": e} for c, t, p, e in rows]
+
+    def reenviar(self, clave: Optional[str] = None) -> int:
+        """
+        Vuelve a dejar pendientes las ventas rechazadas (una por clave, o todas) y
+        las envía; la clave de idempotencia se conserva. Devuelve cuántas se reencolaron.
+        """
+        with self._lock:
+            if clave is None:
+                cur = self._conn.execute(
+                    "UPDATE ventas SET estado = 'pendiente', proximo_intento = 0 WHERE estado = 'rechazada'")
+            else:
+                cur = self._conn.execute(
+                    "UPDATE ventas SET estado = 'pendiente', proximo_intento = 0 "
+                    "WHERE estado = 'rechazada' AND clave = ?", (clave,))
+            n = cur.rowcount
+        if n:
+            self.depthChanged.emit(self.pendientes())
+            self.flush_now()
+        return n
+
+    def exportar_rechazadas(self, path: str) -> int:
+        """Guarda las ventas rechazadas (clave, fecha, motivo y venta) en un JSON; devuelve cuántas."""
+        rechazadas = self.rechazadas()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rechazadas, f, ensure_ascii=False, indent=2)
+        return len(rechazadas)
+
+    @QtCore.Slot()
+    def flush_now(self):
+        if self._cerrada:
+            return
+        if self._flushing:
+            self._again = True
+            return
+        self._timer.stop()
+        self._flushing = True
+        self.busy.emit(True)
+        get_executor().submit("ventas.outbox", self._enviar_lote,
+                              on_ok=self._on_lote, on_err=self._on_lote_error, owner=self)
+
+    def reintentar_ya(self):
+        """Anula el backoff pendiente (p. ej. al volver la conexión) y envía."""
+        with self._lock:
+            self._conn.execute("UPDATE ventas SET proximo_intento = 0 WHERE estado = 'pendiente'")
+        self.flush_now()
+
+    def close(self):
+        """Cierra la base; un lote en vuelo deja de enviar y lo que falte queda pendiente."""
+        self._timer.stop()
+        with self._lock:
+            if self._cerrada:
+                return
+            self._cerrada = True
+            self._conn.close()
+
+    # ---------------- Flusher (hilo del pool) ----------------
+
+    def _delay(self, intentos: int) -> float:
+        # Exponencial con jitter "igual": nunca 0, así no se martilla al servidor
+        d = min(self.max_delay, self.base_delay * (2 ** min(intentos, 16)))
+        return d * random.uniform(0.5, 1.0)
+
+    def _enviar_lote(self) -> dict:
+        now = time.time()
+        with self._lock:
+            if self._cerrada:
+                return _LOTE_VACIO
+            rows = self._conn.execute(
+                "SELECT id, clave, payload, intentos, proximo_intento FROM ventas "
+                "WHERE estado = 'pendiente' ORDER BY id LIMIT ?",
+                (_LOTE,),
+            ).fetchall()
+        enviadas: List[Tuple[str, Any]] = []
+        rechazadas: List[Tuple[str, str]] = []
+        demorada: Optional[Tuple[str, str]] = None
+        sesion: Optional[str] = None
+        bloqueada = False
+        for vid, clave, payload, intentos, proximo in rows:
+            if proximo > now:
+                # Se respeta el orden de las ventas: todas esperan a la que está en backoff
+                bloqueada = True
+                break
+            # Filas de versiones anteriores guardaban el payload como TEXT
+            cuerpo = payload if isinstance(payload, bytes) else str(payload).encode("utf-8")
+            res = self._client.post_body("/ventas", cuerpo, headers={"Idempotency-Key": clave})
+            kind, msg = _clasificar(res)
+            with self._lock:
+                if self._cerrada:
+                    # Se cerró durante el envío: sigue pendiente y la clave evita el duplicado
+                    return _LOTE_VACIO
+                if kind == "ok":
+                    self._conn.execute("DELETE FROM ventas WHERE id = ?", (vid,))
+                    enviadas.append((clave, res))
+                elif kind == "rechazada":
+                    self._conn.execute(
+                        "UPDATE ventas SET estado = 'rechazada', intentos = ?, ultimo_error = ? WHERE id = ?",
+                        (intentos + 1, msg, vid),
+                    )
+                    rechazadas.append((clave, msg))
+                elif kind == "sesion":
+                    # Sigue pendiente y en orden, sin backoff: se reintenta con el próximo flush
+                    self._conn.execute(
+                        "UPDATE ventas SET intentos = ?, ultimo_error = ? WHERE id = ?",
+                        (intentos + 1, msg, vid),
+                    )
+                    sesion = msg
+                    bloqueada = True
+                else:
+                    self._conn.execute(
+                        "UPDATE ventas SET intentos = ?, proximo_intento = ?, ultimo_error = ? WHERE id = ?",
+                        (intentos + 1, time.time() + self._delay(intentos), msg, vid),
+                    )
+                    if DEBUG:
+                        print(f"[VentasOutbox] {clave}: reintento #{intentos + 1} ({msg})")
+                    demorada = (clave, msg)
+                    bloqueada = True
+            if bloqueada:
+                break
+        with self._lock:
+            if self._cerrada:
+                return _LOTE_VACIO
+            pendientes = self._conn.execute("SELECT COUNT(*) FROM ventas WHERE estado = 'pendiente'").fetchone()[0]
+            # La primera en la cola es la que marca cuándo se vuelve a intentar
+            head = self._conn.execute(
+                "SELECT proximo_intento FROM ventas WHERE estado = 'pendiente' ORDER BY id LIMIT 1"
+            ).fetchone()
+        proxima = head[0] if head else None
+        return {
+            "enviadas": enviadas,
+            "rechazadas": rechazadas,
+            "demorada": demorada,
+            "sesion": sesion,
+            "pendientes": int(pendientes),
+            "proxima": proxima,
+            "lote_lleno": len(rows) == _LOTE and not bloqueada,
+        }
+
+    # ---------------- Resultado (hilo de la GUI) ----------------
+
+    def _on_lote(self, res: dict):
+        self._flushing = False
+        if self._cerrada:
+            self.busy.emit(False)
+            return
+        for clave, resp in res["enviadas"]:
+            self.ventaEnviada.emit(clave, resp)
+        for clave, msg in res["rechazadas"]:
+            self.ventaRechazada.emit(clave, msg)
+        if res["demorada"]:
+            self.ventaDemorada.emit(*res["demorada"])
+        if res["sesion"]:
+            self.sesionVencida.emit(res["sesion"])
+        self.depthChanged.emit(res["pendientes"])
+        if self._again or res["lote_lleno"]:
+            # También tras un 401: la venta que llegó durante el lote se envía con el token actual
+            self._again = False
+            self.flush_now()
+            return
+        self.busy.emit(False)
+        if res["sesion"]:
+            # Sin token válido no tiene sentido reintentar por timer
+            return
+        if res["pendientes"] and res["proxima"] is not None:
+            wait = max(1.0, float(res["proxima"]) - time.time())
+            self._timer.start(int(min(wait, self.max_delay) * 1000))
+
+    def _on_lote_error(self, err: str):
+        self._flushing = False
+        self.busy.emit(False)
+        if DEBUG:
+            print(f"[VentasOutbox] ERROR en el flusher: {err}")
+        self._again = False
+        self._timer.start(int(self.base_delay * 1000))
+
+
+_outbox: Optional[VentasOutbox] = None
+
+# Resultado de un lote cortado por close()
+_LOTE_VACIO = {"enviadas": [], "rechazadas": [], "demorada": None, "sesion": None,
+               "pendientes": 0, "proxima": None, "lote_lleno": False}
+
+
+def get_ventas_outbox() -> VentasOutbox:
+    """Outbox única de la app (se crea en el hilo de la GUI al primer uso)."""
+    global _outbox
+    if _outbox is None:
+        _outbox = VentasOutbox(parent=QtCore.QCoreApplication.instance())
+    return _outbox
+
+
+def cerrar_ventas_outbox():
+    """Cierra la outbox al salir, solo si se llegó a abrir."""
+    if _outbox is not None:
+        _outbox.close()
@@ -3,8 +3,10 @@ from typing import Optional, Tuple, List
 from PySide6 import QtCore, QtGui, QtWidgets
 import os
 
-from app.funciones.admin import exportar_csv, aplicar_filtro_movimientos, validar_nombre_categoria
+from app.funciones.admin import ROL_MONTO, exportar_csv, validar_nombre_categoria
+from app.funciones.dinero import formatear
 from app.servicios.api import ApiClient
+from app.servicios.api_async import AsyncApiClient
 from app.servicios.categorias_service import CategoriasService
 from app.servicios.usuarios_service import UsuariosService
 
@@ -248,9 +250,8 @@ class AdminView(QtWidgets.QWidget):
         self.btn_limpiar_ventas.clicked.connect(self._limpiar_filtros_ventas)
         self.txt_buscar_ventas.textChanged.connect(self._aplicar_filtro_texto_ventas)
 
-        # --------- Thread/Worker y flag de ocupación ---------
-        self._ventas_thread: Optional[QtCore.QThread] = None
-        self._ventas_worker: Optional[QtCore.QObject] = None
+        # --------- Cliente asíncrono y flag de ocupación ---------
+        self._ventas_api = AsyncApiClient(parent=self)
         self._ventas_busy: bool = False
 
         self.tabs.addTab(w, "Ventas")
@@ -269,11 +270,10 @@ class AdminView(QtWidgets.QWidget):
         self.proxy_ventas.setFilterFixedString((text or "").strip())
 
     # --- Ventas: formatos ---
-    def _fmt_money(self, v: int) -> str:
-        try:
-            return f"{int(v):,}".replace(",", ".")
-        except Exception:
-            return str(v)
+    def _item_monto(self, v: int) -> QtGui.QStandardItem:
+        it = QtGui.QStandardItem(formatear(v, simbolo=False))
+        it.setData(v, ROL_MONTO)
+        return it
 
     def _fmt_hora_hhmmss(self, seconds: int) -> str:
         try:
@@ -294,55 +294,25 @@ class AdminView(QtWidgets.QWidget):
         end = self.dt_hasta.date().toString("yyyy-MM-dd")
         self.lbl_ventas_status.setText("Cargando ventas…")
 
-        class _VentasWorker(QtCore.QObject):
-            finished = QtCore.Signal(list, str)  # (items, err)
-
-            def __init__(self, client: ApiClient, start_date: str | None, end_date: str | None):
-                super().__init__()
-                self.client = client
-                self.start_date = start_date
-                self.end_date = end_date
-
-            @QtCore.Slot()
-            def run(self):
-                try:
-                    path = "/ListadoVentas"
-                    params = []
-                    if self.start_date:
-                        params.append(f"start_date={self.start_date}")
-                    if self.end_date:
-                        params.append(f"end_date={self.end_date}")
-                    if params:
-                        path = f"{path}?{'&'.join(params)}"
-
-                    res = self.client.get_json(path)
-                    if isinstance(res, dict) and isinstance(res.get("Ventas"), list):
-                        self.finished.emit(res["Ventas"], "")
-                    else:
-                        self.finished.emit([], "Formato inesperado de respuesta.")
-                except Exception as e:
-                    self.finished.emit([], str(e))
-
-        # Crea hilo y worker nuevos para cada búsqueda
-        self._ventas_thread = QtCore.QThread(self)
-        self._ventas_worker = _VentasWorker(ApiClient(), start, end)
-        self._ventas_worker.moveToThread(self._ventas_thread)
-
-        # Conexiones
-        self._ventas_thread.started.connect(self._ventas_worker.run)
-        self._ventas_worker.finished.connect(self._on_ventas_loaded)
-        self._ventas_worker.finished.connect(self._ventas_thread.quit)
-        self._ventas_worker.finished.connect(self._ventas_worker.deleteLater)
-        self._ventas_thread.finished.connect(self._ventas_thread.deleteLater)
-        self._ventas_thread.finished.connect(self._ventas_clear_refs)
-
-        self._ventas_thread.start()
-
-    @QtCore.Slot()
-    def _ventas_clear_refs(self):
-        self._ventas_thread = None
-        self._ventas_worker = None
-        self._ventas_busy = False
+        path = "/ListadoVentas"
+        params = []
+        if start:
+            params.append(f"start_date={start}")
+        if end:
+            params.append(f"end_date={end}")
+        if params:
+            path = f"{path}?{'&'.join(params)}"
+
+        # Petición asíncrona sobre el event loop (sin hilo por búsqueda)
+        self._ventas_api.get_json(path).then(self._on_ventas_reply)
+
+    def _on_ventas_reply(self, res: object):
+        if isinstance(res, dict) and isinstance(res.get("Ventas"), list):
+            self._on_ventas_loaded(res["Ventas"], "")
+        elif isinstance(res, dict) and res.get("error"):
+            self._on_ventas_loaded([], str(res.get("detail") or f"HTTP {res.get('status', '')}"))
+        else:
+            self._on_ventas_loaded([], "Formato inesperado de respuesta.")
 
     @QtCore.Slot(list, str)
     def _on_ventas_loaded(self, rows: List[dict], err: str):
@@ -377,10 +347,10 @@ class AdminView(QtWidgets.QWidget):
                 QtGui.QStandardItem(vendedor),
                 QtGui.QStandardItem(producto),
                 QtGui.QStandardItem(str(cantidad)),
-                QtGui.QStandardItem(self._fmt_money(precio)),
-                QtGui.QStandardItem(self._fmt_money(precio_iva)),
-                QtGui.QStandardItem(self._fmt_money(subtotal)),
-                QtGui.QStandardItem(self._fmt_money(total_venta)),
+                self._item_monto(precio),
+                self._item_monto(precio_iva),
+                self._item_monto(subtotal),
+                self._item_monto(total_venta),
             ]
             for idx in (6, 7, 8, 9, 10):
                 items[idx].setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
@@ -416,7 +386,12 @@ class AdminView(QtWidgets.QWidget):
 
         self.mov_model = QtGui.QStandardItemModel(self)
         self.mov_model.setHorizontalHeaderLabels(["Fecha", "Usuario", "Producto", "Cambio", "Razón"])
-        self.mov_table.setModel(self.mov_model)
+        # Filtro por producto en el proxy (un solo invalidate, sin setRowHidden por fila)
+        self.mov_proxy = QtCore.QSortFilterProxyModel(self)
+        self.mov_proxy.setSourceModel(self.mov_model)
+        self.mov_proxy.setFilterKeyColumn(2)
+        self.mov_proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.mov_table.setModel(self.mov_proxy)
 
         self.mov_filter.textChanged.connect(self._mov_apply_filter)
 
@@ -429,7 +404,7 @@ class AdminView(QtWidgets.QWidget):
         return it
 
     def _mov_apply_filter(self):
-        aplicar_filtro_movimientos(self.mov_table, self.mov_model, self.mov_filter.text())
+        self.mov_proxy.setFilterFixedString(self.mov_filter.text().strip())
 
     # USUARIOS
 
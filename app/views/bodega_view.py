@@ -2,10 +2,10 @@ from __future__ import annotations
 from typing import Optional, Tuple, List, Callable, Any
 from PySide6 import QtCore, QtGui, QtWidgets
 
+from app.servicios.executor import get_executor
+from app.servicios.product_store import get_product_store
+from app.views.catalogo_model import BUSQUEDA_DEBOUNCE_MS, CatalogoModel, CatalogoFilterProxy
 from app.funciones.bodega import (
-    aplicar_filtro,
-    colorizar_stock,
-    listar_productos,
     crear_producto,
     actualizar_producto,
     listar_categorias,
@@ -14,27 +14,7 @@ from app.funciones.bodega import (
 )
 
 
-class _FuncWorker(QtCore.QObject):
-    finished = QtCore.Signal(object, str)  # (resultado, error)
-
-    def __init__(self, fn: Callable, *args, **kwargs):
-        super().__init__()
-        self._fn = fn
-        self._args = args
-        self._kwargs = kwargs
-
-    @QtCore.Slot()
-    def run(self):
-        try:
-            result = self._fn(*self._args, **self._kwargs)
-            self.finished.emit(result, "")
-        except Exception as e:
-            self.finished.emit(None, str(e))
-
-
 class BodegaView(QtWidgets.QWidget):
-    _async_result = QtCore.Signal(object, str, object, object)
-
     def __init__(self, parent: Optional[QtWidgets.QWidget] = None):
         super().__init__(parent)
         self._build_ui()
@@ -42,55 +22,30 @@ class BodegaView(QtWidgets.QWidget):
         self._wire_events()
         self._busy_cursor = False
 
-        self._active_threads: List[QtCore.QThread] = []
-
         self._pending_cat_update: Optional[tuple[int, str]] = None  # (producto_id, nombre_categoria)
 
-        self._async_result.connect(self._handle_async_result)
+        # Catálogo compartido con Caja: una sola descarga y stock consistente entre pestañas
+        self._store = get_product_store()
+        self._store.busy.connect(self._set_busy)
+        self._store.error.connect(self._on_api_error)
+        self._store.productosCargados.connect(self._on_productos)
+        self._store.productoActualizado.connect(self._on_producto_actualizado)
+        self._store.productosCambiados.connect(self._on_productos_cambiados)
 
-        self._load_products()
+        if self._store.is_loaded():
+            self._on_productos(self._store.productos())
+        else:
+            self.status_label.setText("Cargando productos…")
+            self._store.cargar()
 
 
     def _run_async(self, fn: Callable, args: tuple = (), on_ok: Optional[Callable[[Any], None]] = None,
                    on_err: Optional[Callable[[str], None]] = None):
-        thread = QtCore.QThread()
-        worker = _FuncWorker(fn, *args)
-        worker.moveToThread(thread)
-
-        thread._worker = worker  
-        self._active_threads.append(thread)
-
-        def _done(res: object, err: str):
-            self._async_result.emit(res, err, on_ok, on_err)
-            thread.quit()
-
-        def _cleanup():
-            try:
-                self._active_threads.remove(thread)
-            except ValueError:
-                pass
-            if hasattr(thread, "_worker"):
-                delattr(thread, "_worker")
-
-        thread.started.connect(worker.run)
-        worker.finished.connect(_done)
-        worker.finished.connect(worker.deleteLater)
-        thread.finished.connect(_cleanup)
-        thread.finished.connect(thread.deleteLater)
-        thread.start()
-
-    @QtCore.Slot(object, str, object, object)
-    def _handle_async_result(self, res: object, err: str,
-                             on_ok: Optional[Callable[[Any], None]],
-                             on_err: Optional[Callable[[str], None]]):
-        if err:
-            if on_err:
-                on_err(err)
-            else:
-                self._on_api_error(err)
-        else:
-            if on_ok:
-                on_ok(res)
+        # Executor compartido: callbacks en el hilo de la GUI, sin crear un QThread por acción
+        get_executor().submit(
+            f"bodega.{getattr(fn, '__name__', 'tarea')}", fn, *args,
+            on_ok=on_ok, on_err=on_err or self._on_api_error, owner=self,
+        )
 
     def _build_ui(self):
         root = QtWidgets.QVBoxLayout(self)
@@ -141,9 +96,14 @@ class BodegaView(QtWidgets.QWidget):
         root.addWidget(self.status_label)
 
         # Modelo
-        self.model = QtGui.QStandardItemModel(self)
-        self.model.setHorizontalHeaderLabels(["Código", "Producto", "Categoría", "Precio", "Stock"])
-        self.table.setModel(self.model)
+        self.model = CatalogoModel(
+            ["Código", "Producto", "Categoría", "Precio", "Stock"], self,
+            colorear_stock=True, categoria_vacia="Sin categoría",
+        )
+        # Búsqueda y categoría se resuelven en el proxy (sin setRowHidden por fila)
+        self.proxy = CatalogoFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.table.setModel(self.proxy)
         self.table.setColumnWidth(1, 250)
 
         # Atajos
@@ -152,28 +112,32 @@ class BodegaView(QtWidgets.QWidget):
         self.table.doubleClicked.connect(self._editar_api)
 
     def _load_empty_state(self):
-        if self.model.rowCount() > 0:
-            self.model.removeRows(0, self.model.rowCount())
+        self.model.cargar([])
+        self._cargar_combo_categorias([])
+        self.status_label.setText("")
+
+    def _cargar_combo_categorias(self, categorias: List[str]):
+        # Conserva la categoría elegida si sigue existiendo
+        actual = self.category.currentText()
         self.category.blockSignals(True)
         self.category.clear()
         self.category.addItem("Todas")
+        self.category.addItems(categorias)
+        idx = self.category.findText(actual)
+        self.category.setCurrentIndex(idx if idx >= 0 else 0)
         self.category.blockSignals(False)
-        self.status_label.setText("")
 
-    def _append_row(self, row: Tuple[str, str, str, int, int]):
-        items = []
-        for i, val in enumerate(row):
-            it = QtGui.QStandardItem(str(val))
-            if i in (3, 4):
-                it.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
-            items.append(it)
-        self.model.appendRow(items)
-        cat = row[2]
+    def _agregar_categoria(self, cat: str):
         if self.category.findText(cat) < 0:
             self.category.addItem(cat)
 
     def _wire_events(self):
-        self.search_edit.textChanged.connect(self._filter_rows)
+        # Igual que Caja: se filtra tras una pausa al tipear, no en cada tecla
+        self._search_timer = QtCore.QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(BUSQUEDA_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._filter_rows)
+        self.search_edit.textChanged.connect(lambda _texto: self._search_timer.start())
         self.category.currentIndexChanged.connect(self._filter_rows)
         self.btn_recargar.clicked.connect(self._load_products)
         self.btn_nuevo.clicked.connect(self._nuevo_api)
@@ -182,33 +146,40 @@ class BodegaView(QtWidgets.QWidget):
         self.btn_eliminar.clicked.connect(self._eliminar_api) 
 
     def _filter_rows(self):
-        aplicar_filtro(self.table, self.model, self.search_edit.text(), self.category.currentText())
+        self._search_timer.stop()  # un cambio de categoría aplica también el texto pendiente
+        self.proxy.set_filtro(self.search_edit.text(), self.category.currentText())
+
+    def _fila_seleccionada(self) -> Optional[int]:
+        idx = self.table.currentIndex()
+        return self.proxy.mapToSource(idx).row() if idx.isValid() else None
 
     # -------------------------------- Acciones (vía funciones) --------------------------------
     def _load_products(self):
+        # Las mutaciones también pasan por aquí: el store recarga y avisa a Caja y Bodega
         self.status_label.setText("Cargando productos…")
-        self._set_busy(True)
-
-        def ok(items: List[dict]):
-            self._set_busy(False)
-            self._load_empty_state()
-            for p in items or []:
-                code = str(p.get("id", ""))
-                name = str(p.get("nombre", ""))
-                cat = str(p.get("categoria") or "Sin categoría")
-                price = int(p.get("precio") or 0)
-                stock = int(p.get("stock") or 0)
-                self._append_row((code, name, cat, price, stock))
-            colorizar_stock(self.model)
-            self._filter_rows()
-            n = self.model.rowCount()
-            self.status_label.setText(f"{n} producto(s) cargado(s)" if n else "Sin productos desde la API")
-
-        def err(msg: str):
-            self._set_busy(False)
-            self._on_api_error(msg)
-
-        self._run_async(listar_productos, on_ok=ok, on_err=err)
+        self._store.recargar()
+
+    def _on_productos(self, items: List[dict]):
+        self.model.cargar(items)
+        self._cargar_combo_categorias(self.model.categorias())
+        self._filter_rows()
+        self._actualizar_estado()
+
+    def _actualizar_estado(self):
+        n = self.model.rowCount()
+        suffix = " (copia local, actualizando…)" if self._store.es_local() else ""
+        self.status_label.setText(f"{n} producto(s) cargado(s){suffix}" if n else "Sin productos desde la API")
+
+    def _on_producto_actualizado(self, p: dict):
+        self.model.upsert(p)
+        # El proxy filtra solo las filas insertadas/cambiadas (dynamicSortFilter)
+        self._agregar_categoria(p["categoria"] or "Sin categoría")
+
+    def _on_productos_cambiados(self, cambiados: List[dict], eliminados: List[str]):
+        self.model.aplicar_cambios(cambiados, eliminados)
+        for p in cambiados:
+            self._agregar_categoria(p["categoria"] or "Sin categoría")
+        self._actualizar_estado()
 
     def _set_busy(self, busy: bool):
         if busy and not getattr(self, "_busy_cursor", False):
@@ -220,7 +191,9 @@ class BodegaView(QtWidgets.QWidget):
 
     def _on_api_error(self, msg: str):
         self.status_label.setText(f"Error de API: {msg}")
-        QtWidgets.QMessageBox.warning(self, "API", f"Ocurrió un error:\n{msg}")
+        # Los errores del store compartido llegan a todas las vistas: solo avisa la visible
+        if self.isVisible():
+            QtWidgets.QMessageBox.warning(self, "API", f"Ocurrió un error:\n{msg}")
 
     # Utilidad: cargar categorías y luego ejecutar una acción que las necesita
     def _cargar_categorias_y(self, then: Callable[[List[dict]], None]):
@@ -265,11 +238,8 @@ class BodegaView(QtWidgets.QWidget):
         if not idx.isValid():
             QtWidgets.QMessageBox.information(self, "Editar", "Selecciona un producto de la tabla.")
             return
-        r = idx.row()
-        pid = int(self.model.item(r, 0).text() or "0")
-        name = self.model.item(r, 1).text()
-        precio_actual = int(self.model.item(r, 3).text() or "0")
-        cantidad_actual = int(self.model.item(r, 4).text() or "0")
+        codigo, name, _cat, precio_actual, cantidad_actual = self.model.valores(self._fila_seleccionada())
+        pid = int(codigo or "0")
 
         dlg = EditarProductoApiDialog(self, pid, name, precio_actual, cantidad_actual)
         if dlg.exec() == QtWidgets.QDialog.Accepted:
@@ -294,8 +264,7 @@ class BodegaView(QtWidgets.QWidget):
         if not idx.isValid():
             QtWidgets.QMessageBox.information(self, "Cambiar categoría", "Selecciona un producto de la tabla.")
             return
-        r = idx.row()
-        producto_id = int(self.model.item(r, 0).text() or "0")
+        producto_id = int(self.model.producto_id(self._fila_seleccionada()) or "0")
 
         def _abrir_dialogo(categorias: List[dict]):
             dlg = SeleccionarCategoriaDialog(self, categorias)
@@ -311,16 +280,9 @@ class BodegaView(QtWidgets.QWidget):
 
                 def ok(message: str):
                     self._set_busy(False)
-                    # Actualiza visualmente la categoría sin esperar recarga completa
+                    # Actualiza la categoría en el store (Caja y Bodega) sin recarga completa
                     if self._pending_cat_update and self._pending_cat_update[0] == producto_id:
-                        nuevo_nombre = self._pending_cat_update[1]
-                        for rr in range(self.model.rowCount()):
-                            pid = int(self.model.item(rr, 0).text() or "0")
-                            if pid == producto_id:
-                                self.model.item(rr, 2).setText(nuevo_nombre)
-                                if self.category.findText(nuevo_nombre) < 0:
-                                    self.category.addItem(nuevo_nombre)
-                                break
+                        self._store.actualizar_local(producto_id, categoria=self._pending_cat_update[1])
                         self._pending_cat_update = None
                     QtWidgets.QMessageBox.information(self, "Producto", message or "Categoría actualizada.")
                     self.status_label.setText("Listo.")
@@ -341,9 +303,8 @@ class BodegaView(QtWidgets.QWidget):
         if not idx.isValid():
             QtWidgets.QMessageBox.information(self, "Eliminar", "Selecciona un producto de la tabla.")
             return
-        r = idx.row()
         try:
-            producto_id = int(self.model.item(r, 0).text() or "0")
+            producto_id = int(self.model.producto_id(self._fila_seleccionada()) or "0")
         except Exception:
             QtWidgets.QMessageBox.warning(self, "Eliminar", "ID de producto inválido.")
             return
@@ -1,24 +1,27 @@
 from __future__ import annotations
-import json
-from typing import Optional, List, Tuple, Dict
+from typing import Optional, List, Tuple
 from PySide6 import QtCore, QtGui, QtWidgets
-from app.servicios.api import ApiClient
-from app.servicios.productos_service import ProductosService
-from app.funciones.caja import generate_sale_json
+from app.servicios.executor import get_executor
+from app.servicios.product_store import get_product_store
+from app.servicios.ventas_outbox import get_ventas_outbox
+from app.servicios.carrito_journal import get_carrito_journal
+from app.views.catalogo_model import BUSQUEDA_DEBOUNCE_MS, CatalogoModel, ResultadosProxy
+from app.views.carrito_model import CarritoModel
+from app.funciones.carrito import Carrito
+from app.funciones.busqueda import IndiceBusqueda
+from app.funciones.escaner import DetectorEscaner
+from app.funciones.caja import armar_venta, codificar_venta
+from app.funciones.dinero import formatear
 
 
-USER_ROLE_PRODUCT = QtCore.Qt.UserRole + 1  
-
 class CashPaymentDialog(QtWidgets.QDialog):
-    def __init__(self, parent: Optional[QtWidgets.QWidget], model_carrito: QtGui.QStandardItemModel, parse_money: callable, fmt_money: callable):
+    def __init__(self, parent: Optional[QtWidgets.QWidget], carrito: Carrito):
         super().__init__(parent)
         self.setWindowTitle("Cobro en efectivo")
         self.setModal(True)
         self.setMinimumWidth(520)
 
-        self._model = model_carrito
-        self._parse_money = parse_money
-        self._fmt_money = fmt_money
+        self._carrito = carrito
 
         lay = QtWidgets.QVBoxLayout(self)
         lay.setContentsMargins(12, 12, 12, 12)
@@ -35,8 +38,8 @@ class CashPaymentDialog(QtWidgets.QDialog):
         lay.addWidget(self.tbl)
 
         # Total
-        self.total = self._calc_total()
-        self.lbl_total = QtWidgets.QLabel(f"Total: {self._fmt_money(self.total)}")
+        self.total = carrito.total
+        self.lbl_total = QtWidgets.QLabel(f"Total: {formatear(self.total)}")
         font = self.lbl_total.font()
         font.setBold(True)
         self.lbl_total.setFont(font)
@@ -69,13 +72,11 @@ class CashPaymentDialog(QtWidgets.QDialog):
         self._recalc_change()
 
     def _load_cart_rows(self):
-        rows = self._model.rowCount()
-        self.tbl.setRowCount(rows)
-        r = 0
-        for r in range(rows):
-            prod = self._model.item(r, 1).text() if self._model.item(r, 1) else ""
-            cant = self._model.item(r, 4).text() if self._model.item(r, 4) else "0"
-            sub  = self._model.item(r, 5).text() if self._model.item(r, 5) else "$0"
+        self.tbl.setRowCount(len(self._carrito))
+        for r, linea in enumerate(self._carrito):
+            prod = linea.nombre
+            cant = str(linea.cantidad)
+            sub = formatear(linea.subtotal)
 
             it_prod = QtWidgets.QTableWidgetItem(prod)
             it_cant = QtWidgets.QTableWidgetItem(cant)
@@ -90,20 +91,13 @@ class CashPaymentDialog(QtWidgets.QDialog):
 
         self.tbl.resizeColumnsToContents()
 
-    def _calc_total(self) -> int:
-        total = 0
-        for r in range(self._model.rowCount()):
-            subtotal = self._parse_money(self._model.item(r, 5).text())
-            total += subtotal
-        return total
-
     def _recalc_change(self):
         try:
             efectivo = int(self.efectivo_edit.text() or "0")
         except Exception:
             efectivo = 0
         vuelto = max(0, efectivo - self.total)
-        self.lbl_vuelto.setText(f"Vuelto: {self._fmt_money(vuelto)}")
+        self.lbl_vuelto.setText(f"Vuelto: {formatear(vuelto)}")
 
         # Deshabilita "Terminar" si no alcanza el efectivo
         btn_ok = self.findChild(QtWidgets.QDialogButtonBox).button(QtWidgets.QDialogButtonBox.Ok)
@@ -127,21 +121,61 @@ class CajaView(QtWidgets.QWidget):
     - Catálogo de productos cargado desde la API (/muestra_productos)
     - Carrito: permite agregar con cantidad, actualizar, eliminar y muestra el total
     """
-    def __init__(self, parent: Optional[QtWidgets.QWidget] = None):
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None, usuario_actual: str = "Desconocido"):
         super().__init__(parent)
+        self.usuario_actual = usuario_actual
         self._busy_cursor = False
-        self._products_by_id: Dict[str, dict] = {}
-        self._last_sale_json: str | None = None
+        self._ultima_venta: bytes | None = None
+        self._sale_in_progress = False
+        self._ventas_en_envio: set[str] = set()  # claves de las ventas de esta caja aún sin respuesta
+        self._stock_desactualizado = False  # hubo ventas confirmadas en el lote en curso
+        self._outbox_pendientes = 0
+        self._outbox_sesion = ""                # último 401 de la outbox (vacío si la sesión anda)
+        self._outbox_rechazadas: List[dict] = []
+
+        # Búsqueda: índice de prefijos (se construye en el executor) + debounce del teclado
+        self._indice = IndiceBusqueda()
+        self._indice_gen = 0
+        self._indice_listo = False
+        self._cambios_pendientes: List[Tuple[List[dict], List[str]]] = []  # llegados mientras se construye
+        self._search_timer = QtCore.QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(BUSQUEDA_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._aplicar_busqueda)
+
+        # Carrito abierto: journal en disco para recuperarlo si la app se cae a mitad de venta
+        self._journal = get_carrito_journal()
+
         self._build_ui()
         self._wire_events()
-
-        # Servicio de productos compartido
-        self._svc = ProductosService(ApiClient(), self)
-        self._svc.busy.connect(self._set_busy)
-        self._svc.error.connect(self._on_api_error)
-        self._svc.productosCargados.connect(self._on_api_ok)
-
-        self._load_products()
+        if len(self.model_carrito.carrito):
+            self._on_total_cambiado(self.model_carrito.carrito.total)
+            self.lbl_status_venta.setText("Se recuperó el carrito de la sesión anterior.")
+
+        # Catálogo compartido con Bodega (una sola descarga para toda la app)
+        self._store = get_product_store()
+        self._store.busy.connect(self._set_busy)
+        self._store.error.connect(self._on_api_error)
+        self._store.productosCargados.connect(self._on_api_ok)
+        self._store.productoActualizado.connect(self._on_producto_actualizado)
+        self._store.productosCambiados.connect(self._on_productos_cambiados)
+
+        # Ventas: outbox durable (se envían en segundo plano con clave de idempotencia)
+        self._outbox = get_ventas_outbox()
+        self._outbox.depthChanged.connect(self._on_outbox_depth)
+        self._outbox.ventaEnviada.connect(self._on_venta_enviada)
+        self._outbox.ventaRechazada.connect(self._on_venta_rechazada)
+        self._outbox.ventaDemorada.connect(self._on_venta_demorada)
+        self._outbox.busy.connect(self._on_outbox_busy)
+        self._outbox.sesionVencida.connect(self._on_outbox_sesion_vencida)
+        self._outbox_rechazadas = self._outbox.rechazadas()
+        self._on_outbox_depth(self._outbox.pendientes())
+
+        if self._store.is_loaded():
+            self._on_api_ok(self._store.productos())
+        else:
+            self.lbl_status_catalogo.setText("Cargando productos…")
+            self._store.cargar()
 
     # ------------------- UI -------------------
     def _build_ui(self):
@@ -155,7 +189,7 @@ class CajaView(QtWidgets.QWidget):
 
         top = QtWidgets.QHBoxLayout()
         self.search = QtWidgets.QLineEdit()
-        self.search.setPlaceholderText("Buscar producto por nombre o categoría…")
+        self.search.setPlaceholderText("Buscar producto por nombre, código o categoría…")
         self.btn_recargar = QtWidgets.QPushButton("Recargar")
         top.addWidget(self.search, 1)
         top.addWidget(self.btn_recargar)
@@ -233,24 +267,51 @@ class CajaView(QtWidgets.QWidget):
         bottom.addWidget(self.btn_cobrar)
         right.addLayout(bottom)
 
+        # Estado del envío de ventas (no modal: la caja sigue atendiendo)
+        envio = QtWidgets.QHBoxLayout()
+        self.progress_venta = QtWidgets.QProgressBar()
+        self.progress_venta.setRange(0, 0)  # indeterminada
+        self.progress_venta.setTextVisible(False)
+        self.progress_venta.setMaximumSize(120, 10)
+        self.progress_venta.hide()
+        envio.addWidget(self.progress_venta)
+        self.lbl_status_venta = QtWidgets.QLabel("")
+        envio.addWidget(self.lbl_status_venta, 1)
+        right.addLayout(envio)
+
+        # Estado de la outbox de ventas
+        outbox = QtWidgets.QHBoxLayout()
+        self.lbl_status_outbox = QtWidgets.QLabel("")
+        outbox.addWidget(self.lbl_status_outbox, 1)
+        # Ventas rechazadas por la API: siguen guardadas hasta reenviarlas o exportarlas
+        self.btn_rechazadas = QtWidgets.QPushButton("Rechazadas…")
+        menu = QtWidgets.QMenu(self.btn_rechazadas)
+        menu.addAction("Reenviar todas", self._reenviar_rechazadas)
+        menu.addAction("Exportar a JSON…", self._exportar_rechazadas)
+        self.btn_rechazadas.setMenu(menu)
+        self.btn_rechazadas.hide()
+        outbox.addWidget(self.btn_rechazadas)
+        right.addLayout(outbox)
+
         # Ensamble
         root.addLayout(left, 7)
         root.addLayout(right, 5)
 
         # Modelos: catálogo
-        self.model_catalogo = QtGui.QStandardItemModel(self)
-        self.model_catalogo.setHorizontalHeaderLabels(["ID", "Producto", "Categoría", "Precio", "Stock"])
-        self.proxy_catalogo = QtCore.QSortFilterProxyModel(self)
+        # No se muestran productos sin stock
+        self.model_catalogo = CatalogoModel(
+            ["ID", "Producto", "Categoría", "Precio", "Stock"], self,
+            fmt_precio=formatear, incluir=lambda p: p["stock"] > 0,
+        )
+        self.proxy_catalogo = ResultadosProxy(self)
         self.proxy_catalogo.setSourceModel(self.model_catalogo)
-        self.proxy_catalogo.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
-        self.proxy_catalogo.setFilterKeyColumn(-1)  # todas
         self.tbl_catalogo.setModel(self.proxy_catalogo)
         self.tbl_catalogo.setColumnWidth(1, 260)
 
         # Modelo: carrito
         # Nuevo esquema: ["ID", "Producto", "Precio", "Precio con IVA", "Cant.", "Subtotal"]
-        self.model_carrito = QtGui.QStandardItemModel(self)
-        self.model_carrito.setHorizontalHeaderLabels(["ID", "Producto", "Precio", "Precio con IVA", "Cant.", "Subtotal"])
+        self.model_carrito = CarritoModel(self, carrito=self._journal.recuperar(), journal=self._journal)
+        self.model_carrito.totalCambiado.connect(self._on_total_cambiado)
         self.tbl_carrito.setModel(self.model_carrito)
         # Oculta columna ID en el carrito
         self.tbl_carrito.setColumnHidden(0, True)
@@ -274,13 +335,68 @@ class CajaView(QtWidgets.QWidget):
         self.btn_vaciar.clicked.connect(self._vaciar_carrito)
         self.btn_cobrar.clicked.connect(self._on_cobrar)
 
+        # Lector de códigos: agrega directo al carrito, sin pasar por la búsqueda
+        self._escaner = DetectorEscaner(self)
+        self._escaner.instalar(self.search, self.tbl_catalogo, self.tbl_carrito)
+        self._escaner.codigoLeido.connect(self._on_codigo_escaneado)
+
     # ------------------- Catálogo (API) -------------------
     def _on_filter(self, text: str):
-        self.proxy_catalogo.setFilterFixedString(text.strip())
+        # Se busca cuando el cajero deja de teclear, no en cada tecla
+        self._search_timer.start()
+
+    def _aplicar_busqueda(self):
+        self._search_timer.stop()
+        texto = self.search.text()
+        if texto.strip() and not self._indice_listo:
+            return  # se reintenta al terminar de construir el índice
+        ids = self._indice.buscar(texto)
+        self.proxy_catalogo.set_resultados(ids)
+        if ids:
+            # El mejor resultado queda seleccionado: Enter lo agrega al carrito
+            self.tbl_catalogo.setCurrentIndex(self.proxy_catalogo.index(0, 0))
+
+    def _reconstruir_indice(self, items: List[dict]):
+        self._indice_gen += 1
+        self._indice_listo = False
+        self._cambios_pendientes = []
+        gen = self._indice_gen
+
+        def construir(productos: List[dict]) -> IndiceBusqueda:
+            indice = IndiceBusqueda()
+            indice.reconstruir(productos)
+            return indice
+
+        def ok(indice: IndiceBusqueda):
+            if gen != self._indice_gen:
+                return  # llegó otro catálogo mientras tanto
+            for cambiados, eliminados in self._cambios_pendientes:
+                self._indexar_cambios(indice, cambiados, eliminados)
+            self._cambios_pendientes = []
+            self._indice = indice
+            self._indice_listo = True
+            self._aplicar_busqueda()
+
+        get_executor().submit("caja.indice_busqueda", construir, list(items), on_ok=ok, owner=self)
+
+    @staticmethod
+    def _indexar_cambios(indice: IndiceBusqueda, cambiados: List[dict], eliminados: List[str]):
+        for pid in eliminados:
+            indice.eliminar(pid)
+        for p in cambiados:
+            indice.agregar(p)
+
+    def _on_cambios_indice(self, cambiados: List[dict], eliminados: List[str]):
+        if not self._indice_listo:
+            self._cambios_pendientes.append(([dict(p) for p in cambiados], list(eliminados)))
+            return
+        self._indexar_cambios(self._indice, cambiados, eliminados)
+        if self.proxy_catalogo.filtrado():
+            self._search_timer.start()
 
     def _load_products(self):
         self.lbl_status_catalogo.setText("Cargando productos…")
-        self._svc.cargar_productos()
+        self._store.recargar()
 
     def _set_busy(self, busy: bool):
         if busy and not getattr(self, "_busy_cursor", False):
@@ -292,63 +408,52 @@ class CajaView(QtWidgets.QWidget):
 
     def _on_api_error(self, msg: str):
         self.lbl_status_catalogo.setText(f"Error al cargar productos: {msg}")
-        QtWidgets.QMessageBox.warning(self, "API", f"No se pudieron cargar productos:\n{msg}")
+        # El store es compartido: solo la vista visible muestra el diálogo
+        if self.isVisible():
+            QtWidgets.QMessageBox.warning(self, "API", f"No se pudieron cargar productos:\n{msg}")
 
     def _on_api_ok(self, items: List[dict]):
-        self.model_catalogo.removeRows(0, self.model_catalogo.rowCount())
-        self._products_by_id.clear()
-
-        for p in items:
-            pid = str(p.get("id", ""))
-            name = str(p.get("nombre", ""))
-            cat = str(p.get("categoria") or "")
-            price = int(p.get("precio") or 0)
-            stock = int(p.get("stock") or 0)
-
-            # no mostrar productos sin stock
-            if stock <= 0:
-                continue
-
-            row_items: list[QtGui.QStandardItem] = []
-            for i, val in enumerate((pid, name, cat, self._fmt_money(price), stock)):
-                it = QtGui.QStandardItem(str(val))
-                if i == 0:
-                    it.setData(
-                        {
-                            "id": pid,
-                            "nombre": name,
-                            "categoria": cat,
-                            "precio": price,
-                            "stock": stock,
-                        },
-                        USER_ROLE_PRODUCT,
-                    )
-                if i in (3, 4):
-                    it.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
-                row_items.append(it)
-
-            self.model_catalogo.appendRow(row_items)
-            # solo guardamos los que sí se muestran
-            self._products_by_id[pid] = {
-                "id": pid,
-                "nombre": name,
-                "categoria": cat,
-                "precio": price,
-                "stock": stock,
-            }
+        self.model_catalogo.cargar(items)
+        self._reconstruir_indice(items)
+        self._actualizar_estado_catalogo()
 
+    def _actualizar_estado_catalogo(self):
         n = self.model_catalogo.rowCount()
-        self.lbl_status_catalogo.setText(f"{n} producto(s) disponible(s)")
+        suffix = " (copia local, actualizando…)" if self._store.es_local() else ""
+        self.lbl_status_catalogo.setText(f"{n} producto(s) disponible(s){suffix}")
+
+    def _on_producto_actualizado(self, p: dict):
+        # Refresca solo la fila afectada (o la quita/agrega según el stock)
+        self.model_catalogo.upsert(p)
+        self._on_cambios_indice([p], [])
+        self._actualizar_estado_catalogo()
+
+    def _on_productos_cambiados(self, cambiados: List[dict], eliminados: List[str]):
+        # Sincronización incremental: solo se tocan las filas que cambiaron
+        self.model_catalogo.aplicar_cambios(cambiados, eliminados)
+        self._on_cambios_indice(cambiados, eliminados)
+        self._actualizar_estado_catalogo()
 
 
     # ------------------- Carrito -------------------
+    def _on_codigo_escaneado(self, codigo: str):
+        # La ráfaga no debe terminar en una búsqueda pendiente
+        self._search_timer.stop()
+        product = self._store.get_por_codigo(codigo)
+        if not product:
+            QtWidgets.QApplication.beep()
+            self.lbl_status_catalogo.setText(f"Código no encontrado: {codigo}")
+            return
+        self._agregar_producto_al_carrito(product, int(self.spn_qty.value()))
+        self.lbl_status_catalogo.setText(f"Escaneado: {product['nombre']}")
+
     def _agregar_seleccionado(self):
         idx = self.tbl_catalogo.currentIndex()
         if not idx.isValid():
             return
         src_idx = self.proxy_catalogo.mapToSource(idx)
-        pid_item = self.model_catalogo.item(src_idx.row(), 0)
-        product = pid_item.data(USER_ROLE_PRODUCT) or {}
+        pid = self.model_catalogo.producto_id(src_idx.row())
+        product = self._store.get(pid) if pid else None
         if not product:
             return
 
@@ -357,12 +462,8 @@ class CajaView(QtWidgets.QWidget):
 
     def _agregar_producto_al_carrito(self, product: dict, qty: int):
         pid = str(product.get("id"))
-        name = str(product.get("nombre", ""))
-        price = int(product.get("precio") or 0)
         stock = int(product.get("stock") or 0)
-
-        current_row = self._find_cart_row(pid)
-        current_qty = int(self.model_carrito.item(current_row, 4).text()) if current_row is not None else 0
+        current_qty = self.model_carrito.carrito.cantidad(pid)
 
         if qty <= 0:
             QtWidgets.QMessageBox.warning(self, "Cantidad inválida", "La cantidad debe ser mayor a 0.")
@@ -375,88 +476,58 @@ class CajaView(QtWidgets.QWidget):
             )
             return
 
-        # Calcular Precio con IVA (1.19) y subtotal en base a ese precio
-        price_with_tax = int(round(price * 1.19))
-        if current_row is None:
-            # Crear nueva fila en carrito
-            items: list[QtGui.QStandardItem] = []
-            for i, val in enumerate((pid, name, self._fmt_money(price), self._fmt_money(price_with_tax), qty, self._fmt_money(price_with_tax * qty))):
-                it = QtGui.QStandardItem(str(val))
-                if i in (2, 3, 4, 5):
-                    it.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
-                items.append(it)
-            self.model_carrito.appendRow(items)
-        else:
-            # Actualizar cantidad y subtotal (usar Precio con IVA en columna 3)
-            new_qty = current_qty + qty
-            self.model_carrito.item(current_row, 4).setText(str(new_qty))
-            price_with_tax_existing = self._parse_money(self.model_carrito.item(current_row, 3).text())
-            self.model_carrito.item(current_row, 5).setText(self._fmt_money(price_with_tax_existing * new_qty))
-
-        self._actualizar_total()
+        # Precio con IVA y subtotal los calcula el carrito (enteros)
+        self.model_carrito.agregar(product, qty)
 
     def _ajustar_cantidad(self, delta: int):
         idx = self.tbl_carrito.currentIndex()
         if not idx.isValid():
             return
         r = idx.row()
-        price_with_tax = self._parse_money(self.model_carrito.item(r, 3).text())
-        qty = int(self.model_carrito.item(r, 4).text())
-        new_qty = qty + delta
-
-        # Validaciones
-        if new_qty <= 0:
-            # elimina si llega a 0 o menos
-            self.model_carrito.removeRow(r)
-            self._actualizar_total()
-            return
+        linea = self.model_carrito.linea(r)
+        new_qty = linea.cantidad + delta
 
-        stock = int((self._products_by_id.get(self.model_carrito.item(r, 0).text()) or {}).get("stock") or 0)
-        if new_qty > stock:
-            QtWidgets.QMessageBox.warning(self, "Stock insuficiente", f"Stock disponible: {stock}")
-            return
+        # Validaciones (llegar a 0 o menos elimina la línea)
+        if new_qty > 0:
+            stock = int((self._store.get(linea.id) or {}).get("stock") or 0)
+            if new_qty > stock:
+                QtWidgets.QMessageBox.warning(self, "Stock insuficiente", f"Stock disponible: {stock}")
+                return
 
-        self.model_carrito.item(r, 4).setText(str(new_qty))
-        self.model_carrito.item(r, 5).setText(self._fmt_money(price_with_tax * new_qty))
-        self._actualizar_total()
+        self.model_carrito.fijar_cantidad(r, new_qty)
 
     def _eliminar_item_carrito(self):
         idx = self.tbl_carrito.currentIndex()
         if not idx.isValid():
             return
-        self.model_carrito.removeRow(idx.row())
-        self._actualizar_total()
+        self.model_carrito.quitar(idx.row())
 
     def _vaciar_carrito(self):
         if self.model_carrito.rowCount() == 0:
             return
         if QtWidgets.QMessageBox.question(self, "Vaciar carrito", "¿Eliminar todos los ítems del carrito?") == QtWidgets.QMessageBox.Yes:
-            self.model_carrito.removeRows(0, self.model_carrito.rowCount())
-            self._actualizar_total()
-
-    def _find_cart_row(self, pid: str) -> Optional[int]:
-        for r in range(self.model_carrito.rowCount()):
-            if self.model_carrito.item(r, 0).text() == pid:
-                return r
-        return None
-
-    def _actualizar_total(self):
-        total = 0
-        for r in range(self.model_carrito.rowCount()):
-            subtotal = self._parse_money(self.model_carrito.item(r, 5).text())
-            total += subtotal
-        self.lbl_total.setText(f"Total: {self._fmt_money(total)}")
+            self.model_carrito.vaciar()
+
+    def _on_total_cambiado(self, total: int):
+        self.lbl_total.setText(f"Total: {formatear(total)}")
 
     def _on_cobrar(self):
         if self.model_carrito.rowCount() == 0:
             QtWidgets.QMessageBox.information(self, "Cobrar", "El carrito está vacío.")
             return
 
-        # Evitar dobles disparos
-        if getattr(self, "_sale_in_progress", False):
+        # Evitar dobles disparos (doble clic, Enter repetido mientras se abre el diálogo)
+        if self._sale_in_progress:
             return
         self._sale_in_progress = True
+        self.btn_cobrar.setEnabled(False)
+        try:
+            self._cobrar()
+        finally:
+            self._sale_in_progress = False
+            self.btn_cobrar.setEnabled(True)
 
+    def _cobrar(self):
         # Preguntar método de pago
         mb = QtWidgets.QMessageBox(self)
         mb.setWindowTitle("Cobrar")
@@ -469,76 +540,126 @@ class CajaView(QtWidgets.QWidget):
         clicked = mb.clickedButton()
         # Cancelado
         if clicked is None or mb.buttonRole(clicked) == QtWidgets.QMessageBox.RejectRole:
-            self._sale_in_progress = False
             return
 
-        usuario = getattr(self, "usuario_actual", "Desconocido")
+        usuario = self.usuario_actual
 
         if clicked == btn_tarjeta:
             # Generar una sola vez
             self._generar_json_venta(usuario, metodo_pago="Tarjeta")
-            self._sale_in_progress = False
             return
 
         if clicked == btn_efectivo:
             # Mostrar diálogo de efectivo y, si acepta, generar una sola vez
-            dlg = CashPaymentDialog(self, self.model_carrito, self._parse_money, self._fmt_money)
+            dlg = CashPaymentDialog(self, self.model_carrito.carrito)
             if dlg.exec() == QtWidgets.QDialog.Accepted:
                 self._generar_json_venta(usuario, metodo_pago="Efectivo")
             # si cancela, no pasa nada
-            self._sale_in_progress = False
             return
 
     def _generar_json_venta(self, usuario: str, metodo_pago: str):
-        import json
-        json_str = generate_sale_json(self.model_carrito, usuario, metodo_pago=metodo_pago)
-        self._last_sale_json = json_str
-        print("[CajaView] Venta (JSON):", json_str)
+        # Se arma y serializa una sola vez: los mismos bytes van al registro y a la outbox
+        cuerpo = codificar_venta(armar_venta(self.model_carrito.carrito))
+        self._ultima_venta = cuerpo
+        print(f"[CajaView] Venta ({usuario}, {metodo_pago}):", cuerpo.decode("utf-8"))
 
         if metodo_pago == "Tarjeta":
-            total_text = self.lbl_total.text().replace("Total: ", "")
             QtWidgets.QMessageBox.information(
                 self, "Cobrar",
                 f"JSON de venta generado internamente.\n"
                 f"Usuario: {usuario}\n"
                 f"Método: {metodo_pago}\n"
                 f"Elementos: {self.model_carrito.rowCount()}\n"
-                f"Total: {total_text}"
+                f"Total: {formatear(self.model_carrito.carrito.total)}"
             )
             return
 
-        try:
-            payload_full = json.loads(json_str)
-        except Exception:
-            QtWidgets.QMessageBox.warning(self, "Efectivo", "No se pudo preparar el payload de la venta.")
+        # Queda guardada en disco al instante; el envío lo hace la outbox en segundo plano
+        clave = self._outbox.encolar(cuerpo)
+        self._journal.cobrada(clave)
+        self._ventas_en_envio.add(clave)
+        self.lbl_status_venta.setText("Enviando venta…")
+        self.progress_venta.show()
+        self.model_carrito.vaciar()
+
+    # ------------------- Envío de ventas (outbox) -------------------
+    def _on_outbox_depth(self, n: int):
+        self._outbox_pendientes = n
+        self._actualizar_estado_outbox()
+
+    def _actualizar_estado_outbox(self):
+        # Indicador no modal: la outbox trabaja en segundo plano y no debe cortar el escaneo
+        partes = []
+        if self._outbox_pendientes:
+            partes.append(f"{self._outbox_pendientes} venta(s) pendiente(s) de envío")
+        if self._outbox_sesion:
+            partes.append("sesión vencida: vuelve a iniciar sesión para enviarlas")
+        if self._outbox_rechazadas:
+            partes.append(f"{len(self._outbox_rechazadas)} venta(s) rechazada(s) por la API")
+        self.lbl_status_outbox.setText(" · ".join(partes))
+        self.lbl_status_outbox.setToolTip("\n".join(
+            f"{r['clave']}: {r['error']}" for r in self._outbox_rechazadas
+        ))
+        self.btn_rechazadas.setVisible(bool(self._outbox_rechazadas))
+
+    def _reenviar_rechazadas(self):
+        n = self._outbox.reenviar()
+        self._outbox_rechazadas = self._outbox.rechazadas()
+        self._actualizar_estado_outbox()
+        if n:
+            self.lbl_status_venta.setText(f"{n} venta(s) rechazada(s) vuelven a la cola de envío.")
+
+    def _exportar_rechazadas(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Exportar ventas rechazadas", "ventas_rechazadas.json", "JSON (*.json)"
+        )
+        if not path:
             return
-
-        payload_api = {
-            "fecha": payload_full.get("fecha"),
-            "hora":  payload_full.get("hora"),
-            "total": payload_full.get("total"),
-            "items": payload_full.get("items") or [],
-        }
-
-        client = ApiClient()
-        resp = client.post_json("/ventas", payload_api)
-
-        if isinstance(resp, dict) and resp.get("error"):
-            msg = resp.get("detail")
-            if isinstance(msg, list) and msg and isinstance(msg[0], dict):
-                msg = msg[0].get("msg") or str(msg)
-            msg = msg or f"HTTP {resp.get('status', '')}"
-            QtWidgets.QMessageBox.warning(self, "Efectivo", f"No se pudo registrar la venta:\n{msg}")
+        try:
+            n = self._outbox.exportar_rechazadas(path)
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "Exportar", f"No se pudo guardar el archivo:\n{e}")
             return
-
-        QtWidgets.QMessageBox.information(self, "Efectivo", "Venta registrada correctamente.")
-        self._vaciar_carrito()
-
-    # ------------------- Utilidades -------------------
-    def _fmt_money(self, v: int) -> str:
-        return f"${v:,}".replace(",", ".")
-
-    def _parse_money(self, s: str) -> int:
-        s = (s or "").strip()
-        s = s.replace("$", "").replace(".", "").replace(" ", "")
-        return int(s or "0")
+        self.lbl_status_venta.setText(f"{n} venta(s) rechazada(s) exportada(s) a {path}.")
+
+    def _on_outbox_sesion_vencida(self, msg: str):
+        self._outbox_sesion = msg
+        self._actualizar_estado_outbox()
+
+    def _on_outbox_busy(self, busy: bool):
+        # Sin lote en vuelo no hay nada que esperar: lo pendiente lo muestra lbl_status_outbox
+        self.progress_venta.setVisible(busy and bool(self._ventas_en_envio))
+        if not busy and self._ventas_en_envio:
+            self._ventas_en_envio.clear()
+            self.lbl_status_venta.setText("Venta guardada; se enviará en cuanto responda la API.")
+        if not busy and self._stock_desactualizado:
+            # Una sola sincronización del catálogo por tanda enviada, no una por venta
+            self._stock_desactualizado = False
+            self._store.recargar()
+
+    def _on_venta_enviada(self, clave: str, resp: object):
+        if clave in self._ventas_en_envio:
+            self._ventas_en_envio.discard(clave)
+            venta_id = resp.get("venta_id") if isinstance(resp, dict) else None
+            self.lbl_status_venta.setText(f"Venta N° {venta_id} registrada." if venta_id else "Venta registrada.")
+            self.progress_venta.setVisible(bool(self._ventas_en_envio))
+        # El stock cambió en el servidor: Caja y Bodega se actualizan al terminar la tanda
+        self._stock_desactualizado = True
+        if self._outbox_sesion:
+            self._outbox_sesion = ""
+            self._actualizar_estado_outbox()
+
+    def _on_venta_demorada(self, clave: str, msg: str):
+        if clave in self._ventas_en_envio:
+            self._ventas_en_envio.discard(clave)
+            self.lbl_status_venta.setText(f"Venta guardada sin conexión ({msg}); se reintentará sola.")
+            self.progress_venta.setVisible(bool(self._ventas_en_envio))
+
+    def _on_venta_rechazada(self, clave: str, msg: str):
+        if clave in self._ventas_en_envio:
+            self._ventas_en_envio.discard(clave)
+            self.lbl_status_venta.setText(f"Venta rechazada por la API: {msg}")
+            self.progress_venta.setVisible(bool(self._ventas_en_envio))
+        # Sin diálogo modal: el detalle (clave y motivo) queda en el tooltip de lbl_status_outbox
+        self._outbox_rechazadas = self._outbox.rechazadas()
+        self._actualizar_estado_outbox()
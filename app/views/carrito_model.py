@@ -0,0 +1,111 @@
+from __future__ import annotations
+from typing import Optional
+from PySide6 import QtCore
+from app.funciones.carrito import Carrito, LineaCarrito
+from app.funciones.dinero import formatear
+from app.servicios.carrito_journal import CarritoJournal
+
+COL_ID, COL_PRODUCTO, COL_PRECIO, COL_PRECIO_IVA, COL_CANTIDAD, COL_SUBTOTAL = range(6)
+_HEADERS = ["ID", "Producto", "Precio", "Precio con IVA", "Cant.", "Subtotal"]
+
+
+class CarritoModel(QtCore.QAbstractTableModel):
+    """
+    Modelo de tabla sobre un Carrito: los montos se guardan como int y solo se
+    formatean en data(). Cada operación avisa solo la fila tocada.
+    totalCambiado(int) se emite con el total ya calculado por el carrito.
+    Con `journal`, cada operación se anota después de aplicarla (ver CarritoJournal).
+    """
+    totalCambiado = QtCore.Signal(int)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None, carrito: Optional[Carrito] = None,
+                 journal: Optional[CarritoJournal] = None):
+        super().__init__(parent)
+        self.carrito = carrito if carrito is not None else Carrito()
+        self._journal = journal
+        self._align = int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+
+    # ---------------- Operaciones ----------------
+
+    def agregar(self, producto: dict, cantidad: int) -> int:
+        fila = self.carrito.fila(str(producto.get("id")))
+        if fila is None:
+            n = len(self.carrito)
+            self.beginInsertRows(QtCore.QModelIndex(), n, n)
+            fila = self.carrito.agregar(producto, cantidad)
+            self.endInsertRows()
+        else:
+            self.carrito.agregar(producto, cantidad)
+            self._fila_cambiada(fila)
+        if self._journal is not None:
+            self._journal.agregar(producto, cantidad)
+        self.totalCambiado.emit(self.carrito.total)
+        return fila
+
+    def fijar_cantidad(self, fila: int, cantidad: int):
+        if cantidad <= 0:
+            self.quitar(fila)
+            return
+        self.carrito.fijar_cantidad(fila, cantidad)
+        self._fila_cambiada(fila)
+        if self._journal is not None:
+            self._journal.fijar_cantidad(self.carrito.linea(fila).id, cantidad)
+        self.totalCambiado.emit(self.carrito.total)
+
+    def quitar(self, fila: int):
+        self.beginRemoveRows(QtCore.QModelIndex(), fila, fila)
+        linea = self.carrito.quitar(fila)
+        self.endRemoveRows()
+        if self._journal is not None:
+            self._journal.quitar(linea.id)
+        self.totalCambiado.emit(self.carrito.total)
+
+    def vaciar(self):
+        self.beginResetModel()
+        self.carrito.vaciar()
+        self.endResetModel()
+        if self._journal is not None:
+            self._journal.vaciar()
+        self.totalCambiado.emit(0)
+
+    def linea(self, fila: int) -> LineaCarrito:
+        return self.carrito.linea(fila)
+
+    def _fila_cambiada(self, fila: int):
+        self.dataChanged.emit(self.index(fila, COL_CANTIDAD), self.index(fila, COL_SUBTOTAL))
+
+    # ---------------- QAbstractTableModel ----------------
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.carrito)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(_HEADERS)
+
+    def headerData(self, section: int, orientation, role: int = QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal and 0 <= section < len(_HEADERS):
+            return _HEADERS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        c = index.column()
+        if role == QtCore.Qt.TextAlignmentRole:
+            return self._align if c >= COL_PRECIO else None
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        linea = self.carrito.linea(index.row())
+        if c == COL_ID:
+            return linea.id
+        if c == COL_PRODUCTO:
+            return linea.nombre
+        if c == COL_PRECIO:
+            return formatear(linea.precio)
+        if c == COL_PRECIO_IVA:
+            return formatear(linea.precio_con_iva)
+        if c == COL_CANTIDAD:
+            return str(linea.cantidad)
+        if c == COL_SUBTOTAL:
+            return formatear(linea.subtotal)
+        return None
@@ -0,0 +1,414 @@
+from __future__ import annotations
+import re
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from PySide6 import QtCore, QtGui
+from app.funciones.busqueda import plegar
+
+COL_ID, COL_NOMBRE, COL_CATEGORIA, COL_PRECIO, COL_STOCK = range(5)
+
+# Umbrales de color de la columna Stock (antes colorizar_stock en funciones/bodega.py)
+STOCK_BAJO = 5
+
+# Espera tras la última tecla antes de filtrar/buscar (ms); la usan Caja y Bodega
+BUSQUEDA_DEBOUNCE_MS = 90
+
+# Clave de búsqueda por fila: "<índice categoría>\x1e<id>\x1f<nombre>\x1f<categoría>" plegada (sin tildes)
+_SEP_CAT = "\x1e"
+_SEP = "\x1f"
+
+
+class CatalogoModel(QtCore.QAbstractTableModel):
+    """
+    Modelo de tabla del catálogo con almacenamiento por columnas:
+    - ids y nombres en listas, precio y stock en array('q'),
+      categoría como índice (array('I')) a una tabla de nombres únicos.
+    - El texto se arma en data() solo para las celdas visibles; no hay un
+      QStandardItem por celda.
+    - cargar() reemplaza todo con un único beginResetModel/endResetModel;
+      upsert()/eliminar() tocan solo la fila afectada (índice id -> fila).
+    `incluir(p)` decide qué productos se muestran (p. ej. solo con stock en Caja);
+    `fmt_precio` da el texto de la columna Precio.
+    ROL_BUSQUEDA entrega una clave precalculada por fila para CatalogoFilterProxy.
+    """
+    ROL_ID = QtCore.Qt.UserRole + 1
+    ROL_BUSQUEDA = QtCore.Qt.UserRole + 2
+
+    def __init__(self, headers: Iterable[str], parent: Optional[QtCore.QObject] = None,
+                 fmt_precio: Optional[Callable[[int], str]] = None,
+                 incluir: Optional[Callable[[dict], bool]] = None,
+                 colorear_stock: bool = False,
+                 categoria_vacia: str = ""):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._fmt_precio = fmt_precio or str
+        self._incluir = incluir
+        self._colorear = colorear_stock
+        self._categoria_vacia = categoria_vacia
+
+        self._ids: List[str] = []
+        self._nombres: List[str] = []
+        self._cat = array("I")
+        self._precio = array("q")
+        self._stock = array("q")
+        self._claves: List[str] = []
+        self._fila: Dict[str, int] = {}
+        self._categorias: List[str] = []
+        self._cat_idx: Dict[str, int] = {}
+
+        self._align = int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        self._bg_agotado = QtGui.QBrush(QtGui.QColor("#e74c3c"))
+        self._fg_agotado = QtGui.QBrush(QtGui.QColor("#ffffff"))
+        self._bg_bajo = QtGui.QBrush(QtGui.QColor("#f39c12"))
+        self._fg_bajo = QtGui.QBrush(QtGui.QColor("#000000"))
+
+    # ---------------- Internos ----------------
+
+    def _categoria(self, nombre: str) -> int:
+        nombre = nombre or self._categoria_vacia
+        idx = self._cat_idx.get(nombre)
+        if idx is None:
+            idx = len(self._categorias)
+            self._categorias.append(nombre)
+            self._cat_idx[nombre] = idx
+        return idx
+
+    def _visible(self, p: dict) -> bool:
+        return self._incluir is None or bool(self._incluir(p))
+
+    def _clave(self, pid: str, nombre: str, cat: int) -> str:
+        return plegar(f"{cat}{_SEP_CAT}{pid}{_SEP}{nombre}{_SEP}{self._categorias[cat]}")
+
+    def _reindex(self, desde: int = 0):
+        for r in range(desde, len(self._ids)):
+            self._fila[self._ids[r]] = r
+
+    # ---------------- Carga / cambios ----------------
+
+    def cargar(self, productos: Iterable[dict]):
+        """Reemplaza el contenido (productos normalizados del ProductStore)."""
+        ids: List[str] = []
+        nombres: List[str] = []
+        cat = array("I")
+        precio = array("q")
+        stock = array("q")
+        claves: List[str] = []
+        self._categorias = []
+        self._cat_idx = {}
+        for p in productos:
+            if not self._visible(p):
+                continue
+            c = self._categoria(p["categoria"])
+            ids.append(p["id"])
+            nombres.append(p["nombre"])
+            cat.append(c)
+            precio.append(p["precio"])
+            stock.append(p["stock"])
+            claves.append(self._clave(p["id"], p["nombre"], c))
+        self.beginResetModel()
+        self._ids, self._nombres, self._cat, self._precio, self._stock = ids, nombres, cat, precio, stock
+        self._claves = claves
+        self._fila = {pid: r for r, pid in enumerate(ids)}
+        self.endResetModel()
+
+    def upsert(self, p: dict):
+        """Actualiza, agrega (al final) o quita la fila del producto según `incluir`."""
+        r = self._fila.get(p["id"])
+        if not self._visible(p):
+            if r is not None:
+                self.eliminar(p["id"])
+            return
+        c = self._categoria(p["categoria"])
+        if r is None:
+            r = len(self._ids)
+            self.beginInsertRows(QtCore.QModelIndex(), r, r)
+            self._ids.append(p["id"])
+            self._nombres.append(p["nombre"])
+            self._cat.append(c)
+            self._precio.append(p["precio"])
+            self._stock.append(p["stock"])
+            self._claves.append(self._clave(p["id"], p["nombre"], c))
+            self._fila[p["id"]] = r
+            self.endInsertRows()
+            return
+        self._nombres[r] = p["nombre"]
+        self._cat[r] = c
+        self._precio[r] = p["precio"]
+        self._stock[r] = p["stock"]
+        self._claves[r] = self._clave(p["id"], p["nombre"], c)
+        self.dataChanged.emit(self.index(r, COL_NOMBRE), self.index(r, COL_STOCK))
+
+    def eliminar(self, producto_id: Any) -> bool:
+        r = self._fila.pop(str(producto_id), None)
+        if r is None:
+            return False
+        self.beginRemoveRows(QtCore.QModelIndex(), r, r)
+        for col in (self._ids, self._nombres, self._cat, self._precio, self._stock, self._claves):
+            del col[r]
+        self._reindex(r)
+        self.endRemoveRows()
+        return True
+
+    def aplicar_cambios(self, cambiados: Iterable[dict], eliminados: Iterable[str]):
+        """Aplica una sincronización incremental del store."""
+        for pid in eliminados:
+            self.eliminar(pid)
+        for p in cambiados:
+            self.upsert(p)
+
+    # ---------------- Lectura ----------------
+
+    def fila(self, producto_id: Any) -> Optional[int]:
+        return self._fila.get(str(producto_id))
+
+    def producto_id(self, row: int) -> Optional[str]:
+        return self._ids[row] if 0 <= row < len(self._ids) else None
+
+    def valores(self, row: int) -> Tuple[str, str, str, int, int]:
+        """(id, nombre, categoría, precio, stock) de la fila."""
+        return (self._ids[row], self._nombres[row], self._categorias[self._cat[row]],
+                self._precio[row], self._stock[row])
+
+    def categorias(self) -> List[str]:
+        """Categorías vistas desde la última carga (en orden de aparición)."""
+        return list(self._categorias)
+
+    def indice_categoria(self, nombre: str) -> Optional[int]:
+        return self._cat_idx.get(nombre)
+
+    # ---------------- QAbstractTableModel ----------------
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section: int, orientation, role: int = QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal and 0 <= section < len(self._headers):
+            return self._headers[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r, c = index.row(), index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if c == COL_ID:
+                return self._ids[r]
+            if c == COL_NOMBRE:
+                return self._nombres[r]
+            if c == COL_CATEGORIA:
+                return self._categorias[self._cat[r]]
+            if c == COL_PRECIO:
+                return self._fmt_precio(self._precio[r])
+            if c == COL_STOCK:
+                return str(self._stock[r])
+            return None
+        if role == QtCore.Qt.TextAlignmentRole:
+            return self._align if c in (COL_PRECIO, COL_STOCK) else None
+        if role == self.ROL_BUSQUEDA:
+            return self._claves[r]
+        if role == self.ROL_ID:
+            return self._ids[r]
+        if self._colorear and c == COL_STOCK:
+            stock = self._stock[r]
+            if role == QtCore.Qt.BackgroundRole:
+                return self._bg_agotado if stock <= 0 else self._bg_bajo if stock <= STOCK_BAJO else None
+            if role == QtCore.Qt.ForegroundRole:
+                return self._fg_agotado if stock <= 0 else self._fg_bajo if stock <= STOCK_BAJO else None
+        return None
+
+
+class CatalogoFilterProxy(QtCore.QSortFilterProxyModel):
+    """
+    Filtro por texto y categoría sobre CatalogoModel: ambos criterios se compilan
+    en una sola QRegularExpression contra ROL_BUSQUEDA, y el recorrido y el match
+    los hace QSortFilterProxyModel en C++.
+    Ojo: la clave de cada fila se lee con CatalogoModel.data(), así que cada cambio
+    de filtro sigue siendo una llamada Python por fila (barata: devuelve un string
+    precalculado). Por eso quien lo usa desde el teclado aplica un debounce
+    (BUSQUEDA_DEBOUNCE_MS); para búsquedas sobre catálogos grandes está el índice
+    de Caja (IndiceBusqueda + ResultadosProxy).
+    """
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._texto = ""
+        self._categoria: Optional[str] = None
+        self.setFilterRole(CatalogoModel.ROL_BUSQUEDA)
+        self.setFilterKeyColumn(0)
+
+    def setSourceModel(self, model: CatalogoModel):
+        old = self.sourceModel()
+        if old is not None:
+            old.modelReset.disconnect(self._actualizar)
+        super().setSourceModel(model)
+        # Los índices de categoría se recalculan en cada carga
+        model.modelReset.connect(self._actualizar)
+        self._actualizar()
+
+    def set_filtro(self, texto: str, categoria: Optional[str] = None):
+        """`categoria` None (o "Todas") no filtra por categoría."""
+        self._texto = plegar((texto or "").strip())
+        self._categoria = categoria if categoria and categoria != "Todas" else None
+        self._actualizar()
+
+    def _actualizar(self):
+        model = self.sourceModel()
+        if self._categoria is None:
+            cat = r"\d+"
+        else:
+            idx = model.indice_categoria(self._categoria) if model is not None else None
+            cat = str(idx) if idx is not None else "(?!)"  # categoría ya no existe: nada coincide
+        patron = f"^{cat}{_SEP_CAT}"
+        if self._texto:
+            patron += ".*" + re.escape(self._texto)
+        self.setFilterRegularExpression(
+            QtCore.QRegularExpression(patron, QtCore.QRegularExpression.DotMatchesEverythingOption)
+        )
+
+
+class ResultadosProxy(QtCore.QAbstractProxyModel):
+    """
+    Vista de CatalogoModel con un subconjunto ordenado de productos (por id),
+    p. ej. el resultado rankeado de IndiceBusqueda. set_resultados(None) muestra
+    todo el catálogo en su orden.
+    Solo se materializa la lista de ids: la vista pide data() de las filas visibles.
+    Los productos que desaparecen del modelo salen también de aquí; los nuevos
+    aparecen con la siguiente búsqueda.
+    """
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._ids: Optional[List[str]] = None
+        self._pos: Dict[str, int] = {}
+
+    # ---------------- Resultados ----------------
+
+    def set_resultados(self, ids: Optional[Iterable[str]]):
+        self.beginResetModel()
+        self._asignar(ids)
+        self.endResetModel()
+
+    def filtrado(self) -> bool:
+        return self._ids is not None
+
+    def _asignar(self, ids: Optional[Iterable[str]]):
+        model = self.sourceModel()
+        if ids is None or model is None:
+            self._ids, self._pos = None, {}
+            return
+        self._ids = [pid for pid in ids if model.fila(pid) is not None]
+        self._pos = {pid: r for r, pid in enumerate(self._ids)}
+
+    # ---------------- Señales del modelo fuente ----------------
+
+    def setSourceModel(self, model: CatalogoModel):
+        old = self.sourceModel()
+        if old is not None:
+            for sig, slot in self._conexiones(old):
+                sig.disconnect(slot)
+        self.beginResetModel()
+        super().setSourceModel(model)
+        self._asignar(self._ids)
+        self.endResetModel()
+        for sig, slot in self._conexiones(model):
+            sig.connect(slot)
+
+    def _conexiones(self, model: CatalogoModel):
+        return [
+            (model.modelAboutToBeReset, self.beginResetModel),
+            (model.modelReset, self._on_reset),
+            (model.rowsAboutToBeInserted, self._on_about_insert),
+            (model.rowsInserted, self._on_inserted),
+            (model.rowsAboutToBeRemoved, self._on_about_remove),
+            (model.rowsRemoved, self._on_removed),
+            (model.dataChanged, self._on_data_changed),
+        ]
+
+    def _on_reset(self):
+        self._asignar(self._ids)
+        self.endResetModel()
+
+    def _on_about_insert(self, parent, first: int, last: int):
+        if self._ids is None:
+            self.beginInsertRows(QtCore.QModelIndex(), first, last)
+
+    def _on_inserted(self, parent, first: int, last: int):
+        if self._ids is None:
+            self.endInsertRows()
+
+    def _on_about_remove(self, parent, first: int, last: int):
+        if self._ids is None:
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            return
+        model = self.sourceModel()
+        for r in range(last, first - 1, -1):
+            pos = self._pos.get(model.producto_id(r))
+            if pos is None:
+                continue
+            self.beginRemoveRows(QtCore.QModelIndex(), pos, pos)
+            del self._ids[pos]
+            self._pos = {pid: i for i, pid in enumerate(self._ids)}
+            self.endRemoveRows()
+
+    def _on_removed(self, parent, first: int, last: int):
+        if self._ids is None:
+            self.endRemoveRows()
+
+    def _on_data_changed(self, top_left: QtCore.QModelIndex, bottom_right: QtCore.QModelIndex, roles=()):
+        if self._ids is None:
+            self.dataChanged.emit(self.index(top_left.row(), top_left.column()),
+                                  self.index(bottom_right.row(), bottom_right.column()))
+            return
+        model = self.sourceModel()
+        for r in range(top_left.row(), bottom_right.row() + 1):
+            pos = self._pos.get(model.producto_id(r))
+            if pos is not None:
+                self.dataChanged.emit(self.index(pos, top_left.column()), self.index(pos, bottom_right.column()))
+
+    # ---------------- QAbstractProxyModel ----------------
+
+    def mapToSource(self, proxy_index: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        model = self.sourceModel()
+        if model is None or not proxy_index.isValid():
+            return QtCore.QModelIndex()
+        r = proxy_index.row() if self._ids is None else model.fila(self._ids[proxy_index.row()])
+        return model.index(r, proxy_index.column()) if r is not None else QtCore.QModelIndex()
+
+    def mapFromSource(self, source_index: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        if not source_index.isValid():
+            return QtCore.QModelIndex()
+        if self._ids is None:
+            return self.index(source_index.row(), source_index.column())
+        pos = self._pos.get(self.sourceModel().producto_id(source_index.row()))
+        return self.index(pos, source_index.column()) if pos is not None else QtCore.QModelIndex()
+
+    def index(self, row: int, column: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:
+        if parent.isValid() or not (0 <= row < self.rowCount()) or not (0 <= column < self.columnCount()):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:
+        return QtCore.QModelIndex()
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        model = self.sourceModel()
+        if parent.isValid() or model is None:
+            return 0
+        return model.rowCount() if self._ids is None else len(self._ids)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        model = self.sourceModel()
+        return 0 if parent.isValid() or model is None else model.columnCount()
+
+    def hasChildren(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:
+        return not parent.isValid() and self.rowCount() > 0
+
+    def headerData(self, section: int, orientation, role: int = QtCore.Qt.DisplayRole):
+        # Los encabezados no dependen de las filas (el default de Qt los mapea por la fila 0)
+        model = self.sourceModel()
+        if model is None or orientation != QtCore.Qt.Horizontal:
+            return None
+        return model.headerData(section, orientation, role)
@@ -6,6 +6,7 @@ import json
 from datetime import datetime
 
 from app.servicios.api import ApiClient
+from app.servicios.api_async import AsyncApiClient
 from app.servicios.api_monitor import ApiMonitor, LedIndicator
 from app.funciones.rol import normalize_role
 
@@ -34,6 +35,7 @@ class LoginWindow(QtWidgets.QMainWindow):
         self._nam = QtNetwork.QNetworkAccessManager(self)
         self._nam.authenticationRequired.connect(self._ignore_auth)
         self._pending_reply: Optional[QtNetwork.QNetworkReply] = None
+        self._api_async = AsyncApiClient(parent=self)
 
         # ---------- UI ----------
         central = QtWidgets.QWidget()
@@ -232,34 +234,37 @@ class LoginWindow(QtWidgets.QMainWindow):
             "fecha": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
         }
 
-        client = ApiClient()
+        # POST asíncrono: la ventana sigue respondiendo mientras vincula
+        self.link_btn.setEnabled(False)
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        self._api_async.post_json("/vincular", payload).then(self._on_link_reply)
+
+    def _on_link_reply(self, resp: Any):
         try:
-            QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-            resp = client.post_json("/vincular", payload)
-            if isinstance(resp, dict) and resp.get("error"):
-                msg = resp.get("detail") or f"HTTP {resp.get('status', '')}"
-                QtWidgets.QMessageBox.warning(self, "Vincular", f"Error al vincular:\n{msg}")
-                return
-
-            token = None
-            if isinstance(resp, dict):
-                token = resp.get("token_vinculacion")
-            if not token:
-                QtWidgets.QMessageBox.warning(self, "Vincular", "La API no entregó un token de vinculación.")
-                return
-
-            # Guardar token de vinculación en memoria (no persistente)
-            self.link_token = token
-            app = QtWidgets.QApplication.instance()
-            if app is not None:
-                app.setProperty("link_token", token)
+            QtWidgets.QApplication.restoreOverrideCursor()
+        except Exception:
+            pass
+        self.link_btn.setEnabled(True)
 
-            QtWidgets.QMessageBox.information(self, "Vincular", "Vinculación exitosa.\nToken almacenado (memoria).")
-        finally:
-            try:
-                QtWidgets.QApplication.restoreOverrideCursor()
-            except Exception:
-                pass
+        if isinstance(resp, dict) and resp.get("error"):
+            msg = resp.get("detail") or f"HTTP {resp.get('status', '')}"
+            QtWidgets.QMessageBox.warning(self, "Vincular", f"Error al vincular:\n{msg}")
+            return
+
+        token = None
+        if isinstance(resp, dict):
+            token = resp.get("token_vinculacion")
+        if not token:
+            QtWidgets.QMessageBox.warning(self, "Vincular", "La API no entregó un token de vinculación.")
+            return
+
+        # Guardar token de vinculación en memoria (no persistente)
+        self.link_token = token
+        app = QtWidgets.QApplication.instance()
+        if app is not None:
+            app.setProperty("link_token", token)
+
+        QtWidgets.QMessageBox.information(self, "Vincular", "Vinculación exitosa.\nToken almacenado (memoria).")
 
     def on_login_clicked(self):
         if self._pending_reply is not None:
@@ -3,14 +3,10 @@ import os
 from typing import Optional, Dict, Any
 from PySide6 import QtCore, QtGui, QtWidgets
 
-# Vistas
-from app.views.caja_view import CajaView
-from app.views.bodega_view import BodegaView
-from app.views.admin_view import AdminView
-
 # Monitor de API
 from app.servicios.api import ApiClient
 from app.servicios.api_monitor import ApiMonitor, LedIndicator
+from app.servicios.ventas_outbox import get_ventas_outbox
 
 from app.funciones.rol import normalize_role
 
@@ -38,17 +34,20 @@ class MainWindow(QtWidgets.QMainWindow):
         self.stacked = QtWidgets.QStackedWidget()
         self.setCentralWidget(self.stacked)
 
-        self.page_caja = CajaView(self)
-        self.page_bodega = BodegaView(self)
-        self.page_admin = AdminView(self)
+        # Las vistas se construyen (y cargan sus datos) recién al navegar a ellas, y
+        # nunca si el rol no tiene permiso: mientras tanto ocupa su lugar un widget vacío
+        self.page_caja: Optional[QtWidgets.QWidget] = None
+        self.page_bodega: Optional[QtWidgets.QWidget] = None
+        self.page_admin: Optional[QtWidgets.QWidget] = None
 
         self.sections = [
-            {"name": "Caja",           "perm": "caja",   "widget": self.page_caja},
-            {"name": "Bodega",         "perm": "bodega", "widget": self.page_bodega},
-            {"name": "Administración", "perm": "admin",  "widget": self.page_admin},
+            {"name": "Caja",           "perm": "caja",   "attr": "page_caja",   "factory": self._crear_caja},
+            {"name": "Bodega",         "perm": "bodega", "attr": "page_bodega", "factory": self._crear_bodega},
+            {"name": "Administración", "perm": "admin",  "attr": "page_admin",  "factory": self._crear_admin},
         ]
         for sec in self.sections:
-            self.stacked.addWidget(sec["widget"])
+            sec["widget"] = None
+            self.stacked.addWidget(QtWidgets.QWidget())
 
         # --- Navegación lateral (dock) ---
         self.nav = QtWidgets.QListWidget()
@@ -56,7 +55,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.nav.setObjectName("navList")  # <- para que el style.qss aplique el tema
         for sec in self.sections:
             self.nav.addItem(sec["name"])
-        self.nav.currentRowChanged.connect(self.stacked.setCurrentIndex)
+        self.nav.currentRowChanged.connect(self._mostrar_seccion)
 
         self.nav_dock = QtWidgets.QDockWidget("Navegación", self)
         self.nav_dock.setWidget(self.nav)
@@ -78,8 +77,53 @@ class MainWindow(QtWidgets.QMainWindow):
         # --- Monitor de API: LED rojo/verde ---
         self._api_monitor = ApiMonitor(ApiClient(), self, interval_ms=15000)  # 15s
         self._api_monitor.onlineChanged.connect(self.api_led.set_state)
+        # Al volver la conexión, las ventas pendientes salen sin esperar su backoff
+        self._api_monitor.onlineChanged.connect(self._on_api_online)
         self._api_monitor.start(run_immediately=True)
 
+    # ---------------- Secciones (construcción diferida) ----------------
+    # Los módulos de las vistas también se importan recién aquí: un rol sin
+    # permiso no paga su importación (ver --perfil-arranque para medirla)
+    def _crear_caja(self) -> QtWidgets.QWidget:
+        from app.views.caja_view import CajaView
+        return CajaView(self, usuario_actual=self.user)
+
+    def _crear_bodega(self) -> QtWidgets.QWidget:
+        from app.views.bodega_view import BodegaView
+        return BodegaView(self)
+
+    def _crear_admin(self) -> QtWidgets.QWidget:
+        from app.views.admin_view import AdminView
+        return AdminView(self)
+
+    def _permitido(self, perm: str) -> bool:
+        if DEV_SHOW_ALL:
+            return True
+        perms = PERMISSIONS.get(self.role, PERMISSIONS["Cajero"])
+        return bool(perms.get(perm, False))
+
+    @QtCore.Slot(int)
+    def _mostrar_seccion(self, index: int):
+        if not 0 <= index < len(self.sections):
+            return
+        sec = self.sections[index]
+        if not self._permitido(sec["perm"]):
+            return
+        if sec["widget"] is None:
+            widget = sec["factory"]()
+            placeholder = self.stacked.widget(index)
+            self.stacked.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.stacked.insertWidget(index, widget)
+            sec["widget"] = widget
+            setattr(self, sec["attr"], widget)
+        self.stacked.setCurrentIndex(index)
+
+    @QtCore.Slot(bool)
+    def _on_api_online(self, online: bool):
+        if online:
+            get_ventas_outbox().reintentar_ya()
+
     # ---------------- Helpers UI ----------------
     def _status_text(self) -> str:
         ver = f" — Versión {self.app_version}" if self.app_version else ""
@@ -108,7 +152,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         perms = PERMISSIONS.get(self.role, PERMISSIONS["Cajero"])
         for i, sec in enumerate(self.sections):
-            allowed = bool(perms.get(sec["perm"], False))
+            allowed = self._permitido(sec["perm"])
             item = self.nav.item(i)
             if item:
                 item.setHidden(not allowed)
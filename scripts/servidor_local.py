@@ -0,0 +1,233 @@
+"""
+Servidor de desarrollo que imita la API de CloudPOS (solo stdlib, datos en memoria).
+
+Implementa la sincronización incremental del catálogo:
+    GET /muestra_productos                      -> {"productos": [...], "marca": "N", "completo": true}
+    GET /muestra_productos?cambios_desde=N      -> {"productos": [cambiados], "eliminados": [ids],
+                                                    "marca": "M", "completo": false}
+Una marca desconocida (anterior a lo que se recuerda) responde el catálogo completo.
+
+Uso:
+    python scripts/servidor_local.py [--puerto 8000] [--productos 500] [--sin-delta]
+    CLOUDPOS_API_BASE=http://127.0.0.1:8000 python -m app.main
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import re
+import threading
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_CATEGORIAS = ["Bebidas", "Abarrotes", "Lácteos", "Limpieza", "Panadería", "Congelados"]
+
+
+class Datos:
+    """Estado del servidor. Cada cambio de producto avanza `version` y queda registrado."""
+
+    def __init__(self, n_productos: int, delta: bool = True):
+        self.lock = threading.Lock()
+        self.delta = delta
+        self.version = 0
+        self.categorias = {i + 1: nombre for i, nombre in enumerate(_CATEGORIAS)}
+        self.productos: dict[int, dict] = {}
+        self.cambio: dict[int, int] = {}        # id -> versión del último cambio
+        self.eliminados: dict[int, int] = {}    # id -> versión en que se eliminó
+        self.ventas: list[dict] = []
+        self.idempotencia: dict[str, dict] = {}
+        rnd = random.Random(42)
+        for i in range(1, n_productos + 1):
+            cid = rnd.randint(1, len(_CATEGORIAS))
+            self._guardar({
+                "id": i,
+                "nombre": f"Producto {i:05d}",
+                "categoria_id": cid,
+                "precio": rnd.randrange(300, 30000, 10),
+                "stock": rnd.randint(0, 80),
+                "codigo_barras": f"780{i:010d}",
+            })
+
+    def _guardar(self, p: dict):
+        self.version += 1
+        self.productos[p["id"]] = p
+        self.cambio[p["id"]] = self.version
+        self.eliminados.pop(p["id"], None)
+
+    def _eliminar(self, pid: int):
+        self.version += 1
+        self.productos.pop(pid, None)
+        self.cambio.pop(pid, None)
+        self.eliminados[pid] = self.version
+
+    def vista(self, p: dict) -> dict:
+        return {**{k: v for k, v in p.items() if k != "categoria_id"},
+                "categoria": self.categorias.get(p["categoria_id"], "")}
+
+    def catalogo(self, desde: str | None) -> dict:
+        if desde is not None and self.delta:
+            try:
+                marca = int(desde)
+            except ValueError:
+                marca = -1
+            if 0 <= marca <= self.version:
+                cambiados = [self.vista(self.productos[pid]) for pid, v in self.cambio.items() if v > marca]
+                borrados = [pid for pid, v in self.eliminados.items() if v > marca]
+                return {"productos": cambiados, "eliminados": borrados,
+                        "marca": str(self.version), "completo": False}
+        body = {"productos": [self.vista(p) for p in self.productos.values()], "completo": True}
+        if self.delta:
+            body["marca"] = str(self.version)
+        return body
+
+
+class Handler(BaseHTTPRequestHandler):
+    datos: Datos
+    protocol_version = "HTTP/1.1"
+
+    # ---------------- Utilidades ----------------
+
+    def _send(self, status: int, body) -> None:
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self) -> dict:
+        n = int(self.headers.get("Content-Length") or 0)
+        if not n:
+            return {}
+        try:
+            return json.loads(self.rfile.read(n).decode("utf-8"))
+        except ValueError:
+            return {}
+
+    def log_message(self, fmt, *args):
+        print(f"[servidor_local] {self.command} {self.path} -> {fmt % args}")
+
+    # ---------------- Rutas ----------------
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        q = parse_qs(url.query)
+        d = self.datos
+        with d.lock:
+            if path == "/":
+                return self._send(200, {"status": "ok"})
+            if path in ("/muestra_productos", "/productos"):
+                return self._send(200, d.catalogo((q.get("cambios_desde") or [None])[0]))
+            if path in ("/categorias", "/categoria"):
+                return self._send(200, [{"id": k, "categoria": v} for k, v in d.categorias.items()])
+            if path == "/ListadoVentas":
+                return self._send(200, {"Ventas": d.ventas})
+        self._send(404, {"detail": "Not Found"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        body = self._body()
+        d = self.datos
+        with d.lock:
+            if path == "/vincular":
+                return self._send(200, {"token_vinculacion": uuid.uuid4().hex})
+            if path == "/login":
+                return self._send(200, {"token": uuid.uuid4().hex, "rol_id": 1})
+            if path == "/producto":
+                pid = max(d.productos, default=0) + 1
+                d._guardar({
+                    "id": pid,
+                    "nombre": str(body.get("nombre") or f"Producto {pid}"),
+                    "categoria_id": int(body.get("categoria_id") or 1),
+                    "precio": int(body.get("precio") or 0),
+                    "stock": int(body.get("cantidad") or 0),
+                    "codigo_barras": str(body.get("codigo_barras") or f"780{pid:010d}"),
+                })
+                return self._send(200, {"message": "Producto creado", "id": pid})
+            if path == "/categorias":
+                cid = max(d.categorias, default=0) + 1
+                d.categorias[cid] = str(body.get("categoria") or body.get("nombre") or f"Categoría {cid}")
+                return self._send(200, {"message": "Categoría creada", "id": cid})
+            if path == "/ventas":
+                key = self.headers.get("Idempotency-Key")
+                if key and key in d.idempotencia:
+                    return self._send(200, d.idempotencia[key])
+                for it in body.get("items") or []:
+                    p = d.productos.get(int(it.get("id") or 0))
+                    if p is None or p["stock"] < int(it.get("cantidad") or 0):
+                        return self._send(409, {"detail": f"Stock insuficiente para {it.get('producto')}"})
+                venta_id = len(d.ventas) + 1
+                for it in body.get("items") or []:
+                    p = dict(d.productos[int(it["id"])])
+                    p["stock"] -= int(it.get("cantidad") or 0)
+                    d._guardar(p)
+                    d.ventas.append({
+                        "fecha": body.get("fecha"), "hora": 0, "venta_id": venta_id,
+                        "transaccion": key or "", "vendedor": "", "producto": it.get("producto"),
+                        "cantidad": it.get("cantidad"), "precio": it.get("precio"),
+                        "precio_con_iva": it.get("precio_con_iva"), "subtotal": it.get("subtotal"),
+                        "total_venta": body.get("total"),
+                    })
+                res = {"message": "Venta registrada", "venta_id": venta_id}
+                if key:
+                    d.idempotencia[key] = res
+                return self._send(200, res)
+        self._send(404, {"detail": "Not Found"})
+
+    def do_PUT(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        body = self._body()
+        d = self.datos
+        with d.lock:
+            m = re.fullmatch(r"/producto/(\d+)(/categoria)?", path)
+            if m and int(m.group(1)) in d.productos:
+                p = dict(d.productos[int(m.group(1))])
+                if m.group(2):
+                    p["categoria_id"] = int(body.get("categoria_id") or p["categoria_id"])
+                    msg = "Categoría actualizada"
+                else:
+                    p["precio"] = int(body.get("precio", p["precio"]))
+                    p["stock"] = int(body.get("cantidad", p["stock"]))
+                    msg = "Producto actualizado"
+                d._guardar(p)
+                return self._send(200, {"message": msg})
+        self._send(404, {"detail": "Not Found"})
+
+    def do_DELETE(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        d = self.datos
+        with d.lock:
+            m = re.fullmatch(r"/producto/(\d+)", path)
+            if m and int(m.group(1)) in d.productos:
+                d._eliminar(int(m.group(1)))
+                return self._send(200, {"message": "Producto eliminado"})
+            m = re.fullmatch(r"/categorias/(\d+)", path)
+            if m and d.categorias.pop(int(m.group(1)), None) is not None:
+                return self._send(200, {"message": "Categoría eliminada"})
+        self._send(404, {"detail": "Not Found"})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="API local de desarrollo para CloudPOS")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--puerto", type=int, default=8000)
+    ap.add_argument("--productos", type=int, default=500)
+    ap.add_argument("--sin-delta", action="store_true", help="simula un servidor sin ?cambios_desde=")
+    args = ap.parse_args()
+
+    Handler.datos = Datos(args.productos, delta=not args.sin_delta)
+    server = ThreadingHTTPServer((args.host, args.puerto), Handler)
+    print(f"[servidor_local] {datetime.now():%H:%M:%S} escuchando en http://{args.host}:{args.puerto}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    QtCore = pytest.importorskip("PySide6.QtCore")
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    yield app
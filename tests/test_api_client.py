@@ -0,0 +1,83 @@
+import gzip
+import http.client
+import io
+from contextlib import contextmanager
+
+from app.servicios.api import ApiClient, parse_body, parse_success
+from app.servicios.http_cache import HttpCache
+from app.servicios.metricas import metrics
+from app.servicios.resiliencia import CircuitBreaker, circuits
+
+
+class _Respuesta:
+    def __init__(self, body: bytes, encoding: str = "gzip"):
+        self.status = 200
+        self.headers = http.client.HTTPMessage()
+        self.headers["Content-Encoding"] = encoding
+        self._buf = io.BytesIO(body)
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def read(self, n=-1):
+        return self._buf.read(n)
+
+
+class _Pool:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    @contextmanager
+    def open(self, method, url, body=None, headers=None, timeout=10):
+        yield _Respuesta(self.body)
+
+
+def _cliente(body: bytes) -> ApiClient:
+    return ApiClient(base_url="http://api.local", pool=_Pool(body), cache=HttpCache(ttl_policy={}))
+
+
+def test_gzip_corrupto_devuelve_error_y_cuenta_como_fallo():
+    breaker = circuits.get("POST /prueba-corrupto")
+    breaker.trip()
+    breaker.half_open()
+    res = _cliente(b"no es gzip").post_json("/prueba-corrupto", {"a": 1})
+    assert res["error"] is True and res["status"] == 0
+    # La sonda de HALF_OPEN se liberó: el circuito volvió a OPEN en vez de quedar trabado
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker._probe_in_flight
+
+
+def test_respuesta_truncada_no_escapa():
+    truncado = gzip.compress(b'{"ok": true}' * 100)[:20]
+    res = _cliente(truncado).post_json("/prueba-truncada", {"a": 1})
+    assert res["error"] is True
+
+
+def test_respuesta_sobre_el_tope_cuenta_como_fallo(monkeypatch):
+    monkeypatch.setattr("app.servicios.compresion.MAX_DECODED_BYTES", 1024)
+    breaker = circuits.get("POST /prueba-grande")
+    breaker.trip()
+    breaker.half_open()
+    res = _cliente(gzip.compress(b"\0" * 100_000)).post_json("/prueba-grande", {"a": 1})
+    assert res["error"] is True
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_metricas_cuentan_aciertos_de_cache_y_bytes_del_cable():
+    metrics.reset()
+    cuerpo = b'{"productos": []}' + b" " * 5000
+    comprimido = gzip.compress(cuerpo)
+    client = ApiClient(base_url="http://api.local", pool=_Pool(comprimido),
+                       cache=HttpCache(ttl_policy={"/metricas-cache": 60}))
+    client.get_json("/metricas-cache")
+    client.get_json("/metricas-cache")
+    st = metrics.snapshot()["endpoints"]["GET /metricas-cache"]
+    assert st["count"] == 2 and st["cache_hits"] == 1
+    assert st["bytes_in"] == len(comprimido) < len(cuerpo)
+
+
+def test_parsers_compartidos():
+    assert parse_body(b'{"detail": "x"}') == {"detail": "x"}
+    assert parse_body(b"Bad Gateway") == {"detail": "Bad Gateway"}
+    assert parse_success(b"[1, 2]", 200) == [1, 2]
+    assert parse_success(b"", 204) == {"detail": "OK", "status": 204}
@@ -0,0 +1,93 @@
+import pytest
+
+from app.funciones.busqueda import IndiceBusqueda, distancia_prefijo, errores_permitidos, plegar
+
+PRODUCTOS = [
+    {"id": 1, "nombre": "Jamón serrano", "categoria": "Fiambres", "codigo": "7801234567890"},
+    {"id": 2, "nombre": "Queso gouda", "categoria": "Lácteos"},
+    {"id": 3, "nombre": "Leche entera", "categoria": "Lácteos"},
+    {"id": 4, "nombre": "Leche descremada", "categoria": "Lácteos"},
+    {"id": 5, "nombre": "Chocolate amargo", "categoria": "Dulces"},
+    {"id": 12, "nombre": "Pan amasado", "categoria": "Panadería"},
+]
+
+
+@pytest.fixture
+def indice():
+    ix = IndiceBusqueda()
+    ix.reconstruir(PRODUCTOS)
+    return ix
+
+
+def test_plegar():
+    assert plegar("Jamón Ñandú") == "jamon nandu"
+
+
+@pytest.mark.parametrize("termino, token, maximo, esperado", [
+    ("leche", "leche", 1, 0),
+    ("lech", "leche", 0, 0),          # prefijo exacto
+    ("lehce", "leche", 1, 1),         # transposición cuenta como un error
+    ("chcolate", "chocolate", 1, 1),  # omisión
+    ("xyz", "leche", 1, None),
+    ("jamno", "jamon", 1, 1),
+])
+def test_distancia_prefijo(termino, token, maximo, esperado):
+    assert distancia_prefijo(termino, token, maximo) == esperado
+
+
+def test_errores_permitidos_por_largo():
+    assert [errores_permitidos("x" * n) for n in (3, 4, 7, 8)] == [0, 1, 1, 2]
+
+
+def test_vacia_devuelve_none(indice):
+    assert indice.buscar("   ") is None
+
+
+def test_prefijos_y_tildes(indice):
+    assert indice.buscar("jam") == ["1"]
+    assert set(indice.buscar("lacteos")) == {"2", "3", "4"}
+    assert indice.buscar("leche ent") == ["3"]
+
+
+def test_codigo_exacto_primero(indice):
+    assert indice.buscar("12")[0] == "12"
+    assert indice.buscar("7801234567890") == ["1"]
+
+
+def test_estrechar_reutiliza_el_resultado_previo(indice, monkeypatch):
+    assert set(indice.buscar("le")) == {"3", "4"}
+    llamadas = []
+    original = indice._con_prefijo
+    monkeypatch.setattr(indice, "_con_prefijo", lambda t: llamadas.append(t) or original(t))
+    assert set(indice.buscar("lech")) == {"3", "4"}
+    assert indice.buscar("leche des") == ["4"]
+    assert llamadas == []  # todo salió de filtrar el resultado previo
+
+
+def test_estrechar_se_invalida_al_cambiar_el_indice(indice):
+    assert set(indice.buscar("le")) == {"3", "4"}
+    indice.agregar({"id": 9, "nombre": "Lenteja", "categoria": "Legumbres"})
+    assert "9" in indice.buscar("len")
+
+
+def test_tolerancia_a_errores(indice):
+    assert indice.buscar("chocolaet") == ["5"]
+    assert indice.buscar("quezo") == ["2"]
+    # Los términos cortos deben ser exactos
+    assert indice.buscar("qso") == []
+
+
+def test_aproximado_no_se_estrecha(indice):
+    assert set(indice.buscar("lehce")) == {"3", "4"}
+    # La consulta más larga corrige: no se filtra sobre el resultado aproximado
+    assert indice.buscar("lehce ent") == ["3"]
+
+
+def test_codigos_no_se_corrigen(indice):
+    assert indice.buscar("7801234567891") == []
+
+
+def test_eliminar(indice):
+    assert indice.eliminar("3")
+    assert indice.buscar("leche") == ["4"]
+    assert not indice.eliminar("3")
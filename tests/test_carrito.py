@@ -0,0 +1,61 @@
+from app.funciones.carrito import Carrito
+
+
+def _p(pid, precio=1000, precio_con_iva=None, **extra):
+    p = {"id": pid, "nombre": f"Producto {pid}", "precio": precio, **extra}
+    if precio_con_iva is not None:
+        p["precio_con_iva"] = precio_con_iva
+    return p
+
+
+def test_agregar_mismo_producto_suma_cantidad():
+    c = Carrito()
+    assert c.agregar(_p("1", precio_con_iva=1190), 2) == 0
+    assert c.agregar(_p("2", precio_con_iva=595), 1) == 1
+    assert c.agregar(_p("1", precio_con_iva=1190), 3) == 0
+    assert len(c) == 2
+    assert c.cantidad("1") == 5
+    assert c.total == 5 * 1190 + 595
+
+
+def test_precio_con_iva_se_calcula_si_falta():
+    c = Carrito()
+    c.agregar(_p("1", precio=50), 1)
+    assert c.linea(0).precio_con_iva == 60
+
+
+def test_fijar_cantidad_ajusta_total():
+    c = Carrito()
+    c.agregar(_p("1", precio_con_iva=100), 1)
+    c.agregar(_p("2", precio_con_iva=10), 1)
+    c.fijar_cantidad(c.fila("1"), 4)
+    assert c.total == 410
+
+
+def test_quitar_reindexa_filas():
+    c = Carrito()
+    for pid in ("1", "2", "3"):
+        c.agregar(_p(pid, precio_con_iva=100), 1)
+    linea = c.quitar(c.fila("1"))
+    assert linea.id == "1"
+    assert c.fila("2") == 0 and c.fila("3") == 1
+    assert c.fila("1") is None and c.cantidad("1") == 0
+    assert c.total == 200
+
+
+def test_vaciar():
+    c = Carrito()
+    c.agregar(_p("1", precio_con_iva=100), 2)
+    c.vaciar()
+    assert len(c) == 0 and c.total == 0 and c.fila("1") is None
+
+
+def test_items_con_ids_numericos_como_int():
+    c = Carrito()
+    c.agregar(_p("7", precio=1000, precio_con_iva=1190), 2)
+    c.agregar(_p("SKU-1", precio=100, precio_con_iva=119), 1)
+    assert c.items() == [
+        {"id": 7, "producto": "Producto 7", "precio": 1000, "precio_con_iva": 1190, "cantidad": 2, "subtotal": 2380},
+        {"id": "SKU-1", "producto": "Producto SKU-1", "precio": 100, "precio_con_iva": 119, "cantidad": 1,
+         "subtotal": 119},
+    ]
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from app.servicios.carrito_journal import CarritoJournal
+
+
+def _producto(pid, precio=1000):
+    return {"id": pid, "nombre": f"Producto {pid}", "precio": precio, "precio_con_iva": precio * 119 // 100}
+
+
+def _abrir(path):
+    j = CarritoJournal(path=str(path), fsync_ms=10_000)
+    return j, j.recuperar()
+
+
+@pytest.fixture
+def ruta(tmp_path, qapp):
+    return tmp_path / "carrito.journal"
+
+
+def test_replay_restaura_el_carrito(ruta):
+    j, c = _abrir(ruta)
+    for pid, cant in (("1", 2), ("2", 1), ("1", 1)):
+        c.agregar(_producto(pid), cant)
+        j.agregar(_producto(pid), cant)
+    c.fijar_cantidad(c.fila("2"), 5)
+    j.fijar_cantidad("2", 5)
+    j.close()
+
+    _, c2 = _abrir(ruta)
+    assert c2.items() == c.items()
+    assert c2.total == c.total
+
+
+def test_quitar_y_cobrada(ruta):
+    j, c = _abrir(ruta)
+    for pid in ("1", "2"):
+        c.agregar(_producto(pid), 1)
+        j.agregar(_producto(pid), 1)
+    c.quitar(c.fila("1"))
+    j.quitar("1")
+    j.close()
+    j, c = _abrir(ruta)
+    assert [ln.id for ln in c] == ["2"]
+
+    j.cobrada("clave-1")
+    j.close()
+    _, c = _abrir(ruta)
+    assert len(c) == 0
+
+
+def test_cola_cortada_no_pierde_lo_escrito_despues(ruta):
+    lineas = [["a", ["1", "Uno", 1000, 1190], 1], ["a", ["2", "Dos", 500, 595], 2]]
+    with open(ruta, "wb") as f:
+        for rec in lineas:
+            f.write(json.dumps(rec).encode() + b"\n")
+        f.write(b'["a",["3","Tr')
+
+    j, c = _abrir(ruta)
+    assert [ln.id for ln in c] == ["1", "2"]
+    c.agregar(_producto("4"), 1)
+    j.agregar(_producto("4"), 1)
+    j.close()
+
+    _, c = _abrir(ruta)
+    assert [ln.id for ln in c] == ["1", "2", "4"]
+
+
+def test_ultima_linea_sin_salto_se_compacta(ruta):
+    with open(ruta, "wb") as f:
+        f.write(b'["a",["1","Uno",1000,1190],1]')
+    j, c = _abrir(ruta)
+    c.agregar(_producto("2"), 1)
+    j.agregar(_producto("2"), 1)
+    j.close()
+    _, c = _abrir(ruta)
+    assert [ln.id for ln in c] == ["1", "2"]
+
+
+def test_compactar_deja_un_snapshot(ruta):
+    j = CarritoJournal(path=str(ruta), fsync_ms=10_000, compactar_cada=5)
+    c = j.recuperar()
+    for i in range(12):
+        c.agregar(_producto(str(i % 3)), 1)
+        j.agregar(_producto(str(i % 3)), 1)
+    j.close()
+    assert len(ruta.read_bytes().splitlines()) < 5
+    _, c2 = _abrir(ruta)
+    assert c2.items() == c.items()
@@ -0,0 +1,31 @@
+from app.servicios.catalogo_local import CatalogoLocal
+
+URL = "http://api"
+
+
+def _cat(tmp_path):
+    return CatalogoLocal(path=str(tmp_path / "catalogo.sqlite3"))
+
+
+def test_guardar_y_aplicar_cambios(tmp_path):
+    cat = _cat(tmp_path)
+    assert cat.guardar(URL, [{"id": "1", "nombre": "a"}, {"id": "2", "nombre": "b"}], "5")
+    assert cat.aplicar_cambios(URL, [{"id": "2", "nombre": "B"}, {"id": "3", "nombre": "c"}], ["1"], "7")
+    assert [p["nombre"] for p in cat.cargar(URL)] == ["B", "c"]
+    assert cat.marca(URL) == "7"
+
+
+def test_escritura_con_marca_anterior_se_ignora(tmp_path):
+    cat = _cat(tmp_path)
+    cat.guardar(URL, [{"id": "1", "nombre": "nuevo"}], "10")
+    assert not cat.guardar(URL, [{"id": "1", "nombre": "viejo"}], "9")
+    assert not cat.aplicar_cambios(URL, [{"id": "1", "nombre": "viejo"}], [], "8")
+    assert cat.cargar(URL) == [{"id": "1", "nombre": "nuevo"}]
+    assert cat.marca(URL) == "10"
+
+
+def test_marcas_no_numericas_no_se_comparan(tmp_path):
+    cat = _cat(tmp_path)
+    cat.guardar(URL, [{"id": "1"}], "b")
+    assert cat.guardar(URL, [{"id": "2"}], "a")
+    assert cat.marca(URL) == "a"
@@ -0,0 +1,52 @@
+import gzip
+import io
+import zlib
+
+import pytest
+
+from app.servicios.compresion import RespuestaDemasiadoGrande, read_decoded
+
+
+class _Respuesta:
+    def __init__(self, body: bytes, encoding: str):
+        self._buf = io.BytesIO(body)
+        self._encoding = encoding
+
+    def getheader(self, name, default=None):
+        return self._encoding if name == "Content-Encoding" else default
+
+    def read(self, n=-1):
+        return self._buf.read(n)
+
+
+def test_gzip_se_descomprime():
+    datos = b'{"productos": []}' * 1000
+    body, wire = read_decoded(_Respuesta(gzip.compress(datos), "gzip"))
+    assert body == datos
+    assert wire < len(datos)
+
+
+def test_deflate_sin_cabecera_zlib():
+    datos = b"x" * 5000
+    c = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    crudo = c.compress(datos) + c.flush()
+    body, _ = read_decoded(_Respuesta(crudo, "deflate"))
+    assert body == datos
+
+
+def test_cuerpo_exacto_en_el_tope():
+    datos = b"a" * 4096
+    body, _ = read_decoded(_Respuesta(gzip.compress(datos), "gzip"), max_bytes=4096)
+    assert body == datos
+
+
+def test_bomba_de_compresion_se_corta():
+    bomba = gzip.compress(b"\0" * (8 * 1024 * 1024))
+    with pytest.raises(RespuestaDemasiadoGrande):
+        read_decoded(_Respuesta(bomba, "gzip"), max_bytes=1024 * 1024)
+
+
+def test_gzip_truncado_es_error():
+    cortado = gzip.compress(b'{"ok": true}' * 100)[:20]
+    with pytest.raises(zlib.error):
+        read_decoded(_Respuesta(cortado, "gzip"))
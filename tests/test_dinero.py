@@ -0,0 +1,44 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+import pytest
+
+from app.funciones.dinero import TablaIVA, _leer_tasa, _tabla_categorias, con_iva, formatear
+
+
+@pytest.mark.parametrize("precio, tasa, esperado", [
+    (0, 1900, 0),
+    (1, 1900, 1),        # 1.19 -> 1
+    (50, 1900, 60),      # 59.5 -> 60 (mitad hacia arriba)
+    (1000, 1900, 1190),
+    (1050, 1900, 1250),  # 1249.5 -> 1250
+    (999, 0, 999),
+    (100, 1950, 120),    # 119.5 -> 120
+])
+def test_con_iva_redondeo_half_up(precio, tasa, esperado):
+    assert con_iva(precio, tasa) == esperado
+
+
+def test_con_iva_coincide_con_decimal():
+    for precio in range(0, 20_000, 7):
+        exacto = (Decimal(precio) * Decimal("1.19")).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        assert con_iva(precio, 1900) == int(exacto)
+
+
+def test_tabla_por_categoria():
+    tabla = TablaIVA(1900, _tabla_categorias("Libros:0, Medicamentos: 5,basura,:3"))
+    assert tabla.tasa("libros") == 0
+    assert tabla.tasa("MEDICAMENTOS") == 500
+    assert tabla.tasa("Otra") == 1900
+    assert tabla.tasa(None) == 1900
+    assert tabla.con_iva(1000, "Libros") == 1000
+
+
+def test_leer_tasa():
+    assert _leer_tasa("19") == 1900
+    assert _leer_tasa("19,5") == 1950
+
+
+def test_formatear():
+    assert formatear(0) == "$0"
+    assert formatear(1234567) == "$1.234.567"
+    assert formatear(1234, simbolo=False) == "1.234"
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from app.servicios.executor import TaskExecutor
+
+
+def test_serie_corre_de_a_una_y_en_orden(qapp):
+    ex = TaskExecutor(max_workers=4)
+    orden = []
+    activas = []
+    lock = threading.Lock()
+
+    def tarea(i):
+        with lock:
+            activas.append(i)
+            simultaneas = len(activas)
+        time.sleep(0.01 if i == 0 else 0.001)
+        with lock:
+            activas.remove(i)
+            orden.append((i, simultaneas))
+
+    for i in range(6):
+        ex.submit("escribir", tarea, i, serie="disco")
+    assert ex.shutdown(5000)
+    assert [i for i, _ in orden] == list(range(6))
+    assert all(n == 1 for _, n in orden)
+
+
+def test_shutdown_deja_terminar_lo_encolado(qapp):
+    ex = TaskExecutor(max_workers=1)
+    hechas = []
+    ex.submit("lenta", time.sleep, 0.05)
+    for i in range(3):
+        ex.submit("encolada", hechas.append, i)
+    assert ex.shutdown(5000)
+    assert hechas == [0, 1, 2]
@@ -0,0 +1,44 @@
+import http.client
+
+import pytest
+
+from app.servicios.http_pool import ConnectionPool
+
+
+class _ConexionCerrada:
+    """Conexión reutilizada cuyo socket el servidor ya cerró."""
+
+    def __init__(self, intentos):
+        self.sock = object()
+        self._intentos = intentos
+
+    def request(self, *args, **kwargs):
+        self._intentos.append(args[0])
+        raise http.client.RemoteDisconnected("cerrada")
+
+    def close(self):
+        pass
+
+
+def _intentos(method, headers=None):
+    intentos = []
+    pool = ConnectionPool()
+    pool._acquire = lambda key, timeout: (_ConexionCerrada(intentos), True)
+    pool._release = lambda *args, **kwargs: None
+    with pytest.raises(http.client.RemoteDisconnected):
+        with pool.open(method, "http://api.local/x", headers=headers):
+            pass
+    return len(intentos)
+
+
+def test_get_se_reintenta_con_socket_obsoleto():
+    assert _intentos("GET") == 2
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "DELETE"])
+def test_escrituras_no_se_repiten(method):
+    assert _intentos(method) == 1
+
+
+def test_post_con_idempotency_key_se_reintenta():
+    assert _intentos("POST", {"Idempotency-Key": "abc"}) == 2
@@ -0,0 +1,21 @@
+import json
+
+from app.servicios import metricas
+from app.servicios.metricas import dump_metrics, metrics
+
+
+def test_dump_atomico(tmp_path):
+    destino = tmp_path / "metricas.json"
+    metrics.record("GET", "/producto/7", 200, 12.0, 100, 0)
+    assert dump_metrics(str(destino))
+    assert "GET /producto/{id}" in json.loads(destino.read_text(encoding="utf-8"))["endpoints"]
+    assert [p.name for p in tmp_path.iterdir()] == ["metricas.json"]
+
+
+def test_dump_fallido_no_lanza_ni_deja_temporales(tmp_path, monkeypatch):
+    def roto():
+        raise TypeError("no serializable")
+
+    monkeypatch.setattr(metricas.metrics, "snapshot", roto)
+    assert dump_metrics(str(tmp_path / "metricas.json")) is False
+    assert list(tmp_path.iterdir()) == []
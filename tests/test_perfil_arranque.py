@@ -0,0 +1,26 @@
+import importlib
+import json
+import sys
+
+from app.servicios.perfil_arranque import PerfilArranque
+
+
+def test_mide_imports_hasta_emitir(tmp_path):
+    perfil = PerfilArranque()
+    perfil.activar(str(tmp_path / "perfil.json"))
+    sys.modules.pop("app.funciones.rol", None)
+    perfil.marcar("main_lista")
+    # Import "tardío", como el de una sección que se abre después del login
+    importlib.import_module("app.funciones.rol")
+    perfil.emitir()
+    datos = json.loads((tmp_path / "perfil.json").read_text(encoding="utf-8"))
+    assert "app.funciones.rol" in [i["modulo"] for i in datos["imports_ms"]]
+    assert perfil._buscador is None
+
+
+def test_ruta_invalida_imprime_en_stderr(tmp_path, capsys):
+    perfil = PerfilArranque()
+    perfil.activar(str(tmp_path / "no-existe" / "perfil.json"))
+    perfil.emitir()
+    err = capsys.readouterr().err
+    assert "no se pudo escribir" in err and "[PerfilArranque] Fases" in err
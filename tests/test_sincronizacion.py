@@ -0,0 +1,148 @@
+import importlib.util
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from app.servicios.api import ApiClient
+from app.servicios.catalogo_local import CatalogoLocal
+from app.servicios.http_cache import HttpCache
+from app.servicios.http_pool import ConnectionPool
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+
+from app.servicios.product_store import ProductStore  # noqa: E402
+from app.servicios.productos_service import ProductosService, _SincronizarProductosWorker  # noqa: E402
+
+_spec = importlib.util.spec_from_file_location(
+    "servidor_local", os.path.join(os.path.dirname(__file__), "..", "scripts", "servidor_local.py"))
+servidor_local = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(servidor_local)
+
+
+class _Silencioso(servidor_local.Handler):
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    """Levanta la API local en un puerto libre; devuelve una función crear(datos, handler)."""
+    servers, pools = [], []
+
+    def crear(datos, handler=_Silencioso):
+        cls = type("H", (handler,), {"datos": datos})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), cls)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        pool = ConnectionPool()
+        pools.append(pool)
+        return ApiClient(base_url=f"http://127.0.0.1:{server.server_port}", pool=pool,
+                         cache=HttpCache(ttl_policy={}))
+
+    yield crear
+    for pool in pools:
+        pool.close_idle()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _sync(client, marca=None) -> dict:
+    worker = _SincronizarProductosWorker(client, marca)
+    out = []
+    worker.finished.connect(lambda res, err: out.append((res, err)))
+    worker.run()
+    res, err = out[0]
+    assert err == ""
+    return res
+
+
+def _esperar(cond, timeout=5.0):
+    app = QtCore.QCoreApplication.instance()
+    fin = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < fin, "tiempo de espera agotado"
+        app.processEvents(QtCore.QEventLoop.AllEvents, 20)
+
+
+def test_carga_completa_trae_marca(servidor):
+    datos = servidor_local.Datos(5)
+    res = _sync(servidor(datos))
+    assert res["completo"] and res["delta_soportado"]
+    assert len(res["productos"]) == 5
+    assert res["marca"] == str(datos.version)
+
+
+def test_delta_despues_de_put_y_delete(servidor):
+    datos = servidor_local.Datos(5)
+    client = servidor(datos)
+    marca = _sync(client)["marca"]
+    assert not client.put_json("/producto/2/", {"precio": 999, "cantidad": 1}).get("error")
+    assert not client.delete_json("/producto/4").get("error")
+    res = _sync(client, marca)
+    assert not res["completo"]
+    assert [(p["id"], p["precio"]) for p in res["productos"]] == [(2, 999)]
+    assert res["eliminados"] == ["4"]
+    assert res["marca"] == str(datos.version) != marca
+
+
+def test_servidor_sin_delta_cae_a_carga_completa(servidor):
+    res = _sync(servidor(servidor_local.Datos(3, delta=False)), "7")
+    assert res["completo"] and not res["delta_soportado"]
+    assert len(res["productos"]) == 3 and res["marca"] is None
+
+
+@pytest.mark.parametrize("status", [400, 404, 405, 422, 501])
+def test_delta_rechazado_cae_a_carga_completa(servidor, status):
+    class _SinDelta(_Silencioso):
+        def do_GET(self):
+            if "cambios_desde=" in self.path:
+                return self._send(status, {"detail": "no soportado"})
+            return super().do_GET()
+
+    res = _sync(servidor(servidor_local.Datos(3), _SinDelta), "1")
+    assert res["completo"] and not res["delta_soportado"]
+    assert len(res["productos"]) == 3
+
+
+def test_store_aplica_el_delta_sobre_el_indice(servidor, qapp):
+    datos = servidor_local.Datos(4)
+    client = servidor(datos)
+    store = ProductStore(service=ProductosService(client=client))
+    cambios = []
+    store.productosCambiados.connect(lambda c, e: cambios.append(([p["id"] for p in c], e)))
+    store.cargar()
+    _esperar(lambda: store.is_loaded())
+
+    client.put_json("/producto/1/", {"precio": 1234, "cantidad": 3})
+    client.delete_json("/producto/3")
+    store.recargar()
+    _esperar(lambda: cambios)
+    assert cambios == [(["1"], ["3"])]
+    assert store.get(1)["precio"] == 1234 and store.get(1)["stock"] == 3
+    assert store.get(3) is None
+    assert [p["id"] for p in store.productos()] == ["1", "2", "4"]
+
+
+def test_arranque_en_frio_desde_disco_y_delta_vacio(servidor, qapp, tmp_path):
+    datos = servidor_local.Datos(4)
+    client = servidor(datos)
+    catalogo = CatalogoLocal(path=str(tmp_path / "catalogo.sqlite3"))
+    completo = _sync(client)
+    catalogo.guardar(client.base_url, completo["productos"], completo["marca"])
+
+    store = ProductStore(service=ProductosService(client=client), catalogo=catalogo)
+    cargados, cambios = [], []
+    store.productosCargados.connect(cargados.append)
+    store.productosCambiados.connect(lambda c, e: cambios.append((c, e)))
+    store.cargar()
+    # La copia en disco se entrega de inmediato, antes de la respuesta de la API
+    assert store.es_local() and len(cargados) == 1 and len(store.productos()) == 4
+
+    _esperar(lambda: cambios)
+    assert cambios == [([], [])]
+    assert not store.es_local() and len(cargados) == 1
+    assert catalogo.marca(client.base_url) == completo["marca"]
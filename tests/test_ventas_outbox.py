@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from app.servicios.ventas_outbox import VentasOutbox, _clasificar
+
+
+@pytest.mark.parametrize("res, kind", [
+    ({"venta_id": 1}, "ok"),
+    ("OK", "ok"),
+    ({"error": True, "status": 0, "detail": "Error de red"}, "reintentar"),
+    ({"error": True, "status": 429}, "reintentar"),
+    ({"error": True, "status": 503}, "reintentar"),
+    ({"error": True, "status": 401}, "sesion"),
+    ({"error": True, "status": 403}, "rechazada"),
+    ({"error": True, "status": 409, "detail": "Stock insuficiente"}, "rechazada"),
+    ({"error": True, "status": 422, "detail": [{"msg": "campo requerido"}]}, "rechazada"),
+])
+def test_clasificar(res, kind):
+    assert _clasificar(res)[0] == kind
+
+
+def test_clasificar_mensaje_de_validacion():
+    assert _clasificar({"error": True, "status": 422, "detail": [{"msg": "total inválido"}]}) == (
+        "rechazada", "total inválido")
+
+
+class _Cliente:
+    def __init__(self, respuestas):
+        self.respuestas = list(respuestas)
+        self.enviadas = []
+
+    def post_body(self, path, body, headers=None):
+        self.enviadas.append(body)
+        return self.respuestas.pop(0)
+
+
+@pytest.fixture
+def outbox(tmp_path, qapp, monkeypatch):
+    monkeypatch.setattr(VentasOutbox, "flush_now", lambda self: None)
+
+    def crear(respuestas):
+        ob = VentasOutbox(path=str(tmp_path / "outbox.sqlite3"), client=_Cliente(respuestas))
+        for i in range(3):
+            ob.encolar(f'{{"n":{i}}}'.encode())
+        return ob
+
+    yield crear
+
+
+def test_403_no_bloquea_las_siguientes(outbox):
+    ob = outbox([{"error": True, "status": 403}, {"venta_id": 1}, {"venta_id": 2}])
+    res = ob._enviar_lote()
+    assert len(res["rechazadas"]) == 1 and len(res["enviadas"]) == 2
+    assert ob.pendientes() == 0
+    assert [r["payload"] for r in ob.rechazadas()] == [{"n": 0}]
+    ob.close()
+
+
+def test_401_pausa_sin_backoff_y_conserva_el_orden(outbox):
+    ob = outbox([{"error": True, "status": 401, "detail": "Token vencido"}])
+    res = ob._enviar_lote()
+    assert res["sesion"] == "Token vencido"
+    assert res["enviadas"] == [] and res["rechazadas"] == []
+    assert ob.pendientes() == 3
+    assert ob._client.enviadas == [b'{"n":0}']
+    ob.close()
+
+
+def test_401_con_venta_nueva_durante_el_lote_vuelve_a_enviar(outbox):
+    ob = outbox([{"error": True, "status": 401, "detail": "Token vencido"}] * 2)
+    flushes = []
+    ob.flush_now = lambda: flushes.append(1)
+    ob._flushing = True
+    res = ob._enviar_lote()
+    ob._again = True  # lo que hace flush_now si se encola una venta con el lote en vuelo
+    ob._on_lote(res)
+    assert flushes == [1] and not ob._again
+
+    ob._flushing = True
+    ob._on_lote(ob._enviar_lote())
+    assert flushes == [1] and not ob._timer.isActive()
+    ob.close()
+
+
+def test_error_transitorio_bloquea_con_backoff(outbox):
+    ob = outbox([{"error": True, "status": 503}])
+    res = ob._enviar_lote()
+    assert res["demorada"] is not None
+    assert res["proxima"] is not None
+    assert ob.pendientes() == 3
+    ob.close()
+
+
+def test_close_durante_el_envio_deja_la_venta_pendiente(outbox, tmp_path):
+    ob = outbox([])
+
+    def post_y_cerrar(path, body, headers=None):
+        ob.close()
+        return {"venta_id": 1}
+
+    ob._client.post_body = post_y_cerrar
+    assert ob._enviar_lote()["enviadas"] == []
+    ob2 = VentasOutbox(path=str(tmp_path / "outbox.sqlite3"), client=_Cliente([]))
+    assert ob2.pendientes() == 3
+    ob2.close()
+
+
+def test_reenviar_y_exportar_rechazadas(outbox, tmp_path):
+    ob = outbox([{"error": True, "status": 409, "detail": "Stock insuficiente"}, {"venta_id": 1},
+                 {"venta_id": 2}, {"venta_id": 3}])
+    ob._enviar_lote()
+    clave = ob.rechazadas()[0]["clave"]
+
+    destino = tmp_path / "rechazadas.json"
+    assert ob.exportar_rechazadas(str(destino)) == 1
+    assert json.loads(destino.read_text(encoding="utf-8"))[0]["payload"] == {"n": 0}
+
+    assert ob.reenviar("otra-clave") == 0
+    assert ob.reenviar(clave) == 1
+    assert ob.rechazadas() == [] and ob.pendientes() == 1
+    res = ob._enviar_lote()
+    assert res["enviadas"][0][0] == clave
+    # La misma clave de idempotencia: el servidor no la duplica si ya la había aceptado
+    assert ob.pendientes() == 0
+    ob.close()